@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+# Benchmark env steps/sec of the pipelined VecTask against plain synchronous stepping.
+#
+#   python benchmark_pipeline.py --task UR5Package --headless
+#   python benchmark_pipeline.py --task UR5Package --headless --pipeline
+
+import time
+
+from utils.config import set_np_formatting, set_seed, get_args, parse_sim_params, load_cfg
+from utils.parse_task import parse_task
+from utils.rl_pytorch.ppo import ActorCritic
+
+import torch
+
+
+def make_policy(env):
+    if args.random_actions:
+        return lambda obs: 2 * torch.rand((obs.shape[0], env.num_actions), device=env.rl_device) - 1
+
+    actor_critic = ActorCritic(env.observation_space.shape, env.state_space.shape, env.action_space.shape,
+                               cfg_train["learn"].get("init_noise_std", 0.3), cfg_train["policy"])
+    actor_critic.to(env.rl_device)
+    return actor_critic.act_inference
+
+
+def synchronize(env):
+    if torch.device(env.rl_device).type == 'cuda':
+        torch.cuda.synchronize(env.rl_device)
+
+
+def run_sync(env, policy, num_steps):
+    obs = env.reset()
+    with torch.no_grad():
+        for _ in range(num_steps):
+            obs, _, _, _ = env.step(policy(obs))
+    synchronize(env)
+
+
+def run_pipelined(env, policy, num_steps):
+    # Actions for one half are computed while the other half is simulating
+    obs = env.reset()
+    with torch.no_grad():
+        for half_id, env_slice in enumerate(env.half_slices):
+            env.step_async(half_id, policy(obs[env_slice]))
+        for _ in range(num_steps - 1):
+            for half_id in range(env.num_halves):
+                half_obs, _, _, _ = env.step_wait(half_id)
+                env.step_async(half_id, policy(half_obs))
+        for half_id in range(env.num_halves):
+            env.step_wait(half_id)
+    synchronize(env)
+
+
+def benchmark():
+    task, env = parse_task(args, cfg, cfg_train, sim_params)
+    policy = make_policy(env)
+    run = run_pipelined if args.pipeline else run_sync
+    num_steps = cfg_train["learn"].get("nsteps", 32)
+
+    # warm up JIT and the simulator before timing
+    run(env, policy, num_steps)
+
+    results = []
+    for i in range(args.bench_len):
+        start = time.time()
+        run(env, policy, num_steps)
+        steps_per_sec = num_steps * env.num_envs / (time.time() - start)
+        results.append(steps_per_sec)
+        print("[{}/{}] {:.0f} env steps/s".format(i + 1, args.bench_len, steps_per_sec))
+
+    mode = "pipelined" if args.pipeline else "sync"
+    summary = "{} {} num_envs={} mean={:.0f} env steps/s".format(args.task, mode, env.num_envs, sum(results) / len(results))
+    print(summary)
+    if args.bench_file:
+        with open(args.bench_file, "a") as f:
+            f.write(summary + "\n")
+
+
+if __name__ == '__main__':
+    set_np_formatting()
+    args = get_args(benchmark=True)
+    cfg, cfg_train, logdir = load_cfg(args)
+    sim_params = parse_sim_params(args, cfg, cfg_train)
+    set_seed(cfg_train.get("seed", -1), cfg_train.get("torch_deterministic", False))
+    benchmark()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+# Benchmark the RL algorithms on the tensor-only PointMassReach task, needs neither isaacgym nor a GPU.
+#
+#   python benchmark_rl.py --algo all --num_envs 256 --rl_device cpu
+
+import argparse
+import os
+import tempfile
+import time
+from functools import partial
+
+import yaml
+import torch
+
+from tasks.point_mass_reach import PointMassReach
+from tasks.base.vec_task import VecTaskPython
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Benchmark PPO, SAC and SAC-HER without a simulator")
+    parser.add_argument("--algo", type=str, default="all", choices=["ppo", "sac", "sac_her", "all"])
+    parser.add_argument("--num_envs", type=int, default=256)
+    parser.add_argument("--sim_device", type=str, default="cpu", help="Device of the stand-in task tensors")
+    parser.add_argument("--rl_device", type=str, default="cpu")
+    parser.add_argument("--env_steps", type=int, default=200, help="Rollout steps timed per algorithm")
+    parser.add_argument("--updates", type=int, default=10, help="Calls to update() timed per algorithm")
+    parser.add_argument("--batch_size", type=int, default=16, help="SAC replay batch size, counted in env batches")
+    parser.add_argument("--cfg_env", type=str, default="cfg/point_mass_reach.yaml")
+    parser.add_argument("--cfg_train", type=str, default="cfg/train/rlpt/pytorch_ppo_point_mass_reach.yaml")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def create_env(args, use_her=False):
+    with open(os.path.join(os.getcwd(), args.cfg_env), 'r') as f:
+        cfg = yaml.load(f, Loader=yaml.SafeLoader)
+    cfg["env"]["numEnvs"] = args.num_envs
+    cfg["env"]["useHer"] = use_her
+
+    device = torch.device(args.sim_device)
+    task = PointMassReach(cfg, device_type=device.type, device_id=device.index or 0)
+    return VecTaskPython(task, args.rl_device, cfg_train.get("clip_observations", 5.0), cfg_train.get("clip_actions", 1.0))
+
+
+def synchronize(args):
+    for device in (args.sim_device, args.rl_device):
+        if torch.device(device).type == 'cuda':
+            torch.cuda.synchronize(device)
+
+
+def timed(args, fn, n):
+    fn()  # warm up
+    synchronize(args)
+    start = time.time()
+    for _ in range(n):
+        fn()
+    synchronize(args)
+    return time.time() - start
+
+
+def benchmark_env(args):
+    env = create_env(args)
+    env.reset()
+    actions = torch.zeros((env.num_envs, env.num_actions), device=args.rl_device)
+
+    def step():
+        actions.uniform_(-1, 1)
+        env.step(actions)
+
+    elapsed = timed(args, step, args.env_steps)
+    return {"env steps/s": args.env_steps * env.num_envs / elapsed}
+
+
+def benchmark_ppo(args, log_dir):
+    from utils.rl_pytorch.ppo import PPO, ActorCritic
+
+    env = create_env(args)
+    learn_cfg = cfg_train["learn"]
+    ppo = PPO(vec_env=env,
+              actor_critic_class=ActorCritic,
+              num_transitions_per_env=learn_cfg["nsteps"],
+              num_learning_epochs=learn_cfg["noptepochs"],
+              num_mini_batches=learn_cfg["nminibatches"],
+              clip_param=learn_cfg["cliprange"],
+              gamma=learn_cfg["gamma"],
+              lam=learn_cfg["lam"],
+              init_noise_std=learn_cfg.get("init_noise_std", 0.3),
+              learning_rate=learn_cfg["optim_stepsize"],
+              max_grad_norm=learn_cfg.get("max_grad_norm", 2.0),
+              model_cfg=cfg_train["policy"],
+              device=args.rl_device,
+              log_dir=log_dir,
+              print_log=False)
+
+    obs = env.reset().clone()
+    states = env.get_state().clone()
+
+    def rollout_step():
+        with torch.no_grad():
+            actions, actions_log_prob, values, mu, sigma = ppo.actor_critic.act(obs, states)
+            next_obs, rews, dones, infos = env.step(actions)
+            if ppo.storage.step >= ppo.storage.num_transitions_per_env:
+                ppo.storage.clear()
+            ppo.storage.add_transitions(obs, states, actions, rews, dones, values, actions_log_prob, mu, sigma)
+            obs.copy_(next_obs)
+            states.copy_(env.get_state())
+
+    rollout_time = timed(args, rollout_step, args.env_steps)
+
+    # Fill the storage once, the same rollout is reused for every timed update
+    ppo.storage.clear()
+    for _ in range(ppo.num_transitions_per_env):
+        rollout_step()
+    with torch.no_grad():
+        _, _, last_values, _, _ = ppo.actor_critic.act(obs, states)
+    ppo.storage.compute_returns(last_values, ppo.gamma, ppo.lam)
+
+    num_minibatch_updates = []
+    update_time = timed(args, lambda: num_minibatch_updates.append(ppo.update()[-1]), args.updates)
+
+    return {"env steps/s": args.env_steps * env.num_envs / rollout_time,
+            "updates/s": args.updates / update_time,
+            "minibatch updates/s": sum(num_minibatch_updates[1:]) / update_time}
+
+
+def benchmark_sac(args, log_dir, use_her=False):
+    if use_her:
+        from utils.rl_pytorch.sac_her import SAC, ActorCritic
+    else:
+        from utils.rl_pytorch.sac import SAC, ActorCritic
+
+    env = create_env(args, use_her=use_her)
+    actor_critic_class = partial(ActorCritic, goal_shape=env.task.goal_buf.shape[1]) if use_her else ActorCritic
+    sac = SAC(vec_env=env,
+              actor_critic_class=actor_critic_class,
+              num_learning_epochs=1,
+              demonstration_buffer_len=0,
+              batch_size=args.batch_size,
+              device=args.rl_device,
+              log_dir=log_dir,
+              print_log=False)
+
+    obs = env.reset().clone()
+    goal = env.task.goal_buf.to(args.rl_device)
+
+    def rollout_step():
+        with torch.no_grad():
+            if use_her:
+                actions = sac.actor_critic.act(torch.cat([obs, goal], -1))
+                next_obs, reward, done, next_goal, _ = env.step(actions)
+                sac.buffer.push((torch.cat([obs, goal], -1), actions, reward * sac.reward_scale,
+                                 torch.cat([next_obs, next_goal], -1), done.clone()))
+                goal.copy_(next_goal)
+            else:
+                actions = sac.actor_critic.act(obs)
+                next_obs, reward, done, _ = env.step(actions)
+                sac.buffer.push((obs.clone(), actions, reward * sac.reward_scale, next_obs.clone(), done.clone()))
+            obs.copy_(next_obs)
+
+    rollout_time = timed(args, rollout_step, max(args.env_steps, args.batch_size))
+    update_time = timed(args, partial(sac.update, args.batch_size), args.updates)
+
+    return {"env steps/s": max(args.env_steps, args.batch_size) * env.num_envs / rollout_time,
+            "updates/s": args.updates / update_time}
+
+
+def benchmark():
+    results = {"env only": benchmark_env(args)}
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        if args.algo in ("ppo", "all"):
+            results["PPO"] = benchmark_ppo(args, log_dir)
+        if args.algo in ("sac", "all"):
+            results["SAC"] = benchmark_sac(args, log_dir)
+        if args.algo in ("sac_her", "all"):
+            results["SACHER"] = benchmark_sac(args, log_dir, use_her=True)
+
+    print("num_envs={} sim_device={} rl_device={}".format(args.num_envs, args.sim_device, args.rl_device))
+    for name, result in results.items():
+        print("{:>10s}: ".format(name) + ", ".join("{} {:.1f}".format(key, value) for key, value in result.items()))
+
+
+if __name__ == '__main__':
+    args = get_args()
+    with open(os.path.join(os.getcwd(), args.cfg_train), 'r') as f:
+        cfg_train = yaml.load(f, Loader=yaml.SafeLoader)
+    torch.manual_seed(args.seed)
+    benchmark()
@@ -1,37 +1,75 @@
-import gym
-from numpy import vectorize
-from tasks.base.vec_task import VecTask
-from gym import spaces
+from gym.vector import VectorEnv
 
-from isaacgym import gymtorch
-from isaacgym.torch_utils import to_torch
 import torch
 import numpy as np
 
-class CustomEnv(gym.Env, VecTask):
 
-    def __init__(self):
-        super(CustomEnv, self).__init__()
-        # Define action and observation space
-        # They must be gym.spaces objects
-        # Example when using discrete actions:
-        self.action_space = self.act_space
-        # Example for using image as input (channel-first; channel-last also works):
-        self.observation_space = self.obs_space
+class IsaacVectorEnv(VectorEnv):
+    """gym VectorEnv over a VecTask, every call steps all envs of the task at once.
 
-    def step(self, actions):
-        actions_tensor = torch.clamp(actions, -self.clip_actions, self.clip_actions)
+    With as_numpy=False the batched torch tensors of the VecTask are handed out on its
+    rl_device without copies. With as_numpy=True they are returned as numpy arrays, which
+    are views of the VecTask output buffers when rl_device is the cpu. Either way the
+    returned buffers are overwritten by the next step, copy what has to be kept.
 
-        self.task.step(actions_tensor)
+    Envs are reset by the task itself: the observation returned with terminated/truncated
+    set is the final observation of the episode and the env restarts on the next step.
+    info["final_observation"] carries that observation for the done envs. Done envs are
+    reported as truncated where the VecTask extras flag them in "time_outs", without that
+    entry every done env is terminated.
+    """
 
-        return torch.clamp(self.task.obs_buf, -self.clip_obs, self.clip_obs).to(self.rl_device), self.task.rew_buf.to(self.rl_device), self.task.reset_buf.to(self.rl_device), self.task.extras
-    def reset(self):
-        actions = 0.01 * (1 - 2 * torch.rand([self.task.num_envs, self.task.num_actions], dtype=torch.float32, device=self.rl_device))
+    def __init__(self, vec_env, as_numpy=False):
+        self.vec_env = vec_env
+        self.as_numpy = as_numpy
+        self.device = torch.device(vec_env.rl_device)
+
+        super().__init__(vec_env.num_envs, vec_env.observation_space, vec_env.action_space)
+
+        self._actions = None
+
+    def _out(self, tensor):
+        if not self.as_numpy:
+            return tensor
+        return tensor.numpy() if tensor.device.type == 'cpu' else tensor.cpu().numpy()
+
+    def reset_async(self, seed=None, options=None):
+        if seed is not None:
+            torch.manual_seed(seed if isinstance(seed, int) else seed[0])
+            np.random.seed(seed if isinstance(seed, int) else seed[0])
+
+    def reset_wait(self, seed=None, options=None):
+        obs = self.vec_env.reset()
+        return self._out(obs), {}
+
+    def step_async(self, actions):
+        self._actions = torch.as_tensor(actions, dtype=torch.float, device=self.device)
+
+    def step_wait(self):
+        result = self.vec_env.step(self._actions)
+        obs, rews, resets, extras = result[0], result[1], result[2], result[-1]
+
+        dones = resets.bool()
+        time_outs = extras.get("time_outs", None) if isinstance(extras, dict) else None
+        if time_outs is not None:
+            time_outs = time_outs.to(self.device)
+            truncated = dones & time_outs
+            terminated = dones & ~time_outs
+        else:
+            truncated = torch.zeros_like(dones)
+            terminated = dones
+
+        infos = dict(extras)
+        if len(result) == 5:
+            infos["goal"] = self._out(result[3])
+        infos["final_observation"] = self._out(obs)
+        infos["_final_observation"] = self._out(dones)
+
+        return self._out(obs), self._out(rews), self._out(terminated), self._out(truncated), infos
 
-        # step the simulator
-        self.task.step(actions)
-        return torch.clamp(self.task.obs_buf, -self.clip_obs, self.clip_obs).to(self.rl_device)
     def render(self, mode='human'):
         return
-    def close (self):
-        return
\ No newline at end of file
+
+    def close_extras(self, **kwargs):
+        if hasattr(self.vec_env, "close"):
+            self.vec_env.close()
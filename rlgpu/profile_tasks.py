@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+# Profile task construction, step and reset on CPU against the isaacgym stub, needs neither PhysX nor a GPU.
+# Simulated values are synthetic, so only the python / torch side of the task code is meaningful.
+#
+#   python profile_tasks.py --task UR5Package --num_envs 64 --steps 50
+#   python profile_tasks.py --task BaxterCabinet --sort tottime --output baxter.prof
+
+import argparse
+import cProfile
+import importlib
+import io
+import os
+import pstats
+import sys
+import time
+
+# tasks import rlgpu.utils.torch_jit_utils, resolve it against this checkout if it is not installed
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.isaacgym_stub import install
+
+TASKS = {
+    "UR5Package": ("tasks.ur5_package", "cfg/ur5_package.yaml"),
+    "BaxterCabinet": ("tasks.baxter_cabinet", "cfg/baxter_cabinet.yaml"),
+}
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Profile task code on CPU against the isaacgym stub")
+    parser.add_argument("--task", type=str, default="UR5Package", choices=list(TASKS.keys()))
+    parser.add_argument("--num_envs", type=int, default=16)
+    parser.add_argument("--steps", type=int, default=50, help="Number of profiled task steps")
+    parser.add_argument("--cfg_env", type=str, default=None, help="Defaults to the task config in cfg/")
+    parser.add_argument("--sort", type=str, default="cumulative", help="pstats sort key")
+    parser.add_argument("--limit", type=int, default=25, help="Number of functions printed per phase")
+    parser.add_argument("--output", type=str, default="", help="Dump the step profile to this file for snakeviz & co")
+    parser.add_argument("--force_stub", action="store_true", default=False,
+                        help="Use the stub even when isaacgym is installed")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def load_task_cfg(args):
+    import yaml
+
+    module_name, cfg_env = TASKS[args.task]
+    with open(os.path.join(os.getcwd(), args.cfg_env or cfg_env), 'r') as f:
+        cfg = yaml.load(f, Loader=yaml.SafeLoader)
+
+    cfg["env"]["numEnvs"] = args.num_envs
+    return module_name, cfg
+
+
+def profiled(profile, fn, *fn_args):
+    start = time.time()
+    profile.enable()
+    result = fn(*fn_args)
+    profile.disable()
+    return result, time.time() - start
+
+
+def print_stats(name, profile, elapsed, args):
+    stream = io.StringIO()
+    pstats.Stats(profile, stream=stream).strip_dirs().sort_stats(args.sort).print_stats(args.limit)
+    print("=" * 30 + " {} ({:.3f}s) ".format(name, elapsed) + "=" * 30)
+    print(stream.getvalue())
+
+
+def profile_task():
+    import torch
+    from isaacgym import gymapi, gymutil
+
+    torch.manual_seed(args.seed)
+    module_name, cfg = load_task_cfg(args)
+    task_class = getattr(importlib.import_module(module_name), args.task)
+
+    sim_params = gymapi.SimParams()
+    sim_params.use_gpu_pipeline = False
+    if "sim" in cfg:
+        gymutil.parse_sim_config(cfg["sim"], sim_params)
+
+    construct_profile = cProfile.Profile()
+    task, construct_time = profiled(construct_profile, task_class, cfg, sim_params, gymapi.SIM_PHYSX, "cpu", 0, True)
+
+    def run_steps():
+        for _ in range(args.steps):
+            task.step(2 * torch.rand((task.num_envs, task.num_actions), device=task.device) - 1)
+
+    step_profile = cProfile.Profile()
+    _, step_time = profiled(step_profile, run_steps)
+
+    reset_profile = cProfile.Profile()
+    _, reset_time = profiled(reset_profile, task.reset, torch.arange(task.num_envs, device=task.device))
+
+    print_stats("construction", construct_profile, construct_time, args)
+    print_stats("{} steps".format(args.steps), step_profile, step_time, args)
+    print_stats("reset", reset_profile, reset_time, args)
+
+    print("{} num_envs={}: construction {:.3f}s, {:.0f} env steps/s, reset {:.3f}s".format(
+        args.task, task.num_envs, construct_time, args.steps * task.num_envs / step_time, reset_time))
+
+    if hasattr(task, "sim_tensors"):
+        for name, (requests, refreshes, seconds) in task.sim_tensors.stats().items():
+            print("  {:<18} {:>6} requests {:>6} refreshes {:.4f}s".format(name, requests, refreshes, seconds))
+
+    if args.output:
+        step_profile.dump_stats(args.output)
+
+
+if __name__ == '__main__':
+    args = get_args()
+    if install(force=args.force_stub):
+        print("Using the isaacgym stub, simulated values are synthetic")
+    profile_task()
@@ -7,7 +7,6 @@
 
 import sys
 import os
-import operator
 from copy import deepcopy
 import random
 
@@ -17,12 +16,19 @@ from isaacgym.gymutil import get_property_setter_map, get_property_getter_map, g
 import numpy as np
 import torch
 
+from tasks.base.noise import NoiseModel
+from tasks.base.serialized_gym import SerializedGym
+from tasks.base.sim_tensors import SimTensorRefresher
+
 
 # Base class for RL tasks
 class BaseTask():
 
     def __init__(self, cfg, enable_camera_sensors=False):
         self.gym = gymapi.acquire_gym()
+        if cfg.get("serialize_gym", False):
+            # several tasks of this process are stepped from different threads
+            self.gym = SerializedGym(self.gym)
 
         self.device_type = cfg.get("device_type", "cuda")
         self.device_id = cfg.get("device_id", 0)
@@ -63,12 +69,26 @@ class BaseTask():
             self.num_envs, device=self.device, dtype=torch.long)
         self.randomize_buf = torch.zeros(
             self.num_envs, device=self.device, dtype=torch.long)
-        self.extras = {}
+        # envs reset because they hit the episode length rather than a terminal state, written in compute_reward
+        self.time_out_buf = torch.zeros(
+            self.num_envs, device=self.device, dtype=torch.bool)
+        self.extras = {"time_outs": self.time_out_buf}
+
+        # named obs_buf segments, name -> (start, end), see set_obs_layout
+        self.obs_layout = {}
+        # optional per step outputs, name -> (buffer, compute), see register_aux_output
+        self.aux_outputs = {}
+        self.aux_subscribed = []
 
         self.original_props = {}
         self.dr_randomizations = {}
         self.first_randomization = True
         self.actor_params_generator = None
+        self.dr_plan = None
+        self.dr_plan_sample_size = 0
+        self.dr_tensor_params = {}
+        self.dr_pending_envs = torch.zeros(self.num_envs, device=self.device, dtype=torch.bool)
+        self.dr_calls_since_flush = 0
         self.extern_actor_params = {}
         for env_id in range(self.num_envs):
             self.extern_actor_params[env_id] = None
@@ -79,6 +99,7 @@ class BaseTask():
         # create envs, sim and viewer
         self.create_sim()
         self.gym.prepare_sim(self.sim)
+        self.sim_tensors = SimTensorRefresher(self.gym, self.sim)
 
         # todo: read from config
         self.enable_viewer_sync = True
@@ -132,7 +153,7 @@ class BaseTask():
 
     def step(self, actions):
         if self.dr_randomizations.get('actions', None):
-            actions = self.dr_randomizations['actions']['noise_lambda'](actions)
+            actions = self.dr_randomizations['actions'].apply(actions)
 
         # apply actions
         self.pre_physics_step(actions)
@@ -145,16 +166,63 @@ class BaseTask():
         # to fix!
         if self.device == 'cpu':
             self.gym.fetch_results(self.sim, True)
+        self.sim_tensors.invalidate()
 
         # compute observations, rewards, resets, ...
         self.post_physics_step()
 
         if self.dr_randomizations.get('observations', None):
-            self.obs_buf = self.dr_randomizations['observations']['noise_lambda'](self.obs_buf)
+            self.dr_randomizations['observations'].apply(self.obs_buf, inplace=True)
+
+        for name in self.aux_subscribed:
+            buf, compute = self.aux_outputs[name]
+            compute(buf)
 
     def get_states(self):
         return self.states_buf
 
+    def set_obs_layout(self, segments):
+        """segments is a list of (name, size) pairs laid out back to back in obs_buf. Observations are
+        then written in place with write_obs, obs_buf itself is never reallocated."""
+        self.obs_layout = {}
+        offset = 0
+        for name, size in segments:
+            self.obs_layout[name] = (offset, offset + size)
+            offset += size
+        if offset != self.num_obs:
+            raise ValueError("Observation layout has {} entries, numObservations is {}".format(offset, self.num_obs))
+
+    def get_obs_layout(self):
+        """Returns the (name, start, end) segments of obs_buf in order."""
+        return [(name, start, end) for name, (start, end) in self.obs_layout.items()]
+
+    def obs_segment(self, name):
+        start, end = self.obs_layout[name]
+        return self.obs_buf[:, start:end]
+
+    def register_aux_output(self, name, shape, compute, dtype=torch.float):
+        """Declares an optional output of shape [num_envs, *shape] and returns its buffer. compute(buf) writes
+        the values of the current step into buf in place, it only runs after each step once a consumer has subscribed."""
+        buf = torch.zeros((self.num_envs,) + tuple(shape), device=self.device, dtype=dtype)
+        self.aux_outputs[name] = (buf, compute)
+        return buf
+
+    def subscribe_aux_output(self, name):
+        """Returns the persistent buffer of the output. The first subscription computes the values of the
+        current step, after that the buffer is updated after every step."""
+        buf, compute = self.aux_outputs[name]
+        if name not in self.aux_subscribed:
+            self.aux_subscribed.append(name)
+            compute(buf)
+        return buf
+
+    def write_obs(self, name, value):
+        """Copies value [num_envs, size], or [num_envs] for size 1 segments, into its obs_buf segment."""
+        start, end = self.obs_layout[name]
+        if value.dim() == 1:
+            value = value.unsqueeze(-1)
+        self.obs_buf[:, start:end] = value
+
     def render(self, sync_frame_time=False):
         if self.viewer:
             # check for window closed
@@ -225,99 +293,37 @@ class BaseTask():
         #   - non-environment parameters when > frequency steps have passed since the last non-environment
         #   - physical environments in the reset buffer, which have exceeded the randomization frequency threshold
         #   - on the first call, randomize everything
+        #   - physical randomizations are queued and applied in batches, see dr_flush_due
         self.last_step = self.gym.get_frame_count(self.sim)
+        self.dr_tensor_params = dr_params.get("tensor_params", {})
         if self.first_randomization:
             do_nonenv_randomize = True
-            env_ids = list(range(self.num_envs))
+            self.dr_pending_envs[:] = True
         else:
             do_nonenv_randomize = (self.last_step - self.last_rand_step) >= rand_freq
-            rand_envs = torch.where(self.randomize_buf >= rand_freq, torch.ones_like(self.randomize_buf), torch.zeros_like(self.randomize_buf))
-            rand_envs = torch.logical_and(rand_envs, self.reset_buf)
-            env_ids = torch.nonzero(rand_envs, as_tuple=False).squeeze(-1).tolist()
+            rand_envs = torch.logical_and(self.randomize_buf >= rand_freq, self.reset_buf)
             self.randomize_buf[rand_envs] = 0
+            self.dr_pending_envs |= rand_envs
+        self.dr_calls_since_flush += 1
+
+        env_ids = []
+        if self.first_randomization or self.dr_flush_due(dr_params):
+            env_ids = torch.nonzero(self.dr_pending_envs, as_tuple=False).squeeze(-1).tolist()
+            self.dr_pending_envs[:] = False
+            self.dr_calls_since_flush = 0
 
         if do_nonenv_randomize:
             self.last_rand_step = self.last_step
 
-        param_setters_map = get_property_setter_map(self.gym)
-        param_setter_defaults_map = get_default_setter_args(self.gym)
-        param_getters_map = get_property_getter_map(self.gym)
-
         # On first iteration, check the number of buckets
         if self.first_randomization:
             check_buckets(self.gym, self.envs, dr_params)
 
         for nonphysical_param in ["observations", "actions"]:
             if nonphysical_param in dr_params and do_nonenv_randomize:
-                dist = dr_params[nonphysical_param]["distribution"]
-                op_type = dr_params[nonphysical_param]["operation"]
-                sched_type = dr_params[nonphysical_param]["schedule"] if "schedule" in dr_params[nonphysical_param] else None
-                sched_step = dr_params[nonphysical_param]["schedule_steps"] if "schedule" in dr_params[nonphysical_param] else None
-                op = operator.add if op_type == 'additive' else operator.mul
-
-                if sched_type == 'linear':
-                    sched_scaling = 1.0 / sched_step * \
-                        min(self.last_step, sched_step)
-                elif sched_type == 'constant':
-                    sched_scaling = 0 if self.last_step < sched_step else 1
-                else:
-                    sched_scaling = 1
-
-                if dist == 'gaussian':
-                    mu, var = dr_params[nonphysical_param]["range"]
-                    mu_corr, var_corr = dr_params[nonphysical_param].get("range_correlated", [0., 0.])
-
-                    if op_type == 'additive':
-                        mu *= sched_scaling
-                        var *= sched_scaling
-                        mu_corr *= sched_scaling
-                        var_corr *= sched_scaling
-                    elif op_type == 'scaling':
-                        var = var * sched_scaling  # scale up var over time
-                        mu = mu * sched_scaling + 1.0 * \
-                            (1.0 - sched_scaling)  # linearly interpolate
-
-                        var_corr = var_corr * sched_scaling  # scale up var over time
-                        mu_corr = mu_corr * sched_scaling + 1.0 * \
-                            (1.0 - sched_scaling)  # linearly interpolate
-
-                    def noise_lambda(tensor, param_name=nonphysical_param):
-                        params = self.dr_randomizations[param_name]
-                        corr = params.get('corr', None)
-                        if corr is None:
-                            corr = torch.randn_like(tensor)
-                            params['corr'] = corr
-                        corr = corr * params['var_corr'] + params['mu_corr']
-                        return op(
-                            tensor, corr + torch.randn_like(tensor) * params['var'] + params['mu'])
-
-                    self.dr_randomizations[nonphysical_param] = {'mu': mu, 'var': var, 'mu_corr': mu_corr, 'var_corr': var_corr, 'noise_lambda': noise_lambda}
-
-                elif dist == 'uniform':
-                    lo, hi = dr_params[nonphysical_param]["range"]
-                    lo_corr, hi_corr = dr_params[nonphysical_param].get("range_correlated", [0., 0.])
-
-                    if op_type == 'additive':
-                        lo *= sched_scaling
-                        hi *= sched_scaling
-                        lo_corr *= sched_scaling
-                        hi_corr *= sched_scaling
-                    elif op_type == 'scaling':
-                        lo = lo * sched_scaling + 1.0 * (1.0 - sched_scaling)
-                        hi = hi * sched_scaling + 1.0 * (1.0 - sched_scaling)
-                        lo_corr = lo_corr * sched_scaling + 1.0 * (1.0 - sched_scaling)
-                        hi_corr = hi_corr * sched_scaling + 1.0 * (1.0 - sched_scaling)
-
-                    def noise_lambda(tensor, param_name=nonphysical_param):
-                        params = self.dr_randomizations[param_name]
-                        corr = params.get('corr', None)
-                        if corr is None:
-                            corr = torch.randn_like(tensor)
-                            params['corr'] = corr
-                        corr = corr * (params['hi_corr'] - params['lo_corr']) + params['lo_corr']
-                        return op(tensor, corr + torch.rand_like(tensor) * (params['hi'] - params['lo']) + params['lo'])
-
-                    self.dr_randomizations[nonphysical_param] = {'lo': lo, 'hi': hi, 'lo_corr': lo_corr, 'hi_corr': hi_corr, 'noise_lambda': noise_lambda}
+                if nonphysical_param not in self.dr_randomizations:
+                    self.dr_randomizations[nonphysical_param] = NoiseModel(dr_params[nonphysical_param])
+                self.dr_randomizations[nonphysical_param].set_params(self.last_step)
 
         if "sim_params" in dr_params and do_nonenv_randomize:
             prop_attrs = dr_params["sim_params"]
@@ -338,81 +344,148 @@ class BaseTask():
         # freedom to generate samples from arbitrary distributions,
         # e.g. use full-covariance distributions instead of the DR's
         # default of treating each simulation parameter independently.
-        extern_offsets = {}
         if self.actor_params_generator is not None:
             for env_id in env_ids:
                 self.extern_actor_params[env_id] = \
                     self.actor_params_generator.sample()
-                extern_offsets[env_id] = 0
 
-        for actor, actor_properties in dr_params["actor_params"].items():
-            for env_id in env_ids:
-                env = self.envs[env_id]
-                handle = self.gym.find_actor_handle(env, actor)
-                extern_sample = self.extern_actor_params[env_id]
+        if self.dr_plan is None:
+            self.dr_plan = self.compile_randomization_plan(dr_params)
 
-                for prop_name, prop_attrs in actor_properties.items():
-                    if prop_name == 'color':
-                        num_bodies = self.gym.get_actor_rigid_body_count(
-                            env, handle)
-                        for n in range(num_bodies):
-                            self.gym.set_rigid_body_color(env, handle, n, gymapi.MESH_VISUAL,
-                                                          gymapi.Vec3(random.uniform(0, 1), random.uniform(0, 1), random.uniform(0, 1)))
-                        continue
-                    if prop_name == 'scale':
-                        attr_randomization_params = prop_attrs
-                        sample = generate_random_samples(attr_randomization_params, 1,
-                                                         self.last_step, None)
-                        og_scale = 1
-                        if attr_randomization_params['operation'] == 'scaling':
-                            new_scale = og_scale * sample
-                        elif attr_randomization_params['operation'] == 'additive':
-                            new_scale = og_scale + sample
-                        self.gym.set_actor_scale(env, handle, new_scale)
-                        continue
-
-                    prop = param_getters_map[prop_name](env, handle)
-                    if isinstance(prop, list):
-                        if self.first_randomization:
-                            self.original_props[prop_name] = [
-                                {attr: getattr(p, attr) for attr in dir(p)} for p in prop]
-                        for p, og_p in zip(prop, self.original_props[prop_name]):
-                            for attr, attr_randomization_params in prop_attrs.items():
-                                smpl = None
-                                if self.actor_params_generator is not None:
-                                    smpl, extern_offsets[env_id] = get_attr_val_from_sample(
-                                        extern_sample, extern_offsets[env_id], p, attr)
-                                apply_random_samples(
-                                    p, og_p, attr, attr_randomization_params,
-                                    self.last_step, smpl)
-                    else:
-                        if self.first_randomization:
-                            self.original_props[prop_name] = deepcopy(prop)
-                        for attr, attr_randomization_params in prop_attrs.items():
-                            smpl = None
-                            if self.actor_params_generator is not None:
-                                smpl, extern_offsets[env_id] = get_attr_val_from_sample(
-                                    extern_sample, extern_offsets[env_id], prop, attr)
-                            apply_random_samples(
-                                prop, self.original_props[prop_name], attr,
-                                attr_randomization_params, self.last_step, smpl)
-
-                    setter = param_setters_map[prop_name]
-                    default_args = param_setter_defaults_map[prop_name]
-                    setter(env, handle, prop, *default_args)
+        if len(env_ids) > 0:
+            for entry in self.dr_plan:
+                self.apply_randomization_entry(entry, env_ids)
 
         if self.actor_params_generator is not None:
             for env_id in env_ids:  # check that we used all dims in sample
-                if extern_offsets[env_id] > 0:
-                    extern_sample = self.extern_actor_params[env_id]
-                    if extern_offsets[env_id] != extern_sample.shape[0]:
-                        print('env_id', env_id,
-                              'extern_offset', extern_offsets[env_id],
-                              'vs extern_sample.shape', extern_sample.shape)
-                        raise Exception("Invalid extern_sample size")
+                extern_sample = self.extern_actor_params[env_id]
+                if self.dr_plan_sample_size > 0 and self.dr_plan_sample_size != extern_sample.shape[0]:
+                    print('env_id', env_id,
+                          'extern_offset', self.dr_plan_sample_size,
+                          'vs extern_sample.shape', extern_sample.shape)
+                    raise Exception("Invalid extern_sample size")
 
         self.first_randomization = False
 
+    def dr_flush_due(self, dr_params):
+        """Physical randomizations of the queued envs are applied every batch_interval calls or once
+        batch_size envs are pending. Without either key they are applied on every call."""
+        batch_interval = dr_params.get("batch_interval", None)
+        batch_size = dr_params.get("batch_size", None)
+        if batch_interval is None and batch_size is None:
+            return True
+        if batch_interval is not None and self.dr_calls_since_flush >= batch_interval:
+            return True
+        return batch_size is not None and int(self.dr_pending_envs.sum()) >= batch_size
+
+    def randomize_tensor(self, name, tensor):
+        """Tensor API fast path, perturbs a batch of reset values (root states, DOF positions or
+        targets) in place on the sim device as configured under tensor_params[name]."""
+        params = self.dr_tensor_params.get(name, None)
+        if params is None:
+            return tensor
+
+        sample = generate_random_tensor(params, tensor.shape, self.last_step, tensor.device)
+        if params['operation'] == 'scaling':
+            tensor.mul_(sample)
+        elif params['operation'] == 'additive':
+            tensor.add_(sample)
+        return tensor
+
+    def compile_randomization_plan(self, dr_params):
+        """Resolves the actor_params of the DR config once: actor handles per env, property
+        getters/setters, the original attribute values as arrays and the layout of external samples."""
+        param_setters_map = get_property_setter_map(self.gym)
+        param_setter_defaults_map = get_default_setter_args(self.gym)
+        param_getters_map = get_property_getter_map(self.gym)
+
+        plan = []
+        sample_offset = 0
+        for actor, actor_properties in dr_params.get("actor_params", {}).items():
+            handles = [self.gym.find_actor_handle(env, actor) for env in self.envs]
+            for prop_name, prop_attrs in actor_properties.items():
+                entry = {'prop_name': prop_name, 'attrs': prop_attrs, 'handles': handles}
+                if prop_name == 'color':
+                    entry['num_bodies'] = self.gym.get_actor_rigid_body_count(self.envs[0], handles[0])
+                elif prop_name != 'scale':
+                    entry['getter'] = param_getters_map[prop_name]
+                    entry['setter'] = param_setters_map[prop_name]
+                    entry['default_args'] = param_setter_defaults_map[prop_name]
+
+                    prop = entry['getter'](self.envs[0], handles[0])
+                    entry['is_list'] = isinstance(prop, list)
+                    entry['original'] = {}
+                    entry['sample_index'] = {}
+                    if entry['is_list']:
+                        # external samples are laid out property major, attribute minor
+                        for attr_idx, attr in enumerate(prop_attrs):
+                            entry['original'][attr] = np.array([getattr(p, attr) for p in prop], dtype=np.float64)
+                            entry['sample_index'][attr] = sample_offset + attr_idx + len(prop_attrs) * np.arange(len(prop))
+                        sample_offset += len(prop) * len(prop_attrs)
+                    else:
+                        for attr in prop_attrs:
+                            entry['original'][attr] = np.array(prop[attr], copy=True)
+                            entry['sample_index'][attr] = sample_offset + np.arange(prop[attr].size).reshape(prop[attr].shape)
+                            sample_offset += prop[attr].size
+                plan.append(entry)
+
+        self.dr_plan_sample_size = sample_offset
+        return plan
+
+    def apply_randomization_entry(self, entry, env_ids):
+        prop_name = entry['prop_name']
+        handles = entry['handles']
+        num_envs = len(env_ids)
+
+        if prop_name == 'color':
+            colors = np.random.uniform(0, 1, (num_envs, entry['num_bodies'], 3))
+            for i, env_id in enumerate(env_ids):
+                for n in range(entry['num_bodies']):
+                    self.gym.set_rigid_body_color(self.envs[env_id], handles[env_id], n, gymapi.MESH_VISUAL,
+                                                  gymapi.Vec3(*colors[i, n]))
+            return
+
+        if prop_name == 'scale':
+            attr_randomization_params = entry['attrs']
+            sample = generate_random_samples(attr_randomization_params, num_envs, self.last_step, None)
+            og_scale = 1
+            if attr_randomization_params['operation'] == 'scaling':
+                new_scale = og_scale * sample
+            elif attr_randomization_params['operation'] == 'additive':
+                new_scale = og_scale + sample
+            for i, env_id in enumerate(env_ids):
+                self.gym.set_actor_scale(self.envs[env_id], handles[env_id], float(new_scale[i]))
+            return
+
+        props = [entry['getter'](self.envs[env_id], handles[env_id]) for env_id in env_ids]
+        for attr, attr_randomization_params in entry['attrs'].items():
+            og_val = entry['original'][attr]
+
+            # one draw for all envs and properties of this attribute
+            extern_sample = None
+            if self.actor_params_generator is not None:
+                extern_sample = np.stack([self.extern_actor_params[env_id][entry['sample_index'][attr]] for env_id in env_ids])
+            sample = generate_random_samples(attr_randomization_params, (num_envs,) + og_val.shape,
+                                             self.last_step, extern_sample)
+
+            if attr_randomization_params['operation'] == 'scaling':
+                new_val = og_val * sample
+            elif attr_randomization_params['operation'] == 'additive':
+                new_val = og_val + sample
+
+            if attr_randomization_params.get('num_buckets', 0) > 0:
+                new_val = get_bucketed_vals(new_val, attr_randomization_params)
+
+            for prop, prop_val in zip(props, new_val):
+                if entry['is_list']:
+                    for p, v in zip(prop, prop_val):
+                        setattr(p, attr, float(v))
+                else:
+                    prop[attr] = prop_val
+
+        for env_id, prop in zip(env_ids, props):
+            entry['setter'](self.envs[env_id], handles[env_id], prop, *entry['default_args'])
+
     def pre_physics_step(self, actions):
         raise NotImplementedError
 
@@ -420,6 +493,55 @@ class BaseTask():
         raise NotImplementedError
 
 
+def generate_random_tensor(attr_randomization_params, shape, curr_gym_step_count, device):
+    """Torch counterpart of gymutil.generate_random_samples, draws on the given device."""
+    rand_range = attr_randomization_params['range']
+    distribution = attr_randomization_params['distribution']
+    sched_type = attr_randomization_params.get('schedule', None)
+    sched_step = attr_randomization_params.get('schedule_steps', None)
+    operation = attr_randomization_params['operation']
+
+    if sched_type == 'linear':
+        sched_scaling = 1 / sched_step * min(curr_gym_step_count, sched_step)
+    elif sched_type == 'constant':
+        sched_scaling = 0 if curr_gym_step_count < sched_step else 1
+    else:
+        sched_scaling = 1
+
+    lo, hi = rand_range
+    if operation == 'additive':
+        lo *= sched_scaling
+        hi *= sched_scaling
+    elif operation == 'scaling':
+        if distribution == 'gaussian':
+            # (mu, var) for gaussian, only var is scaled up over time
+            lo = lo * sched_scaling + 1.0 * (1.0 - sched_scaling)
+            hi = hi * sched_scaling
+        else:
+            lo = lo * sched_scaling + 1.0 * (1.0 - sched_scaling)
+            hi = hi * sched_scaling + 1.0 * (1.0 - sched_scaling)
+
+    if distribution == 'gaussian':
+        return torch.randn(shape, device=device) * hi + lo
+    elif distribution == 'loguniform':
+        return torch.exp(torch.rand(shape, device=device) * (np.log(hi) - np.log(lo)) + np.log(lo))
+    return torch.rand(shape, device=device) * (hi - lo) + lo
+
+
+def get_bucketed_vals(new_prop_vals, attr_randomization_params):
+    """Vectorized gymutil.get_bucketed_val."""
+    if attr_randomization_params['distribution'] == 'uniform':
+        # range of buckets defined by uniform distribution
+        lo, hi = attr_randomization_params['range'][0], attr_randomization_params['range'][1]
+    else:
+        # for gaussian, set range of buckets to be 2 stddev away from mean
+        lo = attr_randomization_params['range'][0] - 2 * np.sqrt(attr_randomization_params['range'][1])
+        hi = attr_randomization_params['range'][0] + 2 * np.sqrt(attr_randomization_params['range'][1])
+    num_buckets = attr_randomization_params['num_buckets']
+    buckets = np.array([(hi - lo) * i / num_buckets + lo for i in range(num_buckets)])
+    return buckets[np.searchsorted(buckets, new_prop_vals, side='right') - 1]
+
+
 def get_attr_val_from_sample(sample, offset, prop, attr):
     """Retrieves param value for the given prop and attr from the sample."""
     if sample is None:
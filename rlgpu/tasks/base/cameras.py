@@ -0,0 +1,86 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+from isaacgym import gymapi, gymtorch
+
+import torch
+
+
+class CameraSensors():
+    """Renders the camera sensors of all envs only when their images are read.
+
+    Nothing is rendered until begin_access is called, so tasks that never read images pay nothing.
+    After that the sensors are rendered on every render_interval-th access, in between the previous
+    images are read again. Image tensors may only be read between begin_access and end_access,
+    use the object as a context manager to keep the two paired. Without a viewer nothing else
+    steps the graphics, set step_graphics so the results are fetched and the graphics stepped
+    before rendering, otherwise the sensors keep rendering the initial scene.
+    """
+
+    def __init__(self, gym, sim, render_interval=1, step_graphics=False):
+        self.gym = gym
+        self.sim = sim
+        self.render_interval = max(1, render_interval)
+        self.step_graphics = step_graphics
+        self.num_accesses = 0
+        self.rendered = False
+        self.accessing = False
+
+    def begin_access(self):
+        """Returns True if the sensors were rendered for this access."""
+        if self.accessing:
+            raise RuntimeError("Image tensors are already being accessed")
+
+        self.rendered = self.num_accesses % self.render_interval == 0
+        self.num_accesses += 1
+        if self.rendered:
+            if self.step_graphics:
+                self.gym.fetch_results(self.sim, True)
+                self.gym.step_graphics(self.sim)
+            self.gym.render_all_camera_sensors(self.sim)
+        self.gym.start_access_image_tensors(self.sim)
+        self.accessing = True
+        return self.rendered
+
+    def end_access(self):
+        self.gym.end_access_image_tensors(self.sim)
+        self.accessing = False
+
+    def __enter__(self):
+        self.begin_access()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.end_access()
+
+
+class CameraImages():
+    """Normalized color images of one camera per env as float [num_envs, channels, height, width].
+
+    The camera image tensors are wrapped once at construction. update gathers all of them with one
+    stack and must be called between begin_access and end_access. normalize writes
+    (images / 255 - mean) / std of the last update straight into out with a single addcmul, out can
+    be a view of an obs_buf segment.
+    """
+
+    def __init__(self, gym, sim, envs, camera_handles, height, width, mean, std, channels=3, device="cuda:0"):
+        self.camera_tensors = [gymtorch.wrap_tensor(gym.get_camera_image_gpu_tensor(sim, env, handle, gymapi.IMAGE_COLOR))
+                               for env, handle in zip(envs, camera_handles)]
+        self.channels = channels
+        self.images_rgba = torch.zeros((len(envs), height, width, 4), dtype=torch.uint8, device=device)
+
+        # (x / 255 - mean) / std = x * scale + bias
+        mean = torch.tensor(mean, dtype=torch.float, device=device).view(channels, 1, 1)
+        std = torch.tensor(std, dtype=torch.float, device=device).view(channels, 1, 1)
+        self.norm_scale = 1.0 / (255.0 * std)
+        self.norm_bias = -mean / std
+
+    def update(self):
+        torch.stack(self.camera_tensors, out=self.images_rgba)
+
+    def normalize(self, out):
+        torch.addcmul(self.norm_bias, self.images_rgba[..., :self.channels].permute(0, 3, 1, 2), self.norm_scale, out=out)
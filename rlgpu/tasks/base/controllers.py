@@ -0,0 +1,136 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import torch
+
+
+class DifferentialIK():
+    """Batched damped least squares IK, du = J^T (J J^T + d^2 I)^-1 dpose for all envs at once.
+
+    jacobian is the [num_envs, 6, num_dofs] end effector view of the sim jacobian tensor, it is
+    read on every call so refreshing the jacobian tensor is enough to keep the controller current.
+    With dof limits and a null_space_gain the joints are additionally pulled towards the middle of
+    their range in the null space of the end effector task.
+    """
+
+    def __init__(self, jacobian, damping, dof_lower_limits=None, dof_upper_limits=None, null_space_gain=0.0):
+        self.jacobian = jacobian
+        self.num_envs, self.num_task_dims, self.num_dofs = jacobian.shape
+        self.device = jacobian.device
+
+        self.lmbda = torch.eye(self.num_task_dims, device=self.device) * (damping ** 2)
+        self.dpose = torch.zeros((self.num_envs, self.num_task_dims, 1), device=self.device)
+        self.jjt = torch.zeros((self.num_envs, self.num_task_dims, self.num_task_dims), device=self.device)
+
+        self.null_space_gain = null_space_gain
+        self.dof_mid = None
+        if dof_lower_limits is not None and dof_upper_limits is not None:
+            self.dof_mid = ((dof_lower_limits + dof_upper_limits) / 2)[:self.num_dofs].to(self.device)
+
+    def compute(self, pos_err, orn_err=None, dof_pos=None):
+        """Returns the dof position deltas [num_envs, num_dofs], a missing orn_err is taken as zero."""
+        self.dpose[:, 0:3, 0] = pos_err
+        if orn_err is None:
+            self.dpose[:, 3:, 0] = 0
+        else:
+            self.dpose[:, 3:, 0] = orn_err
+
+        j_eef = self.jacobian
+        j_eef_T = torch.transpose(j_eef, 1, 2)
+        torch.baddbmm(self.lmbda, j_eef, j_eef_T, out=self.jjt)
+        l, _ = torch.linalg.cholesky_ex(self.jjt)
+        u = j_eef_T @ torch.cholesky_solve(self.dpose, l)
+
+        if self.null_space_gain > 0 and self.dof_mid is not None and dof_pos is not None:
+            # (I - J^T (J J^T + d^2 I)^-1 J) q0
+            q0 = (self.null_space_gain * (self.dof_mid - dof_pos[:, :self.num_dofs])).unsqueeze(-1)
+            u += q0 - j_eef_T @ torch.cholesky_solve(j_eef @ q0, l)
+
+        return u.squeeze(-1)
+
+
+class OperationalSpaceController():
+    """Batched operational space torque control for all envs at once.
+
+    tau = J^T M_x (kp * dpose - kd * J qd) + N^T (kp_null * (q_default - q) - kd_null * qd), with the
+    task space inertia M_x = (J M^-1 J^T)^-1 and the null space projection N^T = I - J^T M_x J M^-1.
+    jacobian [num_envs, 6, num_dofs] and mass_matrix [num_envs, num_dofs, num_dofs] are views of the
+    sim tensors, refresh them before calling compute. Both solves go through batched Cholesky factors.
+    The gains are tensors on the sim device, scalars are broadcast over the task / dof dimensions.
+    """
+
+    def __init__(self, jacobian, mass_matrix, kp, kd=None, kp_null=0.0, kd_null=None, default_dof_pos=None):
+        self.jacobian = jacobian
+        self.mass_matrix = mass_matrix
+        self.num_envs, self.num_task_dims, self.num_dofs = jacobian.shape
+        self.device = jacobian.device
+
+        self.kp = torch.as_tensor(kp, dtype=torch.float, device=self.device).expand(self.num_task_dims)
+        self.kd = 2 * torch.sqrt(self.kp) if kd is None else \
+            torch.as_tensor(kd, dtype=torch.float, device=self.device).expand(self.num_task_dims)
+        self.kp_null = torch.as_tensor(kp_null, dtype=torch.float, device=self.device).expand(self.num_dofs)
+        self.kd_null = 2 * torch.sqrt(self.kp_null) if kd_null is None else \
+            torch.as_tensor(kd_null, dtype=torch.float, device=self.device).expand(self.num_dofs)
+        self.use_null_space = bool(torch.as_tensor(kp_null).any() or (kd_null is not None and torch.as_tensor(kd_null).any()))
+        self.default_dof_pos = None
+        if default_dof_pos is not None:
+            self.default_dof_pos = torch.as_tensor(default_dof_pos, dtype=torch.float, device=self.device)[:self.num_dofs]
+
+        self.dpose = torch.zeros((self.num_envs, self.num_task_dims), device=self.device)
+
+    def compute(self, pos_err, orn_err, dof_vel, dof_pos=None):
+        """Returns the dof torques [num_envs, num_dofs]."""
+        self.dpose[:, 0:3] = pos_err
+        self.dpose[:, 3:] = orn_err
+
+        j_eef = self.jacobian
+        j_eef_T = torch.transpose(j_eef, 1, 2)
+        qd = dof_vel.unsqueeze(-1)
+
+        # M^-1 J^T and M_x^-1 = J M^-1 J^T
+        l_mm, _ = torch.linalg.cholesky_ex(self.mass_matrix)
+        mm_inv_j_T = torch.cholesky_solve(j_eef_T, l_mm)
+        l_m_eef, _ = torch.linalg.cholesky_ex(j_eef @ mm_inv_j_T)
+
+        wrench = (self.kp * self.dpose).unsqueeze(-1) - self.kd.unsqueeze(-1) * (j_eef @ qd)
+        u = j_eef_T @ torch.cholesky_solve(wrench, l_m_eef)
+
+        if self.use_null_space and dof_pos is not None and self.default_dof_pos is not None:
+            u_null = (self.kp_null * (self.default_dof_pos - dof_pos)).unsqueeze(-1) - self.kd_null.unsqueeze(-1) * qd
+            # N^T u_null = u_null - J^T M_x J M^-1 u_null
+            u += u_null - j_eef_T @ torch.cholesky_solve(torch.transpose(mm_inv_j_T, 1, 2) @ u_null, l_m_eef)
+
+        return u.squeeze(-1)
+
+
+class GripperCommand():
+    """Maps gripper commands of all envs to the finger dof targets with one indexed write.
+
+    dof_indices are the finger dofs in the per env dof target tensor, open_pos / closed_pos their targets,
+    e.g. [17, 18], [0.0208, -0.0208], [0, 0] for the Baxter two finger gripper or the finger_joint of a
+    Robotiq 85 with its mimic joints listed alongside.
+    """
+
+    def __init__(self, dof_indices, open_pos, closed_pos, device):
+        self.dof_indices = torch.tensor(dof_indices, dtype=torch.long, device=device)
+        self.open_pos = torch.tensor(open_pos, dtype=torch.float, device=device)
+        self.closed_pos = torch.tensor(closed_pos, dtype=torch.float, device=device)
+
+    def apply(self, dof_targets, command):
+        """command [num_envs] in [-1, 1], -1 is closed, 1 is open and values in between interpolate."""
+        alpha = ((command + 1) / 2).unsqueeze(-1)
+        dof_targets[:, self.dof_indices] = self.closed_pos + alpha * (self.open_pos - self.closed_pos)
+
+    def set(self, dof_targets, is_open, env_mask=None):
+        """is_open is a bool or a [num_envs] bool tensor, envs outside env_mask keep their targets."""
+        if not torch.is_tensor(is_open):
+            dof_targets[:, self.dof_indices] = self.open_pos if is_open else self.closed_pos
+            return
+        targets = torch.where(is_open.unsqueeze(-1), self.open_pos, self.closed_pos)
+        if env_mask is not None:
+            targets = torch.where(env_mask.unsqueeze(-1), targets, dof_targets[:, self.dof_indices])
+        dof_targets[:, self.dof_indices] = targets
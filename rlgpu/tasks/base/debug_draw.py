@@ -0,0 +1,46 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import numpy as np
+import torch
+
+from rlgpu.utils.torch_jit_utils import transform_points
+
+AXIS_COLORS = [[0.85, 0.1, 0.1], [0.1, 0.85, 0.1], [0.1, 0.1, 0.85]]
+
+
+class DebugAxes():
+    """Draws coordinate axes of several frames in every env_stride-th env.
+
+    All axis end points are computed in one batched call and copied to the host once per draw,
+    the lines of an env are then added with a single add_lines call.
+    """
+
+    def __init__(self, gym, viewer, envs, device, length=0.2, env_stride=1):
+        self.gym = gym
+        self.viewer = viewer
+        self.envs = envs
+        self.axis_points = torch.eye(3, device=device) * length
+        self.env_ids = torch.arange(0, len(envs), max(1, env_stride), device=device)
+
+    def draw(self, frames, colors=None):
+        """frames is a list of (pos [num_envs, 3], rot [num_envs, 4]) pairs, colors per frame a list of
+        three rgb axis colors, all frames use AXIS_COLORS by default."""
+        pos = torch.stack([frame[0][self.env_ids] for frame in frames], dim=1)
+        rot = torch.stack([frame[1][self.env_ids] for frame in frames], dim=1)
+        num_envs, num_frames = pos.shape[0:2]
+
+        ends = transform_points(pos.view(-1, 3), rot.view(-1, 4), self.axis_points).view(num_envs, num_frames, 3, 3)
+        starts = pos.unsqueeze(2).expand(num_envs, num_frames, 3, 3)
+        vertices = torch.stack([starts, ends], dim=3).view(num_envs, num_frames * 6, 3).cpu().numpy()
+
+        if colors is None:
+            colors = [AXIS_COLORS] * num_frames
+        colors = np.array(colors, dtype=np.float32).reshape(num_frames * 3, 3)
+
+        for i, env_id in enumerate(self.env_ids.tolist()):
+            self.gym.add_lines(self.viewer, self.envs[env_id], num_frames * 3, vertices[i], colors)
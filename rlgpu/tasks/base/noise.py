@@ -0,0 +1,93 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import torch
+
+
+class NoiseModel():
+    """Observation / action noise of the domain randomization config.
+
+    Owns the noise buffers, they are allocated on the first call and reused afterwards. The
+    distribution parameters are plain floats updated by set_params whenever the randomization
+    is refreshed, the correlated noise term is resampled at that point and kept constant in between.
+    """
+
+    def __init__(self, params):
+        self.distribution = params["distribution"]
+        self.scaling = params["operation"] == 'scaling'
+        self.sched_type = params.get("schedule", None)
+        self.sched_step = params.get("schedule_steps", None)
+        self.range = params["range"]
+        self.range_correlated = params.get("range_correlated", [0., 0.])
+
+        self.a, self.b, self.a_corr, self.b_corr = 0., 0., 0., 0.
+        self.noise = None
+        self.corr = None
+        self.out = None
+        self.resample_corr = True
+
+    def set_params(self, step):
+        if self.sched_type == 'linear':
+            sched_scaling = 1.0 / self.sched_step * min(step, self.sched_step)
+        elif self.sched_type == 'constant':
+            sched_scaling = 0 if step < self.sched_step else 1
+        else:
+            sched_scaling = 1
+
+        # (mu, var) for gaussian, (lo, hi) for uniform
+        a, b = self.range
+        a_corr, b_corr = self.range_correlated
+        if not self.scaling:
+            a, b, a_corr, b_corr = a * sched_scaling, b * sched_scaling, a_corr * sched_scaling, b_corr * sched_scaling
+        elif self.distribution == 'gaussian':
+            # scale up var over time, linearly interpolate mu
+            a = a * sched_scaling + 1.0 * (1.0 - sched_scaling)
+            b = b * sched_scaling
+            a_corr = a_corr * sched_scaling + 1.0 * (1.0 - sched_scaling)
+            b_corr = b_corr * sched_scaling
+        else:
+            a = a * sched_scaling + 1.0 * (1.0 - sched_scaling)
+            b = b * sched_scaling + 1.0 * (1.0 - sched_scaling)
+            a_corr = a_corr * sched_scaling + 1.0 * (1.0 - sched_scaling)
+            b_corr = b_corr * sched_scaling + 1.0 * (1.0 - sched_scaling)
+
+        self.a, self.b, self.a_corr, self.b_corr = a, b, a_corr, b_corr
+        self.resample_corr = True
+
+    def _allocate(self, tensor):
+        self.noise = torch.empty_like(tensor)
+        self.corr = torch.empty_like(tensor)
+        self.out = torch.empty_like(tensor)
+        self.resample_corr = True
+
+    def apply(self, tensor, inplace=False):
+        """Returns the noisy tensor, written into tensor itself with inplace=True and into a
+        buffer owned by the model otherwise, which is overwritten by the next call."""
+        if self.noise is None or self.noise.shape != tensor.shape or self.noise.device != tensor.device:
+            self._allocate(tensor)
+
+        if self.distribution == 'gaussian':
+            if self.resample_corr:
+                self.corr.normal_().mul_(self.b_corr).add_(self.a_corr)
+            self.noise.normal_(self.a, self.b)
+        else:
+            if self.resample_corr:
+                self.corr.normal_().mul_(self.b_corr - self.a_corr).add_(self.a_corr)
+            self.noise.uniform_(self.a, self.b)
+        self.resample_corr = False
+
+        out = tensor if inplace else self.out
+        return apply_noise(tensor, self.noise, self.corr, self.scaling, out)
+
+
+@torch.jit.script
+def apply_noise(tensor, noise, corr, scaling, out):
+    # type: (Tensor, Tensor, Tensor, bool, Tensor) -> Tensor
+    noise.add_(corr)
+    if scaling:
+        return torch.mul(tensor, noise, out=out)
+    return torch.add(tensor, noise, out=out)
@@ -0,0 +1,35 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import threading
+
+# acquire_gym returns one gym instance per process, so one lock covers every task
+GYM_LOCK = threading.RLock()
+
+
+class SerializedGym():
+    """Forwards to the gym, holding GYM_LOCK for the duration of every call.
+
+    Used when several tasks are stepped from different threads of one process, the gym calls
+    of all of them are serialized while the torch work in between can still overlap.
+    """
+
+    def __init__(self, gym):
+        self._gym = gym
+
+    def __getattr__(self, name):
+        attr = getattr(self._gym, name)
+        if not callable(attr):
+            return attr
+
+        def locked(*args, **kwargs):
+            with GYM_LOCK:
+                return attr(*args, **kwargs)
+
+        # cache the wrapper so later lookups skip __getattr__
+        setattr(self, name, locked)
+        return locked
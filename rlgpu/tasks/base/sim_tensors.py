@@ -0,0 +1,57 @@
+# Copyright (c) 2020, NVIDIA CORPORATION.  All rights reserved.
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+import time
+
+# name -> gym refresh function
+SIM_TENSOR_REFRESH = {
+    "actor_root_state": "refresh_actor_root_state_tensor",
+    "dof_state": "refresh_dof_state_tensor",
+    "rigid_body_state": "refresh_rigid_body_state_tensor",
+    "jacobian": "refresh_jacobian_tensors",
+    "mass_matrix": "refresh_mass_matrix_tensors",
+    "force_sensor": "refresh_force_sensor_tensor",
+    "dof_force": "refresh_dof_force_tensor",
+    "net_contact_force": "refresh_net_contact_force_tensor",
+}
+
+
+class SimTensorRefresher():
+    """Refreshes the sim state tensors on demand, at most once per physics step.
+
+    All tensors are marked dirty after simulate, require refreshes the requested ones that are
+    still dirty and skips the rest. Requests, refreshes and the host time spent in the refresh
+    calls are counted per tensor, see stats. On the GPU pipeline the refresh calls are launched
+    asynchronously, so the measured time does not include the copies themselves.
+    """
+
+    def __init__(self, gym, sim):
+        self.gym = gym
+        self.sim = sim
+        self.dirty = set(SIM_TENSOR_REFRESH.keys())
+        self.num_requests = {name: 0 for name in SIM_TENSOR_REFRESH}
+        self.num_refreshes = {name: 0 for name in SIM_TENSOR_REFRESH}
+        self.refresh_time = {name: 0.0 for name in SIM_TENSOR_REFRESH}
+
+    def invalidate(self):
+        self.dirty.update(SIM_TENSOR_REFRESH.keys())
+
+    def require(self, *names):
+        for name in names:
+            self.num_requests[name] += 1
+            if name not in self.dirty:
+                continue
+            start = time.perf_counter()
+            getattr(self.gym, SIM_TENSOR_REFRESH[name])(self.sim)
+            self.refresh_time[name] += time.perf_counter() - start
+            self.num_refreshes[name] += 1
+            self.dirty.discard(name)
+
+    def stats(self):
+        """Returns {name: (requests, refreshes, seconds)} of the tensors requested so far."""
+        return {name: (self.num_requests[name], self.num_refreshes[name], self.refresh_time[name])
+                for name in SIM_TENSOR_REFRESH if self.num_requests[name] > 0}
@@ -5,10 +5,22 @@
 # distribution of this software and related documentation without an express
 # license agreement from NVIDIA CORPORATION is strictly prohibited.
 
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from types import SimpleNamespace
+
+import torch.multiprocessing as mp
+
 from gym import spaces
 
-from isaacgym import gymtorch
-from isaacgym.torch_utils import to_torch
+try:
+    from isaacgym import gymtorch
+    from isaacgym.torch_utils import to_torch
+except ImportError:
+    # Only the C++ task wrappers need isaacgym, VecTaskPython also drives the tensor-only stand-in tasks
+    gymtorch = None
+    to_torch = None
 import torch
 import numpy as np
 
@@ -24,8 +36,8 @@ class VecTask():
         self.num_states = task.num_states
         self.num_actions = task.num_actions
 
-        self.obs_space = spaces.Box(np.ones(self.num_obs) * -np.Inf, np.ones(self.num_obs) * np.Inf)
-        self.state_space = spaces.Box(np.ones(self.num_states) * -np.Inf, np.ones(self.num_states) * np.Inf)
+        self.obs_space = spaces.Box(np.ones(self.num_obs) * -np.inf, np.ones(self.num_obs) * np.inf)
+        self.state_space = spaces.Box(np.ones(self.num_states) * -np.inf, np.ones(self.num_states) * np.inf)
         self.act_space = spaces.Box(np.ones(self.num_actions) * -1., np.ones(self.num_actions) * 1.)
 
         self.clip_obs = clip_observations
@@ -119,27 +131,87 @@ class VecTaskGPU(VecTask):
 
 # Python CPU/GPU Class
 class VecTaskPython(VecTask):
+    def __init__(self, task, rl_device, clip_observations=5.0, clip_actions=1.0):
+        super().__init__(task, rl_device, clip_observations=clip_observations, clip_actions=clip_actions)
+
+        self.sim_device = torch.device(self.task.device)
+        self.same_device = self.sim_device == torch.device(rl_device)
+        # Device to host copies land in pinned memory without blocking and are synchronized once per step
+        self.sync_after_copy = not self.same_device and self.sim_device.type == 'cuda'
+
+        # Persistent output buffers, the tensors returned by step/reset/get_state are views of these and
+        # are overwritten in place on the next call, so callers have to copy what they want to keep
+        self.actions_buf = torch.zeros((self.num_envs, self.num_actions), device=self.sim_device, dtype=torch.float)
+        self.obs_out = self._allocate_output(self.task.obs_buf)
+        self.states_out = self._allocate_output(self.task.states_buf)
+        self.rew_out = self._allocate_output(self.task.rew_buf)
+        self.reset_out = self._allocate_output(self.task.reset_buf)
+        self.reverse_actions_out = None
+        self.goal_out = None
+
+    def _allocate_output(self, buf):
+        out = torch.zeros(buf.shape, device=self.rl_device, dtype=buf.dtype)
+        if self.sync_after_copy and out.device.type == 'cpu':
+            out = out.pin_memory()
+        return out
+
+    def _copy_out(self, buf, out, clip=None):
+        # Clamp straight into the output buffer when no transfer is needed
+        if self.same_device:
+            if clip is None:
+                return buf
+            return torch.clamp(buf, -clip, clip, out=out)
+
+        out.copy_(buf, non_blocking=True)
+        if clip is not None:
+            out.clamp_(-clip, clip)
+        return out
+
+    def _sync(self):
+        if self.sync_after_copy:
+            torch.cuda.current_stream(self.sim_device).synchronize()
 
     def get_state(self):
-        return torch.clamp(self.task.states_buf, -self.clip_obs, self.clip_obs).to(self.rl_device)
+        states = self._copy_out(self.task.states_buf, self.states_out, self.clip_obs)
+        self._sync()
+        return states
 
     def get_reverse_actions(self):
         # return self.task.reverse_actions.to(self.rl_device)
-        return torch.clamp(self.task.reverse_actions.to(self.rl_device), -self.clip_actions, self.clip_actions)
+        if self.reverse_actions_out is None or self.reverse_actions_out.shape != self.task.reverse_actions.shape:
+            self.reverse_actions_out = self._allocate_output(self.task.reverse_actions)
+        reverse_actions = self._copy_out(self.task.reverse_actions, self.reverse_actions_out, self.clip_actions)
+        self._sync()
+        return reverse_actions
 
     def get_twin_module_data(self):
-
-        return self.task.domain_para_buf.to(self.rl_device), self.task.force_buf.to(self.rl_device)
+        # the task only computes these once subscribed, the first call subscribes and computes the current values
+        domain_para = self.task.subscribe_aux_output("domain_params")
+        force = self.task.subscribe_aux_output("force_sign")
+        return domain_para.to(self.rl_device), force.to(self.rl_device)
 
     def step(self, actions):
-        actions_tensor = torch.clamp(actions, -self.clip_actions, self.clip_actions)
+        if actions.device == self.sim_device:
+            torch.clamp(actions, -self.clip_actions, self.clip_actions, out=self.actions_buf)
+        else:
+            self.actions_buf.copy_(actions, non_blocking=True)
+            self.actions_buf.clamp_(-self.clip_actions, self.clip_actions)
 
-        self.task.step(actions_tensor)
+        self.task.step(self.actions_buf)
+
+        obs = self._copy_out(self.task.obs_buf, self.obs_out, self.clip_obs)
+        rews = self._copy_out(self.task.rew_buf, self.rew_out)
+        resets = self._copy_out(self.task.reset_buf, self.reset_out)
 
         if self.task.use_her:
-            return torch.clamp(self.task.obs_buf, -self.clip_obs, self.clip_obs).to(self.rl_device), self.task.rew_buf.to(self.rl_device), self.task.reset_buf.to(self.rl_device), self.task.goal_buf.to(self.rl_device), self.task.extras
+            if self.goal_out is None:
+                self.goal_out = self._allocate_output(self.task.goal_buf)
+            goal = self._copy_out(self.task.goal_buf, self.goal_out)
+            self._sync()
+            return obs, rews, resets, goal, self.task.extras
 
-        return torch.clamp(self.task.obs_buf, -self.clip_obs, self.clip_obs).to(self.rl_device), self.task.rew_buf.to(self.rl_device), self.task.reset_buf.to(self.rl_device), self.task.extras
+        self._sync()
+        return obs, rews, resets, self.task.extras
 
     def get_achieved_reward(self, achieved_goal, states):
         rewards = torch.zeros_like(self.task.reset_buf)
@@ -149,8 +221,290 @@ class VecTaskPython(VecTask):
 
 
     def reset(self):
-        actions = 0.01 * (1 - 2 * torch.rand([self.task.num_envs, self.task.num_actions], dtype=torch.float32, device=self.rl_device))
+        actions = 0.01 * (1 - 2 * torch.rand([self.task.num_envs, self.task.num_actions], dtype=torch.float32, device=self.sim_device))
 
         # step the simulator
         self.task.step(actions)
-        return torch.clamp(self.task.obs_buf, -self.clip_obs, self.clip_obs).to(self.rl_device)
+        obs = self._copy_out(self.task.obs_buf, self.obs_out, self.clip_obs)
+        self._sync()
+        return obs
+
+
+# Pipelined Python Class
+class VecTaskPipelined(VecTask):
+    """Steps two independent task instances, each holding half of the envs, as one VecTask.
+
+    step() runs both halves concurrently. For overlapping policy inference with simulation,
+    step_async/step_wait can be used per half: while one half simulates, actions for the
+    other half can be computed on the main thread. The tasks have to be created with
+    cfg["serialize_gym"] set, the halves then never call into the shared gym at the same
+    time and only their torch work overlaps.
+
+    There is no single task holding all envs, task is None. Per env outputs, e.g. the
+    time_outs extras, are gathered from both halves.
+    """
+
+    def __init__(self, tasks, rl_device, clip_observations=5.0, clip_actions=1.0):
+        super().__init__(tasks[0], rl_device, clip_observations=clip_observations, clip_actions=clip_actions)
+        self.task = None
+
+        self.halves = [VecTaskPython(task, rl_device, clip_observations, clip_actions) for task in tasks]
+        self.num_environments = sum(half.num_envs for half in self.halves)
+
+        self.half_slices = []
+        start = 0
+        for half in self.halves:
+            self.half_slices.append(slice(start, start + half.num_envs))
+            start += half.num_envs
+
+        # One worker and one CUDA stream per half so their work can overlap
+        self.executor = ThreadPoolExecutor(max_workers=len(self.halves))
+        self.streams = [torch.cuda.Stream(device=half.sim_device) if half.sim_device.type == 'cuda' else None
+                        for half in self.halves]
+        self.pending = [None] * len(self.halves)
+
+        self.obs_out = torch.zeros((self.num_envs, self.num_obs), device=self.rl_device, dtype=torch.float)
+        self.states_out = torch.zeros((self.num_envs, self.num_states), device=self.rl_device, dtype=torch.float)
+        self.reverse_actions_out = None
+        self.step_out = None
+
+    @property
+    def num_halves(self):
+        return len(self.halves)
+
+    def _step_half(self, half_id, actions):
+        stream = self.streams[half_id]
+        if stream is None:
+            return self.halves[half_id].step(actions)
+
+        with torch.cuda.stream(stream):
+            result = self.halves[half_id].step(actions)
+        stream.synchronize()
+        return result
+
+    def step_async(self, half_id, actions):
+        """Starts stepping one half with actions of shape (half_num_envs, num_actions)."""
+        if self.pending[half_id] is not None:
+            raise RuntimeError("Half {} is still stepping, call step_wait first".format(half_id))
+        self.pending[half_id] = self.executor.submit(self._step_half, half_id, actions)
+
+    def step_wait(self, half_id):
+        """Waits for one half and returns its (obs, rews, resets, extras) views."""
+        result = self.pending[half_id].result()
+        self.pending[half_id] = None
+        return result
+
+    def step(self, actions):
+        for half_id, env_slice in enumerate(self.half_slices):
+            self.step_async(half_id, actions[env_slice])
+
+        results = [self.step_wait(half_id) for half_id in range(self.num_halves)]
+
+        # Gather every returned tensor (obs, rews, resets and the HER goal) into persistent full-size buffers
+        if self.step_out is None:
+            self.step_out = [self.obs_out] + [torch.zeros((self.num_envs,) + out.shape[1:], device=self.rl_device, dtype=out.dtype)
+                                              for out in results[0][1:-1]]
+        for result, env_slice in zip(results, self.half_slices):
+            for out, half_out in zip(self.step_out, result[:-1]):
+                out[env_slice] = half_out
+
+        extras = {}
+        for key, value in results[0][-1].items():
+            if isinstance(value, torch.Tensor) and value.shape[:1] == (self.halves[0].num_envs,):
+                extras[key] = torch.cat([result[-1][key].to(self.rl_device) for result in results])
+            else:
+                extras[key] = value
+
+        return (*self.step_out, extras)
+
+    def get_state(self):
+        for half, env_slice in zip(self.halves, self.half_slices):
+            self.states_out[env_slice] = half.get_state()
+        return self.states_out
+
+    def get_reverse_actions(self):
+        reverse_actions = [half.get_reverse_actions() for half in self.halves]
+        if self.reverse_actions_out is None:
+            self.reverse_actions_out = torch.zeros((self.num_envs,) + reverse_actions[0].shape[1:], device=self.rl_device)
+        for half_reverse_actions, env_slice in zip(reverse_actions, self.half_slices):
+            self.reverse_actions_out[env_slice] = half_reverse_actions
+        return self.reverse_actions_out
+
+    def reset(self):
+        for half, env_slice in zip(self.halves, self.half_slices):
+            self.obs_out[env_slice] = half.reset()
+        return self.obs_out
+
+
+def _sharded_worker(remote, args, cfg, cfg_train, env_slice):
+    # Imported here, parse_task itself depends on this module
+    from utils.config import parse_sim_params, set_seed
+    from utils.parse_task import parse_task
+
+    set_seed(cfg_train.get("seed", -1), cfg_train.get("torch_deterministic", False))
+    sim_params = parse_sim_params(args, cfg, cfg_train)
+    task, env = parse_task(args, cfg, cfg_train, sim_params)
+
+    # The dimensions are only known once the task is built, the parent allocates the shared buffers from them
+    remote.send({"num_obs": env.num_obs, "num_states": env.num_states, "num_actions": env.num_actions,
+                 "use_her": env.task.use_her})
+    shared_buffers = remote.recv()
+    if shared_buffers == "close":
+        remote.close()
+        return
+    actions, obs, states, rews, resets = [buf[env_slice] for buf in shared_buffers]
+
+    while True:
+        cmd = remote.recv()
+        if cmd == "step":
+            obs_, rews_, resets_, extras = env.step(actions)
+            obs.copy_(obs_)
+            rews.copy_(rews_)
+            resets.copy_(resets_)
+            states.copy_(env.get_state())
+            remote.send({key: value.cpu() if isinstance(value, torch.Tensor) else value for key, value in extras.items()})
+        elif cmd == "reset":
+            obs.copy_(env.reset())
+            states.copy_(env.get_state())
+            remote.send(None)
+        elif cmd == "get_reverse_actions":
+            remote.send(env.get_reverse_actions().cpu())
+        elif cmd == "close":
+            remote.close()
+            break
+
+
+# Multi-process Python Class
+class VecTaskSharded(VecTask):
+    """Spreads the envs over several worker processes, each running its own task built by parse_task.
+
+    Each worker first reports the dimensions of the task it built, the shared buffers are allocated
+    from them. Actions and observations are then exchanged through shared memory tensors, the workers
+    only receive a command and send back the extras over a pipe. Tasks with use_her are not supported.
+    """
+
+    def __init__(self, args, cfg, cfg_train, num_shards, rl_device, clip_observations=5.0, clip_actions=1.0):
+        num_envs = cfg["env"]["numEnvs"]
+
+        # Also stop the workers when the caller never closes the env, e.g. on an exception
+        self.remotes = []
+        self.processes = []
+        self.shard_slices = []
+        self.closed = False
+        atexit.register(self.close)
+
+        ctx = mp.get_context("spawn")
+        start = 0
+        for shard_id in range(num_shards):
+            shard_num_envs = num_envs // num_shards + (1 if shard_id < num_envs % num_shards else 0)
+            env_slice = slice(start, start + shard_num_envs)
+            start += shard_num_envs
+
+            shard_cfg = deepcopy(cfg)
+            shard_cfg["env"]["numEnvs"] = shard_num_envs
+            shard_cfg_train = deepcopy(cfg_train)
+            if shard_cfg_train.get("seed", -1) >= 0:
+                shard_cfg_train["seed"] += shard_id
+            shard_args = deepcopy(args)
+            shard_args.num_shards = 1
+            shard_args.pipeline = False
+            # the workers hand their outputs over through host memory, only the first shard gets a viewer
+            shard_args.rl_device = "cpu"
+            shard_args.headless = args.headless or shard_id > 0
+            shard_cfg["headless"] = shard_args.headless
+
+            remote, worker_remote = ctx.Pipe()
+            process = ctx.Process(target=_sharded_worker,
+                                  args=(worker_remote, shard_args, shard_cfg, shard_cfg_train, env_slice),
+                                  daemon=True)
+            process.start()
+            worker_remote.close()
+
+            self.remotes.append(remote)
+            self.processes.append(process)
+            self.shard_slices.append(env_slice)
+
+        # No task lives in this process, every worker reports the dimensions of the task it built
+        try:
+            shard_dims = [remote.recv() for remote in self.remotes]
+        except EOFError:
+            self.close()
+            raise RuntimeError("A shard worker exited before its task was built")
+        if any(dims["use_her"] for dims in shard_dims):
+            self.close()
+            raise ValueError("VecTaskSharded does not return HER goals, run tasks with useHer without --num_shards")
+        if any(dims != shard_dims[0] for dims in shard_dims):
+            self.close()
+            raise RuntimeError("Shard workers built tasks with different dimensions: {}".format(shard_dims))
+
+        dims = SimpleNamespace(num_envs=num_envs, num_obs=shard_dims[0]["num_obs"],
+                               num_states=shard_dims[0]["num_states"], num_actions=shard_dims[0]["num_actions"])
+        super().__init__(dims, rl_device, clip_observations=clip_observations, clip_actions=clip_actions)
+        self.task = None
+
+        # Shared host buffers, each worker reads and writes its own slice of the envs
+        self.shared_buffers = [
+            torch.zeros((self.num_envs, self.num_actions), dtype=torch.float).share_memory_(),
+            torch.zeros((self.num_envs, self.num_obs), dtype=torch.float).share_memory_(),
+            torch.zeros((self.num_envs, self.num_states), dtype=torch.float).share_memory_(),
+            torch.zeros(self.num_envs, dtype=torch.float).share_memory_(),
+            torch.zeros(self.num_envs, dtype=torch.long).share_memory_()]
+        self.actions_buf, self.obs_buf, self.states_buf, self.rew_buf, self.reset_buf = self.shared_buffers
+        for remote in self.remotes:
+            remote.send(self.shared_buffers)
+
+        self.obs_out = torch.zeros_like(self.obs_buf, device=self.rl_device)
+        self.states_out = torch.zeros_like(self.states_buf, device=self.rl_device)
+        self.rew_out = torch.zeros_like(self.rew_buf, device=self.rl_device)
+        self.reset_out = torch.zeros_like(self.reset_buf, device=self.rl_device)
+
+    def _broadcast(self, cmd):
+        for remote in self.remotes:
+            remote.send(cmd)
+        return [remote.recv() for remote in self.remotes]
+
+    def get_state(self):
+        self.states_out.copy_(self.states_buf)
+        return self.states_out
+
+    def get_reverse_actions(self):
+        return torch.clamp(torch.cat(self._broadcast("get_reverse_actions")).to(self.rl_device), -self.clip_actions, self.clip_actions)
+
+    def step(self, actions):
+        self.actions_buf.copy_(actions)
+        shard_extras = self._broadcast("step")
+
+        extras = {}
+        for key, value in shard_extras[0].items():
+            if isinstance(value, torch.Tensor) and value.shape[:1] == (self.shard_slices[0].stop,):
+                extras[key] = torch.cat([e[key] for e in shard_extras]).to(self.rl_device)
+            else:
+                extras[key] = value
+
+        self.obs_out.copy_(self.obs_buf, non_blocking=True)
+        self.rew_out.copy_(self.rew_buf, non_blocking=True)
+        self.reset_out.copy_(self.reset_buf, non_blocking=True)
+        return self.obs_out, self.rew_out, self.reset_out, extras
+
+    def reset(self):
+        self._broadcast("reset")
+        self.obs_out.copy_(self.obs_buf)
+        return self.obs_out
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.close)
+
+        for remote in self.remotes:
+            try:
+                remote.send("close")
+            except (BrokenPipeError, EOFError):
+                pass
+        for process in self.processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        for remote in self.remotes:
+            remote.close()
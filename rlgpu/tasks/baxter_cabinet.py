@@ -15,6 +15,9 @@ from isaacgym import gymapi
 from rlgpu.utils.torch_jit_utils import *
 
 from tasks.base.base_task import BaseTask
+from tasks.base.controllers import DifferentialIK, OperationalSpaceController, GripperCommand
+from tasks.base.debug_draw import DebugAxes, AXIS_COLORS
+from tasks.base.cameras import CameraSensors, CameraImages
 import torch
 
 import matplotlib
@@ -50,6 +53,10 @@ class BaxterCabinet(BaseTask):
 
         self.debug_viz = self.cfg["env"]["enableDebugVis"]
 
+        # "joint": position targets from joint deltas, "osc": operational space torques from hand pose deltas
+        self.control_type = self.cfg["env"].get("controlType", "joint")
+        self.osc_action_scale = self.cfg["env"].get("oscActionScale", [0.1, 0.1, 0.1, 0.5, 0.5, 0.5])
+
         self.up_axis = "z"
         self.up_axis_idx = 2
 
@@ -77,23 +84,53 @@ class BaxterCabinet(BaseTask):
 
         self.is_test = False
         self.abnormal_state = False
-        self.catch = False
-        # Camera Sensor
+        # Camera Sensor, only created when images are observed
+        self.camera_obs = self.cfg["env"].get("cameraObservations", False)
         self.camera_props = gymapi.CameraProperties()
         self.camera_props.width = 128
         self.camera_props.height = 128
         self.camera_props.enable_tensors = True
+        if self.camera_obs:
+            self.num_obs += self.camera_props.height * self.camera_props.width * 3
+            self.cfg["env"]["numObservations"] = self.num_obs
         self.debug_fig = plt.figure("debug")
 
         self.use_her = False
     
-        self.demonstration = Demonstration('/home/lohse/isaac_ws/src/isaac-gym/scripts/Isaac-drlgrasp/envs_test/npresult1.txt')
         self.demostration_round = 0
-        self.demostration_step = 0
+        # each env holds its pose for up to demonstrationMaxOffset steps before playing the whole demonstration,
+        # with its waypoints shifted by up to demonstrationGoalNoise
+        self.demonstration_max_offset = self.cfg["env"].get("demonstrationMaxOffset", 0)
+        self.demonstration_goal_noise = self.cfg["env"].get("demonstrationGoalNoise", 0.0)
+        if self.demonstration_max_offset > self.max_episode_length - 301:
+            raise ValueError("demonstrationMaxOffset {} does not leave room for the 300 demonstration steps in episodeLength {}".format(
+                self.demonstration_max_offset, self.max_episode_length))
         if self.is_test:
             self.isaac_ros_server = isaac_ros_server()
 
-        super().__init__(cfg=self.cfg)
+        super().__init__(cfg=self.cfg, enable_camera_sensors=self.camera_obs)
+
+        self.demonstration = Demonstration(self.cfg["env"].get("demonstrationFile", os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../envs_test/npresult1.txt')),
+                                           device=self.device)
+        self.debug_axes = DebugAxes(self.gym, self.viewer, self.envs, self.device,
+                                    env_stride=self.cfg["env"].get("debugVisEnvStride", 1))
+        self.cameras = CameraSensors(self.gym, self.sim, self.cfg["env"].get("cameraRenderInterval", 1),
+                                     step_graphics=self.viewer is None)
+        if self.camera_obs:
+            self.camera_images = CameraImages(self.gym, self.sim, self.envs, self.camera_handles,
+                                              self.camera_props.height, self.camera_props.width,
+                                              mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225], device=self.device)
+
+        # images first, ppo_conv reads the aux obs from the end of the observation
+        obs_layout = [("dof_pos", 19 - self.baxter_begin_dof), ("to_target", 3), ("finger_dist", 3), ("drawer_pos", 1)]
+        if self.camera_obs:
+            obs_layout.insert(0, ("image", self.camera_props.height * self.camera_props.width * 3))
+        self.set_obs_layout(obs_layout)
+
+        # twin module / debugging outputs, only computed once subscribed
+        self.register_aux_output("force_sign", (3,), self.compute_force_sign)
+        self.register_aux_output("domain_params", (2,), self.compute_domain_params)
+        self.catch_state = self.register_aux_output("catch_state", (2,), self.compute_catch_state)
 
         # get gym GPU state tensors
         actor_root_state_tensor = self.gym.acquire_actor_root_state_tensor(self.sim)
@@ -102,9 +139,7 @@ class BaxterCabinet(BaseTask):
         _fsdata = self.gym.acquire_force_sensor_tensor(self.sim)
 
         self.fsdata = gymtorch.wrap_tensor(_fsdata)
-        self.gym.refresh_actor_root_state_tensor(self.sim)
-        self.gym.refresh_dof_state_tensor(self.sim)
-        self.gym.refresh_rigid_body_state_tensor(self.sim)
+        self.sim_tensors.require("actor_root_state", "dof_state", "rigid_body_state")
 
         # create some wrapper tensors for different slices
         self.baxter_default_dof_pos = to_torch([0, 0., -1.57, 0, 2.5, 0, 0, 0, 0, 0, 1.0, -0.8653,  0.0475,  1.8469,  0.4385, -1.0343,  1.3056, 0.0200, -0.0200], device=self.device)
@@ -128,6 +163,24 @@ class BaxterCabinet(BaseTask):
 
         self.num_dofs = self.gym.get_sim_dof_count(self.sim) // self.num_envs
         self.baxter_dof_targets = torch.zeros((self.num_envs, self.num_dofs), dtype=torch.float, device=self.device)
+        self.reverse_actions = torch.zeros((self.num_envs, 8), dtype=torch.float, device=self.device)
+
+        self.demostration_steps = torch.zeros(self.num_envs, dtype=torch.long, device=self.device)
+        self.demostration_waypoints = to_torch([[0.7, 0.0, 1.196], [0.59, 0.0, 1.196], [1.1, 0.0, 1.196]], device=self.device)
+        self.demostration_goal_offset = torch.zeros((self.num_envs, 3), dtype=torch.float, device=self.device)
+
+        if self.control_type == "osc":
+            self._mass_matrix = self.gym.acquire_mass_matrix_tensor(self.sim, "baxter")
+            self.mass_matrix = gymtorch.wrap_tensor(self._mass_matrix)
+            arm_dofs = slice(self.baxter_begin_dof, 17)
+            self.osc = OperationalSpaceController(self.j_eef[:, :, arm_dofs], self.mass_matrix[:, arm_dofs, arm_dofs],
+                                                  kp=self.cfg["env"].get("oscKp", 150.0),
+                                                  kp_null=self.cfg["env"].get("oscKpNull", 10.0),
+                                                  default_dof_pos=self.baxter_default_dof_pos[arm_dofs])
+            self.osc_action_scale = to_torch(self.osc_action_scale, device=self.device)
+            self.dof_torques = torch.zeros((self.num_envs, self.num_dofs), dtype=torch.float, device=self.device)
+            # demonstration pose errors, the orientation part stays zero
+            self.demostration_dpose = torch.zeros((self.num_envs, 6), dtype=torch.float, device=self.device)
 
         self.global_indices = torch.arange(self.num_envs * (2 + self.num_props), dtype=torch.int32, device=self.device).view(self.num_envs, -1)
 
@@ -159,10 +212,10 @@ class BaxterCabinet(BaseTask):
         baxter_asset_file = "baxter/baxter_isaac.urdf"
         cabinet_asset_file = "urdf/sektion_cabinet_model/urdf/sektion_cabinet_2.urdf"
 
-        # if "asset" in self.cfg["env"]:
-        #     asset_root = self.cfg["env"]["asset"].get("assetRoot", asset_root)
-        #     baxter_asset_file = self.cfg["env"]["asset"].get("assetFileNamebaxter", baxter_asset_file)
-        #     cabinet_asset_file = self.cfg["env"]["asset"].get("assetFileNameCabinet", cabinet_asset_file)
+        if "asset" in self.cfg["env"]:
+            asset_root = self.cfg["env"]["asset"].get("assetRoot", asset_root)
+            baxter_asset_file = self.cfg["env"]["asset"].get("assetFileNamebaxter", baxter_asset_file)
+            cabinet_asset_file = self.cfg["env"]["asset"].get("assetFileNameCabinet", cabinet_asset_file)
 
         # load baxter asset
         asset_options = gymapi.AssetOptions()
@@ -229,6 +282,12 @@ class BaxterCabinet(BaseTask):
             self.baxter_dof_lower_limits.append(baxter_dof_props['lower'][i])
             self.baxter_dof_upper_limits.append(baxter_dof_props['upper'][i])
 
+        # with osc the arm is torque driven from the start, the demonstrations are played through osc as well
+        if self.control_type == "osc":
+            baxter_dof_props['driveMode'][self.baxter_begin_dof:17] = gymapi.DOF_MODE_EFFORT
+            baxter_dof_props['stiffness'][self.baxter_begin_dof:17] = 0.0
+            baxter_dof_props['damping'][self.baxter_begin_dof:17] = 0.0
+
         self.baxter_ranges = baxter_dof_props['lower'] - baxter_dof_props['upper']
         self.baxter_mids = 0.5 * (baxter_dof_props['upper'] + baxter_dof_props['lower'])
         baxter_num_dofs = len(baxter_dof_props)
@@ -287,11 +346,13 @@ class BaxterCabinet(BaseTask):
             env_ptr = self.gym.create_env(
                 self.sim, lower, upper, num_per_row
             )
-            camera_handle = self.gym.create_camera_sensor(env_ptr, self.camera_props)
-            transform = gymapi.Transform()
-            transform.p = gymapi.Vec3(1.25, 0, 1.2)
-            transform.r = gymapi.Quat.from_euler_zyx(math.pi, 0.75 * math.pi, 0)
-            self.gym.set_camera_transform(camera_handle, env_ptr, transform)
+            if self.camera_obs:
+                camera_handle = self.gym.create_camera_sensor(env_ptr, self.camera_props)
+                transform = gymapi.Transform()
+                transform.p = gymapi.Vec3(1.25, 0, 1.2)
+                transform.r = gymapi.Quat.from_euler_zyx(math.pi, 0.75 * math.pi, 0)
+                self.gym.set_camera_transform(camera_handle, env_ptr, transform)
+                self.camera_handles.append(camera_handle)
 
             if self.aggregate_mode >= 3:
                 self.gym.begin_aggregate(env_ptr, max_agg_bodies, max_agg_shapes, True)
@@ -357,7 +418,6 @@ class BaxterCabinet(BaseTask):
             self.envs.append(env_ptr)
             self.baxters.append(baxter_actor)
             self.cabinets.append(cabinet_actor)
-            self.camera_handles.append(camera_handle)
 
         self.hand_handle = self.gym.find_actor_rigid_body_handle(env_ptr, baxter_actor, "right_wrist")
         self.drawer_handle = self.gym.find_actor_rigid_body_handle(env_ptr, cabinet_actor, "drawer_top")
@@ -370,6 +430,8 @@ class BaxterCabinet(BaseTask):
         # Jacobian entries for end effector
         self.hand_index = self.gym.get_asset_rigid_body_dict(baxter_asset)["right_wrist"]
         self.j_eef = self.jacobian[:, self.hand_index - 1, :]
+        self.ik = DifferentialIK(self.j_eef, damping=0.1)
+        self.gripper = GripperCommand([17, 18], [0.0208, -0.0208], [0.0, 0.0], self.device)
 
         self.init_data()
 
@@ -429,14 +491,11 @@ class BaxterCabinet(BaseTask):
             self.num_envs, self.dist_reward_scale, self.rot_reward_scale, self.around_handle_reward_scale, self.open_reward_scale,
             self.finger_dist_reward_scale, self.action_penalty_scale, self.distX_offset, self.max_episode_length
         )
+        torch.ge(self.progress_buf, self.max_episode_length - 1, out=self.time_out_buf)
 
     def compute_observations(self):
 
-        self.gym.refresh_actor_root_state_tensor(self.sim)
-        self.gym.refresh_dof_state_tensor(self.sim)
-        self.gym.refresh_rigid_body_state_tensor(self.sim)
-        self.gym.refresh_jacobian_tensors(self.sim)
-        self.gym.refresh_force_sensor_tensor(self.sim)
+        self.sim_tensors.require("dof_state", "rigid_body_state")
 
         self.hand_pos = self.rigid_body_states[:, self.hand_handle][:, 0:3]
         self.hand_rot = self.rigid_body_states[:, self.hand_handle][:, 3:7]        
@@ -462,48 +521,36 @@ class BaxterCabinet(BaseTask):
         to_target = self.drawer_grasp_pos - self.baxter_grasp_pos
         finger_dist = self.baxter_lfinger_pos - self.baxter_rfinger_pos
 
-        # num: 12 + 12 + 3 + 1 + 1
-        self.obs_buf = torch.cat((dof_pos_scaled[:, self.baxter_begin_dof:19], to_target, finger_dist,
-                                  self.cabinet_dof_pos[:, 3].unsqueeze(-1)), dim=-1)
+        # num: 9 + 3 + 3 + 1
+        self.write_obs("dof_pos", dof_pos_scaled[:, self.baxter_begin_dof:19])
+        self.write_obs("to_target", to_target)
+        self.write_obs("finger_dist", finger_dist)
+        self.write_obs("drawer_pos", self.cabinet_dof_pos[:, 3])
+
+        #visual input, rendered every cameraRenderInterval-th step
+        if self.camera_obs:
+            with self.cameras:
+                if self.cameras.rendered:
+                    self.camera_images.update()
+            # image scale and normalize, written in (c h w) order
+            self.camera_images.normalize(self.obs_segment("image").view(
+                self.num_envs, 3, self.camera_props.height, self.camera_props.width))
+        return self.obs_buf
 
-        self.force_buf = torch.zeros_like(self.fsdata)[:, :3]
-        self.force_buf[:, 0] = torch.where(self.fsdata[:, 0] > 0, torch.ones_like(self.force_buf[:, 0]), torch.ones_like(self.force_buf[:, 0]) * -1)
-        self.force_buf[:, 1] = torch.where(self.fsdata[:, 1] > 0, torch.ones_like(self.force_buf[:, 1]), torch.ones_like(self.force_buf[:, 1]) * -1)
-        self.force_buf[:, 2] = torch.where(self.fsdata[:, 2] > 0, torch.ones_like(self.force_buf[:, 2]), torch.ones_like(self.force_buf[:, 2]) * -1)
-        # print(self.force_buf[0])
+    def compute_force_sign(self, buf):
+        self.sim_tensors.require("force_sensor")
+        buf.copy_(self.fsdata[:, 0:3] > 0).mul_(2).sub_(1)
 
-        self.domain_para_buf = torch.zeros_like(to_target[:, 0:2])
-        self.domain_para_buf[:, 0] = torch.where(self.cabinet_dof_pos[:, 3] > 0.01, torch.ones_like(self.domain_para_buf[:, 0]), self.domain_para_buf[:, 0])
-        self.domain_para_buf[:, 1] = torch.where(self.cabinet_dof_pos[:, 3] < 0.01, torch.ones_like(self.domain_para_buf[:, 0]), self.domain_para_buf[:, 0])
+    def compute_domain_params(self, buf):
+        buf[:, 0].copy_(self.cabinet_dof_pos[:, 3] > 0.01)
+        # the second column falls back to the first one, so it is also 1 while the drawer is open
+        buf[:, 1] = torch.where(self.cabinet_dof_pos[:, 3] < 0.01, torch.ones_like(buf[:, 0]), buf[:, 0])
 
-        if abs(self.baxter_lfinger_pos[0, 2]- self.drawer_grasp_pos[0, 2]) < 0.02 and abs(self.baxter_lfinger_pos[0, 2] - self.drawer_grasp_pos[0, 2]) < 0.02:
-            self.catch = True
-            self.catch_state = self.baxter_lfinger_pos[0, 0]- self.drawer_grasp_pos[0, 0]
-
-        #visual input
-        # camera_tensor = self.gym.get_camera_image_gpu_tensor(self.sim, self.envs[0], self.camera_handles[0], gymapi.IMAGE_COLOR)
-        # torch_camera_tensor = gymtorch.wrap_tensor(camera_tensor)
-        # torch_camera_tensor = to_torch(torch_camera_tensor, dtype=torch.float, device=self.device).unsqueeze(0)
-
-        # self.img_buf = torch_camera_tensor
-        # for i in range(1, self.num_envs):
-        #     camera_tensor = self.gym.get_camera_image_gpu_tensor(self.sim, self.envs[i], self.camera_handles[i], gymapi.IMAGE_COLOR)
-        #     torch_camera_tensor = gymtorch.wrap_tensor(camera_tensor)
-        #     torch_camera_tensor = to_torch(torch_camera_tensor, dtype=torch.float, device=self.device).unsqueeze(0)
-        #     self.img_buf = torch.cat((self.img_buf, torch_camera_tensor), dim=0)
-
-        # self.img_buf = self.img_buf[:, :, :, :3]
-        # #image scale and normalize
-        # image_mean = [0.485, 0.456, 0.406]
-        # image_std = [0.229, 0.224, 0.225]
-        # self.img_buf = self.img_buf / 255
-        # for c in range(3):
-        #     self.img_buf[:, :, c] = (self.img_buf[:, :, c] - image_mean[c])/image_std[c]
-
-        # # add aux obs
-        # self.img_buf = rearrange(self.img_buf, 'b h w c -> b (h w c)')
-        # self.obs_buf = torch.cat((self.img_buf, dof_pos_scaled), dim=1)
-        return self.obs_buf
+    def compute_catch_state(self, buf):
+        # [caught since the episode start, lfinger x offset to the handle at the last catch]
+        caught = torch.abs(self.baxter_lfinger_pos[:, 2] - self.drawer_grasp_pos[:, 2]) < 0.02
+        buf[:, 0].masked_fill_(caught, 1.0)
+        buf[:, 1] = torch.where(caught, self.baxter_lfinger_pos[:, 0] - self.drawer_grasp_pos[:, 0], buf[:, 1])
 
     def reset(self, env_ids):
         env_ids_int32 = env_ids.to(dtype=torch.int32)
@@ -512,7 +559,7 @@ class BaxterCabinet(BaseTask):
         # reset baxter
         pos = tensor_clamp(
             # self.baxter_default_dof_pos.unsqueeze(0) + 0.25 * (torch.rand((len(env_ids), self.num_baxter_dofs), device=self.device) - 0.5),
-            self.baxter_default_dof_pos.unsqueeze(0),
+            self.randomize_tensor("dof_pos", self.baxter_default_dof_pos.unsqueeze(0).repeat(len(env_ids), 1)),
             self.baxter_dof_lower_limits, self.baxter_dof_upper_limits)
         self.baxter_dof_pos[env_ids, :] = pos
         self.baxter_dof_vel[env_ids, :] = torch.zeros_like(self.baxter_dof_vel[env_ids])
@@ -524,7 +571,10 @@ class BaxterCabinet(BaseTask):
         # reset props
         if self.num_props > 0:
             prop_indices = self.global_indices[env_ids, 2:].flatten()
-            self.prop_states[env_ids] = self.default_prop_states[env_ids]
+            self.sim_tensors.require("actor_root_state")
+            prop_states = self.default_prop_states[env_ids]
+            self.randomize_tensor("prop_pos", prop_states[..., 0:3])
+            self.prop_states[env_ids] = prop_states
             self.gym.set_actor_root_state_tensor_indexed(self.sim,
                                                          gymtorch.unwrap_tensor(self.root_state_tensor),
                                                          gymtorch.unwrap_tensor(prop_indices), len(prop_indices))
@@ -538,72 +588,71 @@ class BaxterCabinet(BaseTask):
                                               gymtorch.unwrap_tensor(self.dof_state),
                                               gymtorch.unwrap_tensor(multi_env_ids_int32), len(multi_env_ids_int32))
 
-        self.reverse_actions = torch.zeros_like(self.baxter_dof_targets[:, self.baxter_begin_dof:self.num_baxter_dofs][:, :8])
-        
+        self.reverse_actions[env_ids] = 0
+        self.catch_state[env_ids] = 0
+
+        # restart the demonstration of the reset envs after their own delay, counted up from -offset, with their own goal
+        self.demostration_steps[env_ids] = -torch.randint(0, self.demonstration_max_offset + 1, (len(env_ids),), device=self.device)
+        self.demostration_goal_offset[env_ids] = (2 * torch.rand((len(env_ids), 3), device=self.device) - 1) * self.demonstration_goal_noise
+
         self.progress_buf[env_ids] = 0
         self.reset_buf[env_ids] = 0
-        self.demostration_step = 0
-        self.demostration_round += 1
+        self.demostration_round += len(env_ids) / self.num_envs
 
     def pre_physics_step(self, actions):
         if self.demostration_round < 2:
             self.actions = actions.clone().to(self.device)
-            self.demostration_step += 1
+            self.demostration_steps += 1
 
             # set demonstration===============================================================================================
-            if(self.demostration_step <= 50):
-                pos_err = - self.demostration_step / 500 * (self.rigid_body_states[:, self.hand_handle][:, :3] - to_torch([0.7, 0.0, 1.196], dtype=torch.float, device=self.device).repeat((self.num_envs, 1)))
-            if(150 >= self.demostration_step > 50):
-                pos_err = - (self.demostration_step - 50) / 1000 * (self.rigid_body_states[:, self.hand_handle][:, :3] - to_torch([0.59, 0.0, 1.196], dtype=torch.float, device=self.device).repeat((self.num_envs, 1)))
-            if(self.demostration_step > 150):
-                pos_err = - (self.demostration_step - 150) / 2000 * (self.rigid_body_states[:, self.hand_handle][:, :3] - to_torch([1.1, 0.0, 1.196], dtype=torch.float, device=self.device).repeat((self.num_envs, 1)))
-            # set demonstration================================================================================================
-            orn_err = to_torch([0, 0, 0], dtype=torch.float, device=self.device).repeat((self.num_envs, 1))
-
-            dpose = torch.cat([pos_err, orn_err], -1).unsqueeze(-1)
-
-            # solve damped least squares
-            j_eef_T = torch.transpose(self.j_eef, 1, 2)
-            d = 0.1  # damping term
-            lmbda = torch.eye(6).to('cuda:0') * (d ** 2)
-            u = (j_eef_T @ torch.inverse(self.j_eef @ j_eef_T + lmbda) @ dpose).view(self.num_envs, 19, 1)
-
-            # update position targets
-            tem_dof = self.baxter_dof_targets[:, :self.num_baxter_dofs].clone().to(self.device)
-            self.baxter_dof_targets[:, :self.num_baxter_dofs] = self.baxter_dof_targets[:, :self.num_baxter_dofs] + u.squeeze(-1)
-
-            for i in range(self.num_envs):
-                if self.demostration_step < 150:
-                    self.baxter_dof_targets[i, 17] = 0.02
-                    self.baxter_dof_targets[i, 18] = -0.02
-                    self.reverse_actions[:, 7] = 1
-
-                else:
-                    self.baxter_dof_targets[i, 17] = 0.0
-                    self.baxter_dof_targets[i, 18] = 0.0
-                    self.reverse_actions[:, 7] = -1
-
-            # reverse inference action
+            # step 0 of the schedule holds the pose, envs still waiting out their start delay stay there
+            step = torch.clamp(self.demostration_steps, min=0).unsqueeze(-1).float()
+            hand_pos = self.rigid_body_states[:, self.hand_handle][:, :3]
+            waypoints = self.demostration_waypoints.unsqueeze(0) + self.demostration_goal_offset.unsqueeze(1)
+            if self.control_type == "osc":
+                # the same waypoints, commanded as the osc pose errors a policy would send
+                waypoint = torch.where(step <= 50, waypoints[:, 0], torch.where(step <= 150, waypoints[:, 1], waypoints[:, 2]))
+                self.demostration_dpose[:, 0:3] = tensor_clamp(waypoint - hand_pos, -self.osc_action_scale[0:3], self.osc_action_scale[0:3]) * (step > 0)
+                self.apply_osc(self.demostration_dpose)
+                self.reverse_actions[:, :6] = self.demostration_dpose / self.osc_action_scale
+            else:
+                pos_err = torch.where(step <= 50, - step / 500 * (hand_pos - waypoints[:, 0]),
+                                      torch.where(step <= 150, - (step - 50) / 1000 * (hand_pos - waypoints[:, 1]),
+                                                  - (step - 150) / 2000 * (hand_pos - waypoints[:, 2])))
+                # set demonstration================================================================================================
+                # solve damped least squares
+                self.sim_tensors.require("jacobian")
+                u = self.ik.compute(pos_err)
+
+                # update position targets
+                tem_dof = self.baxter_dof_targets[:, :self.num_baxter_dofs].clone().to(self.device)
+                self.baxter_dof_targets[:, :self.num_baxter_dofs] = self.baxter_dof_targets[:, :self.num_baxter_dofs] + u
+
+                # reverse inference action
+                self.reverse_actions[:, :7] = (self.baxter_dof_targets[:, self.baxter_begin_dof:17] - tem_dof[:, self.baxter_begin_dof:17]) / self.dt / self.action_scale
+
+            gripper_open = self.demostration_steps < 150
+            self.gripper.set(self.baxter_dof_targets, gripper_open)
+            self.reverse_actions[:, 7] = gripper_open.float() * 2 - 1
+
             self.gym.set_dof_position_target_tensor(self.sim,
                                         gymtorch.unwrap_tensor(self.baxter_dof_targets))
-
-            self.reverse_actions[:, :7] = (self.baxter_dof_targets[:, self.baxter_begin_dof:17] - tem_dof[:, self.baxter_begin_dof:17]) / self.dt / self.action_scale
             
             # self.reverse_actions = torch.cat([self.reverse_actions, self.gripper_flag], -1)
             # print(self.baxter_dof_targets[0, 1:self.num_baxter_dofs])
-            if self.demostration_step == 300:
-                self.reset_buf = torch.ones_like(self.reset_buf)
+            self.reset_buf = torch.where(self.demostration_steps >= 300, torch.ones_like(self.reset_buf), self.reset_buf)
 
         else:
             self.actions = actions.clone().to(self.device)
 
-            targets = self.baxter_dof_targets[:, self.baxter_begin_dof:17] + self.dt * self.actions[:, :7] * self.action_scale
-            self.baxter_dof_targets[:, self.baxter_begin_dof:17] = tensor_clamp(
-                targets, self.baxter_dof_lower_limits[self.baxter_begin_dof:17], self.baxter_dof_upper_limits[self.baxter_begin_dof:17])
+            if self.control_type == "osc":
+                self.apply_osc(self.actions[:, :6] * self.osc_action_scale)
+            else:
+                targets = self.baxter_dof_targets[:, self.baxter_begin_dof:17] + self.dt * self.actions[:, :7] * self.action_scale
+                self.baxter_dof_targets[:, self.baxter_begin_dof:17] = tensor_clamp(
+                    targets, self.baxter_dof_lower_limits[self.baxter_begin_dof:17], self.baxter_dof_upper_limits[self.baxter_begin_dof:17])
             
-            for i in range(self.num_envs):
-                self.baxter_dof_targets[i, 17] = 0.0208 * (self.actions[i, 7] + 1) / 2
-                self.baxter_dof_targets[i, 18] = -0.0208 * (self.actions[i, 7] + 1) / 2
+            self.gripper.apply(self.baxter_dof_targets, self.actions[:, 7])
 
             
             env_ids_int32 = torch.arange(self.num_envs, dtype=torch.int32, device=self.device)
@@ -645,6 +694,14 @@ class BaxterCabinet(BaseTask):
                 joint_position[7:9] = self.baxter_dof_targets[1, 17:19].cpu().detach().numpy().tolist()
                 self.isaac_ros_server.joint_states_server(joint_position)
 
+    def apply_osc(self, dpose):
+        """Drives the arm dofs with the osc torques for the hand pose errors dpose [num_envs, 6]."""
+        self.sim_tensors.require("jacobian", "mass_matrix")
+        self.dof_torques[:, self.baxter_begin_dof:17] = self.osc.compute(
+            dpose[:, 0:3], dpose[:, 3:6], self.baxter_dof_vel[:, self.baxter_begin_dof:17],
+            self.baxter_dof_pos[:, self.baxter_begin_dof:17])
+        self.gym.set_dof_actuation_force_tensor(self.sim, gymtorch.unwrap_tensor(self.dof_torques))
+
     def post_physics_step(self):
         self.progress_buf += 1
         self.randomize_buf += 1
@@ -653,61 +710,21 @@ class BaxterCabinet(BaseTask):
         if len(env_ids) > 0:
             self.reset(env_ids)
 
-        self.gym.render_all_camera_sensors(self.sim)
-        self.gym.start_access_image_tensors(self.sim)
         self.compute_observations()
         self.compute_reward(self.actions)
 
         # debug viz
         if self.viewer and self.debug_viz:
             self.gym.clear_lines(self.viewer)
-            self.gym.refresh_rigid_body_state_tensor(self.sim)
-
-            for i in range(self.num_envs):
-                px = (self.baxter_grasp_pos[i] + quat_apply(self.baxter_grasp_rot[i], to_torch([1, 0, 0], device=self.device) * 0.2)).cpu().numpy()
-                py = (self.baxter_grasp_pos[i] + quat_apply(self.baxter_grasp_rot[i], to_torch([0, 1, 0], device=self.device) * 0.2)).cpu().numpy()
-                pz = (self.baxter_grasp_pos[i] + quat_apply(self.baxter_grasp_rot[i], to_torch([0, 0, 1], device=self.device) * 0.2)).cpu().numpy()
-
-                p0 = self.baxter_grasp_pos[i].cpu().numpy()
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], px[0], px[1], px[2]], [0.85, 0.1, 0.1])
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], py[0], py[1], py[2]], [0.1, 0.85, 0.1])
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], pz[0], pz[1], pz[2]], [0.1, 0.1, 0.85])
-
-                px = (self.drawer_grasp_pos[i] + quat_apply(self.drawer_grasp_rot[i], to_torch([1, 0, 0], device=self.device) * 0.2)).cpu().numpy()
-                py = (self.drawer_grasp_pos[i] + quat_apply(self.drawer_grasp_rot[i], to_torch([0, 1, 0], device=self.device) * 0.2)).cpu().numpy()
-                pz = (self.drawer_grasp_pos[i] + quat_apply(self.drawer_grasp_rot[i], to_torch([0, 0, 1], device=self.device) * 0.2)).cpu().numpy()
-
-                p0 = self.drawer_grasp_pos[i].cpu().numpy()
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], px[0], px[1], px[2]], [1, 0, 0])
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], py[0], py[1], py[2]], [0, 1, 0])
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], pz[0], pz[1], pz[2]], [0, 0, 1])
-
-                px = (self.baxter_lfinger_pos[i] + quat_apply(self.baxter_lfinger_rot[i], to_torch([1, 0, 0], device=self.device) * 0.2)).cpu().numpy()
-                py = (self.baxter_lfinger_pos[i] + quat_apply(self.baxter_lfinger_rot[i], to_torch([0, 1, 0], device=self.device) * 0.2)).cpu().numpy()
-                pz = (self.baxter_lfinger_pos[i] + quat_apply(self.baxter_lfinger_rot[i], to_torch([0, 0, 1], device=self.device) * 0.2)).cpu().numpy()
-
-                p0 = self.baxter_lfinger_pos[i].cpu().numpy()
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], px[0], px[1], px[2]], [1, 0, 0])
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], py[0], py[1], py[2]], [0, 1, 0])
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], pz[0], pz[1], pz[2]], [0, 0, 1])
-
-                px = (self.baxter_rfinger_pos[i] + quat_apply(self.baxter_rfinger_rot[i], to_torch([1, 0, 0], device=self.device) * 0.2)).cpu().numpy()
-                py = (self.baxter_rfinger_pos[i] + quat_apply(self.baxter_rfinger_rot[i], to_torch([0, 1, 0], device=self.device) * 0.2)).cpu().numpy()
-                pz = (self.baxter_rfinger_pos[i] + quat_apply(self.baxter_rfinger_rot[i], to_torch([0, 0, 1], device=self.device) * 0.2)).cpu().numpy()
-
-                p0 = self.baxter_rfinger_pos[i].cpu().numpy()
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], px[0], px[1], px[2]], [1, 0, 0])
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], py[0], py[1], py[2]], [0, 1, 0])
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], pz[0], pz[1], pz[2]], [0, 0, 1])
-
-                px = (self.hand_pos[i] + quat_apply(self.hand_rot[i], to_torch([1, 0, 0], device=self.device) * 0.2)).cpu().numpy()
-                py = (self.hand_pos[i] + quat_apply(self.hand_rot[i], to_torch([0, 1, 0], device=self.device) * 0.2)).cpu().numpy()
-                pz = (self.hand_pos[i] + quat_apply(self.hand_rot[i], to_torch([0, 0, 1], device=self.device) * 0.2)).cpu().numpy()
-
-                p0 = self.hand_pos[i].cpu().numpy()
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], px[0], px[1], px[2]], [1, 0, 0])
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], py[0], py[1], py[2]], [0, 1, 0])
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], pz[0], pz[1], pz[2]], [0, 0, 1])
+            self.sim_tensors.require("rigid_body_state")
+
+            self.debug_axes.draw([
+                (self.baxter_grasp_pos, self.baxter_grasp_rot),
+                (self.drawer_grasp_pos, self.drawer_grasp_rot),
+                (self.baxter_lfinger_pos, self.baxter_lfinger_rot),
+                (self.baxter_rfinger_pos, self.baxter_rfinger_rot),
+                (self.hand_pos, self.hand_rot),
+            ], colors=[AXIS_COLORS] + [[[1, 0, 0], [0, 1, 0], [0, 0, 1]]] * 4)
         # Camera Debug
         # camera_tensor = self.gym.get_camera_image_gpu_tensor(self.sim, self.envs[0], self.camera_handles[0], gymapi.IMAGE_COLOR)
         # torch_camera_tensor = gymtorch.wrap_tensor(camera_tensor)
@@ -14,6 +14,7 @@ from isaacgym import gymtorch
 from isaacgym import gymapi
 from rlgpu.utils.torch_jit_utils import *
 from rlgpu.tasks.base.base_task import BaseTask
+from rlgpu.tasks.base.controllers import DifferentialIK, GripperCommand
 import torch
 
 import matplotlib
@@ -85,14 +86,14 @@ class BaxterCabinet(BaseTask):
 
         super().__init__(cfg=self.cfg)
 
+        self.set_obs_layout([("lfinger_pos", 3), ("rfinger_pos", 3), ("to_target", 1), ("drawer_pos", 1)])
+
         # get gym GPU state tensors
         actor_root_state_tensor = self.gym.acquire_actor_root_state_tensor(self.sim)
         dof_state_tensor = self.gym.acquire_dof_state_tensor(self.sim)
         rigid_body_tensor = self.gym.acquire_rigid_body_state_tensor(self.sim)
 
-        self.gym.refresh_actor_root_state_tensor(self.sim)
-        self.gym.refresh_dof_state_tensor(self.sim)
-        self.gym.refresh_rigid_body_state_tensor(self.sim)
+        self.sim_tensors.require("actor_root_state", "dof_state", "rigid_body_state")
 
         # create some wrapper tensors for different slices
         self.baxter_default_dof_pos = to_torch([0, 0, -1.57, 0, 2.5, 0, 0, 0, 0, 0, 1.2272, -1.3570,  0.0937,  2.2918,  0.6131, -1.0368,  1.2078,  0.0200, -0.0200], device=self.device)
@@ -346,6 +347,8 @@ class BaxterCabinet(BaseTask):
         # Jacobian entries for end effector
         self.hand_index = self.gym.get_asset_rigid_body_dict(baxter_asset)["right_wrist"]
         self.j_eef = self.jacobian[:, self.hand_index - 1, :]
+        self.ik = DifferentialIK(self.j_eef, damping=0.1)
+        self.gripper = GripperCommand([17, 18], [0.02, -0.02], [0.0, 0.0], self.device)
 
         self.init_data()
 
@@ -407,13 +410,11 @@ class BaxterCabinet(BaseTask):
             self.num_envs, self.dist_reward_scale, self.rot_reward_scale, self.around_handle_reward_scale, self.open_reward_scale,
             self.finger_dist_reward_scale, self.action_penalty_scale, self.distX_offset, self.max_episode_length
         )
+        torch.ge(self.progress_buf, self.max_episode_length - 1, out=self.time_out_buf)
 
     def compute_observations(self):
 
-        self.gym.refresh_actor_root_state_tensor(self.sim)
-        self.gym.refresh_dof_state_tensor(self.sim)
-        self.gym.refresh_rigid_body_state_tensor(self.sim)
-        self.gym.refresh_jacobian_tensors(self.sim)
+        self.sim_tensors.require("dof_state", "rigid_body_state")
 
         self.hand_pos = self.rigid_body_states[:, self.hand_handle][:, 0:3]
         self.hand_rot = self.rigid_body_states[:, self.hand_handle][:, 3:7]        
@@ -451,8 +452,10 @@ class BaxterCabinet(BaseTask):
 
         # num: 12 + 12 + 3 + 1 + 1
         # print(self.cabinet_dof_pos[self.cabinet_dof_pos > 0.01])
-        self.obs_buf = torch.cat((baxter_relative_lfinger_pos, baxter_relative_rfinger_pos, to_target.unsqueeze(-1),
-                                  self.cabinet_dof_pos[:, 3].unsqueeze(-1)), dim=-1)
+        self.write_obs("lfinger_pos", baxter_relative_lfinger_pos)
+        self.write_obs("rfinger_pos", baxter_relative_rfinger_pos)
+        self.write_obs("to_target", to_target)
+        self.write_obs("drawer_pos", self.cabinet_dof_pos[:, 3])
 
         #visual input
         # camera_tensor = self.gym.get_camera_image_gpu_tensor(self.sim, self.envs[0], self.camera_handles[0], gymapi.IMAGE_COLOR)
@@ -496,6 +499,7 @@ class BaxterCabinet(BaseTask):
         # reset props
         if self.num_props > 0:
             prop_indices = self.global_indices[env_ids, 2:].flatten()
+            self.sim_tensors.require("actor_root_state")
             self.prop_states[env_ids] = self.default_prop_states[env_ids]
             self.gym.set_actor_root_state_tensor_indexed(self.sim,
                                                          gymtorch.unwrap_tensor(self.root_state_tensor),
@@ -529,18 +533,12 @@ class BaxterCabinet(BaseTask):
             if(self.demonstration_step > 100):
                 pos_err = - (self.demonstration_step - 100) / 2000 * (self.rigid_body_states[:, self.hand_handle][:, :3] - to_torch([1, 0.04, 1.436], dtype=torch.float, device=self.device).repeat((self.num_envs, 1)))
             # set demonstration================================================================================================
-            orn_err = to_torch([0, 0, 0], dtype=torch.float, device=self.device).repeat((self.num_envs, 1))
-
-            dpose = torch.cat([pos_err, orn_err], -1).unsqueeze(-1)
-
             # solve damped least squares
-            j_eef_T = torch.transpose(self.j_eef, 1, 2)
-            d = 0.1  # damping term
-            lmbda = torch.eye(6).to('cuda:0') * (d ** 2)
-            u = (j_eef_T @ torch.inverse(self.j_eef @ j_eef_T + lmbda) @ dpose).view(self.num_envs, 19, 1)
+            self.sim_tensors.require("jacobian")
+            u = self.ik.compute(pos_err)
 
             # update position targets
-            self.baxter_dof_targets[:, :self.num_baxter_dofs] = self.baxter_dof_targets[:, :self.num_baxter_dofs] + u.squeeze(-1)
+            self.baxter_dof_targets[:, :self.num_baxter_dofs] = self.baxter_dof_targets[:, :self.num_baxter_dofs] + u
 
             # for i in range(self.num_envs):
             #     if self.demonstration_step < 100:
@@ -553,19 +551,9 @@ class BaxterCabinet(BaseTask):
             #         self.baxter_dof_targets[i, 18] = 0.0
             #         self.gripper_flag = to_torch([-1], dtype=torch.float, device=self.device).repeat((self.num_envs, 1))
                     
-            for i in range(self.num_envs):
-                if self.baxter_grasp_pos[i, 0] - self.drawer_grasp_pos[i, 0] < 0.015:
-                    self.baxter_dof_targets[i, 17] = 0.0
-                    self.baxter_dof_targets[i, 18] = 0.0
-                    self.catch[i] += 0.25
-                
-                elif self.catch[i] >= 1:
-                    self.baxter_dof_targets[i, 17] = 0.0
-                    self.baxter_dof_targets[i, 18] = 0.0
-
-                else:
-                    self.baxter_dof_targets[i, 17] = 0.02
-                    self.baxter_dof_targets[i, 18] = -0.02   
+            at_handle = self.baxter_grasp_pos[:, 0] - self.drawer_grasp_pos[:, 0] < 0.015
+            self.gripper.set(self.baxter_dof_targets, ~(at_handle | (self.catch[:, 0] >= 1)))
+            self.catch[:, 0] += 0.25 * at_handle
 
             self.gym.set_dof_position_target_tensor(self.sim,
                                                     gymtorch.unwrap_tensor(self.baxter_dof_targets))
@@ -582,18 +570,12 @@ class BaxterCabinet(BaseTask):
             self.actions = actions.clone().to(self.device)
 
             pos_err = self.actions[:, :3] * self.dt * self.action_scale
-            orn_err = to_torch([0, 0, 0], dtype=torch.float, device=self.device).repeat((self.num_envs, 1))
-
-            dpose = torch.cat([pos_err, orn_err], -1).unsqueeze(-1)
-
             # solve damped least squares
-            j_eef_T = torch.transpose(self.j_eef, 1, 2)
-            d = 0.1  # damping term
-            lmbda = torch.eye(6).to('cuda:0') * (d ** 2)
-            u = (j_eef_T @ torch.inverse(self.j_eef @ j_eef_T + lmbda) @ dpose).view(self.num_envs, 19, 1)
+            self.sim_tensors.require("jacobian")
+            u = self.ik.compute(pos_err)
 
             # update position targets
-            self.baxter_dof_targets[:, self.baxter_begin_dof:self.num_baxter_dofs] = self.baxter_dof_targets[:, self.baxter_begin_dof:self.num_baxter_dofs] + u[:, self.baxter_begin_dof:self.num_baxter_dofs].squeeze(-1)
+            self.baxter_dof_targets[:, self.baxter_begin_dof:self.num_baxter_dofs] = self.baxter_dof_targets[:, self.baxter_begin_dof:self.num_baxter_dofs] + u[:, self.baxter_begin_dof:self.num_baxter_dofs]
             # for i in range(self.num_envs):
             #     if self.actions[i, 3] > 0.0:
             #         self.baxter_dof_targets[i, 17] = 0.02
@@ -605,19 +587,13 @@ class BaxterCabinet(BaseTask):
             #         self.baxter_dof_targets[i, 18] = 0.0
             #         self.gripper_flag = to_torch([-1], dtype=torch.float, device=self.device).repeat((self.num_envs, 1))
 
-            for i in range(self.num_envs):
-                if self.baxter_grasp_pos[i, 0] - self.drawer_grasp_pos[i, 0] < 0.015 and torch.abs(self.baxter_grasp_pos[i, 1] - self.drawer_grasp_pos[i, 1]) < 0.07 and self.baxter_lfinger_pos[i, 2] > self.drawer_grasp_pos[i, 2] and self.baxter_rfinger_pos[i, 2] < self.drawer_grasp_pos[i, 2]:
-                    # self.baxter_dof_targets[i, 17] = 0.0
-                    # self.baxter_dof_targets[i, 18] = 0.0
-                    self.catch[i] += 0.6
-
-                elif self.catch[i] > 1:
-                    self.baxter_dof_targets[i, 17] = 0.0
-                    self.baxter_dof_targets[i, 18] = 0.0
-
-                else:
-                    self.baxter_dof_targets[i, 17] = 0.02
-                    self.baxter_dof_targets[i, 18] = -0.02              
+            # grasping envs keep their finger targets, caught ones close and the rest open
+            grasping = (self.baxter_grasp_pos[:, 0] - self.drawer_grasp_pos[:, 0] < 0.015) & \
+                (torch.abs(self.baxter_grasp_pos[:, 1] - self.drawer_grasp_pos[:, 1]) < 0.07) & \
+                (self.baxter_lfinger_pos[:, 2] > self.drawer_grasp_pos[:, 2]) & \
+                (self.baxter_rfinger_pos[:, 2] < self.drawer_grasp_pos[:, 2])
+            self.gripper.set(self.baxter_dof_targets, self.catch[:, 0] <= 1, env_mask=~grasping)
+            self.catch[:, 0] += 0.6 * grasping
 
             self.gym.set_dof_position_target_tensor(self.sim,
                                                     gymtorch.unwrap_tensor(self.baxter_dof_targets))
@@ -637,7 +613,7 @@ class BaxterCabinet(BaseTask):
         # debug viz
         if self.viewer and self.debug_viz:
             self.gym.clear_lines(self.viewer)
-            self.gym.refresh_rigid_body_state_tensor(self.sim)
+            self.sim_tensors.require("rigid_body_state")
 
             for i in range(self.num_envs):
                 px = (self.baxter_grasp_pos[i] + quat_apply(self.baxter_grasp_rot[i], to_torch([1, 0, 0], device=self.device) * 0.2)).cpu().numpy()
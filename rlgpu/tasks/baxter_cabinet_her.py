@@ -399,6 +399,7 @@ class BaxterCabinet(BaseTask):
             self.num_envs, self.dist_reward_scale, self.rot_reward_scale, self.around_handle_reward_scale, self.open_reward_scale,
             self.finger_dist_reward_scale, self.action_penalty_scale, self.distX_offset, self.max_episode_length
         )
+        torch.ge(self.progress_buf, self.max_episode_length - 1, out=self.time_out_buf)
 
     def compute_observations(self):
 
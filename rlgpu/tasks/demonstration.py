@@ -1,3 +1,4 @@
+import hashlib
 import numpy as np
 import os
 
@@ -5,13 +6,48 @@ from isaacgym import gymtorch
 from isaacgym import gymapi
 import torch
 
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "rlgpu", "demonstrations")
+
+
+def load_track(recorder_path, cache_dir=DEFAULT_CACHE_DIR):
+    """Returns the track of a text recording as a float32 [steps, dims] array.
+
+    The text is parsed once, the result is cached as .npy under cache_dir keyed by the hash of the
+    file content and memory mapped from there afterwards. Without a writable cache_dir the text is
+    parsed on every call.
+    """
+    with open(recorder_path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    cache_path = None
+    if cache_dir:
+        name = os.path.splitext(os.path.basename(recorder_path))[0]
+        cache_path = os.path.join(cache_dir, "{}.{}.npy".format(name, digest[:16]))
+        if os.path.exists(cache_path):
+            return np.load(cache_path, mmap_mode='r')
+
+    track = np.loadtxt(recorder_path, dtype=np.float32, ndmin=2)
+    if cache_path is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = "{}.{}.tmp.npy".format(cache_path[:-4], os.getpid())
+            np.save(tmp_path, track)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+    return track
+
+
 class Demonstration():
-    def __init__(self, recorder_path) -> None:
-        self.dof_pos_recorder = np.loadtxt(recorder_path)
-        self.dof_pos=torch.from_numpy(self.dof_pos_recorder[:, :])
+    def __init__(self, recorder_path, device="cpu", cache_dir=DEFAULT_CACHE_DIR) -> None:
+        self.device = device
+        self.dof_pos = torch.tensor(np.asarray(load_track(recorder_path, cache_dir)), dtype=torch.float, device=device)
         # self.gripper_flag = torch.from_numpy(self.dof_pos_recorder[19:20, :])
         self.step_size = self.dof_pos.shape[0]
-        
+
+        # delta[i] = dof_pos[i + 1] - dof_pos[i], zero from the last step on
+        self.delta = torch.zeros_like(self.dof_pos)
+        self.delta[:-1] = self.dof_pos[1:] - self.dof_pos[:-1]
+
         # self.gripper_init()
 
     def gripper_init(self):
@@ -27,13 +63,18 @@ class Demonstration():
         self.dof_pos2 = self.dof_pos[19+1:, :]
         self.dof_pos = torch.cat((self.dof_pos1, self.dof_pos2),dim=0)
 
+    def get(self, steps):
+        """steps is a long tensor [num_envs] on the demonstration device, steps past the end return the last step."""
+        return self.dof_pos[torch.clamp(steps, 0, self.step_size - 1)]
+
+    def get_delta(self, steps):
+        """Change from each step to the next one, zero past the end."""
+        return self.delta[torch.clamp(steps, 0, self.step_size - 1)]
+
     def get_dof_pos(self, step):
-        if step < self.step_size:
-            return self.dof_pos[step, :]
-        else:
-            return self.dof_pos[self.step_size - 1, :]
+        return self.dof_pos[min(step, self.step_size - 1), :]
 
 if __name__ == '__main__':
-    demonstration = Demonstration('/home/lohse/isaac_ws/src/isaac-gym/scripts/Isaac-drlgrasp/assets/ur_assemble/track_data/assemble_0.1s/dataFile.txt')
+    demonstration = Demonstration(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../assets/ur_assemble/track_data/assemble_0.1s/dataFile.txt'))
     for i in range(demonstration.step_size):
         print(demonstration.get_dof_pos(i))
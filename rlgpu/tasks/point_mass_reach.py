@@ -0,0 +1,128 @@
+import torch
+
+
+class PointMassReach():
+    """Tensor-only stand-in task, a batch of point masses that have to reach a random goal.
+
+    Exposes the same buffers and step/reset surface as BaseTask (obs_buf, states_buf, rew_buf,
+    reset_buf, progress_buf, reverse_actions, goal_buf, extras) but needs neither isaacgym nor a GPU,
+    so the RL stack can be benchmarked and regression tested on CPU only machines.
+    """
+
+    def __init__(self, cfg, sim_params=None, physics_engine=None, device_type="cpu", device_id=0, headless=True):
+        self.cfg = cfg
+
+        self.max_episode_length = self.cfg["env"].get("episodeLength", 200)
+        self.action_scale = self.cfg["env"].get("actionScale", 1.0)
+        self.goal_range = self.cfg["env"].get("goalRange", 0.5)
+        self.goal_threshold = self.cfg["env"].get("goalThreshold", 0.02)
+        self.dist_reward_scale = self.cfg["env"].get("distRewardScale", 1.0)
+        self.action_penalty_scale = self.cfg["env"].get("actionPenaltyScale", 0.01)
+        self.control_freq_inv = self.cfg["env"].get("controlFrequencyInv", 1)
+        self.dt = 1/60.
+
+        self.device = "cpu"
+        if device_type == "cuda" or device_type == "GPU":
+            self.device = "cuda" + ":" + str(device_id)
+
+        # pos, vel and goal - pos
+        self.num_envs = self.cfg["env"]["numEnvs"]
+        self.num_obs = 9
+        self.num_states = self.cfg["env"].get("numStates", 0)
+        self.num_actions = 3
+        self.use_her = self.cfg["env"].get("useHer", False)
+
+        self.cfg["env"]["numObservations"] = self.num_obs
+        self.cfg["env"]["numActions"] = self.num_actions
+
+        self.obs_buf = torch.zeros((self.num_envs, self.num_obs), device=self.device, dtype=torch.float)
+        self.states_buf = torch.zeros((self.num_envs, self.num_states), device=self.device, dtype=torch.float)
+        self.rew_buf = torch.zeros(self.num_envs, device=self.device, dtype=torch.float)
+        self.reset_buf = torch.ones(self.num_envs, device=self.device, dtype=torch.long)
+        self.progress_buf = torch.zeros(self.num_envs, device=self.device, dtype=torch.long)
+        self.time_out_buf = torch.zeros(self.num_envs, device=self.device, dtype=torch.bool)
+        self.goal_buf = torch.zeros((self.num_envs, 3), device=self.device, dtype=torch.float)
+        self.reverse_actions = torch.zeros((self.num_envs, self.num_actions), device=self.device, dtype=torch.float)
+        self.extras = {"time_outs": self.time_out_buf}
+
+        self.pos = torch.zeros((self.num_envs, 3), device=self.device, dtype=torch.float)
+        self.vel = torch.zeros((self.num_envs, 3), device=self.device, dtype=torch.float)
+        self.actions = torch.zeros((self.num_envs, self.num_actions), device=self.device, dtype=torch.float)
+
+        self.reset(torch.arange(self.num_envs, device=self.device))
+
+    def reset(self, env_ids):
+        num_resets = len(env_ids)
+        self.pos[env_ids] = 0
+        self.vel[env_ids] = 0
+        self.goal_buf[env_ids] = (2 * torch.rand((num_resets, 3), device=self.device) - 1) * self.goal_range
+
+        self.progress_buf[env_ids] = 0
+        self.reset_buf[env_ids] = 0
+
+    def step(self, actions):
+        self.pre_physics_step(actions)
+
+        for i in range(self.control_freq_inv):
+            self.simulate()
+
+        self.post_physics_step()
+
+    def pre_physics_step(self, actions):
+        self.actions.copy_(actions)
+
+    def simulate(self):
+        # Semi-implicit Euler on a damped point mass driven by the actions as accelerations
+        self.vel.mul_(0.98).add_(self.actions, alpha=self.action_scale * self.dt * 10)
+        self.pos.add_(self.vel, alpha=self.dt)
+
+    def post_physics_step(self):
+        self.progress_buf += 1
+
+        env_ids = self.reset_buf.nonzero(as_tuple=False).squeeze(-1)
+        if len(env_ids) > 0:
+            self.reset(env_ids)
+
+        self.compute_observations()
+        self.compute_reward()
+
+        # PD controller towards the goal, used as demonstration actions
+        torch.clamp(10 * (self.goal_buf - self.pos) - 2 * self.vel, -1, 1, out=self.reverse_actions)
+
+    def compute_observations(self):
+        self.obs_buf[:, 0:3] = self.pos
+        self.obs_buf[:, 3:6] = self.vel
+        self.obs_buf[:, 6:9] = self.goal_buf - self.pos
+        if self.num_states > 0:
+            self.states_buf[:, :min(self.num_states, 9)] = self.obs_buf[:, :min(self.num_states, 9)]
+        return self.obs_buf
+
+    def compute_reward(self):
+        self.rew_buf[:], self.reset_buf[:] = compute_point_mass_reward(
+            self.reset_buf, self.progress_buf, self.actions, self.pos, self.goal_buf,
+            self.dist_reward_scale, self.action_penalty_scale, self.goal_threshold, self.max_episode_length
+        )
+        torch.ge(self.progress_buf, self.max_episode_length - 1, out=self.time_out_buf)
+
+#####################################################################
+###=========================jit functions=========================###
+#####################################################################
+
+
+@torch.jit.script
+def compute_point_mass_reward(
+    reset_buf, progress_buf, actions, pos, goal,
+    dist_reward_scale, action_penalty_scale, goal_threshold, max_episode_length
+):
+    # type: (Tensor, Tensor, Tensor, Tensor, Tensor, float, float, float, float) -> Tuple[Tensor, Tensor]
+
+    d = torch.norm(goal - pos, p=2, dim=-1)
+    action_penalty = torch.sum(actions ** 2, dim=-1)
+
+    rewards = -dist_reward_scale * d - action_penalty_scale * action_penalty
+    rewards = torch.where(d < goal_threshold, rewards + 1, rewards)
+
+    reset_buf = torch.where(d < goal_threshold, torch.ones_like(reset_buf), reset_buf)
+    reset_buf = torch.where(progress_buf >= max_episode_length - 1, torch.ones_like(reset_buf), reset_buf)
+
+    return rewards, reset_buf
@@ -78,14 +78,15 @@ class UR5Cabinet(BaseTask):
 
         super().__init__(cfg=self.cfg)
 
+        self.set_obs_layout([("dof_pos", self.num_ur5_dofs), ("dof_vel", self.num_ur5_dofs), ("to_target", 3),
+                             ("drawer_pos", 1), ("drawer_vel", 1)])
+
         # get gym GPU state tensors
         actor_root_state_tensor = self.gym.acquire_actor_root_state_tensor(self.sim)
         dof_state_tensor = self.gym.acquire_dof_state_tensor(self.sim)
         rigid_body_tensor = self.gym.acquire_rigid_body_state_tensor(self.sim)
 
-        self.gym.refresh_actor_root_state_tensor(self.sim)
-        self.gym.refresh_dof_state_tensor(self.sim)
-        self.gym.refresh_rigid_body_state_tensor(self.sim)
+        self.sim_tensors.require("actor_root_state", "dof_state", "rigid_body_state")
 
         # create some wrapper tensors for different slices
         self.ur5_default_dof_pos = to_torch([0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0], device=self.device)
@@ -365,12 +366,11 @@ class UR5Cabinet(BaseTask):
             self.num_envs, self.dist_reward_scale, self.rot_reward_scale, self.around_handle_reward_scale, self.open_reward_scale,
             self.finger_dist_reward_scale, self.action_penalty_scale, self.distX_offset, self.max_episode_length
         )
+        torch.ge(self.progress_buf, self.max_episode_length - 1, out=self.time_out_buf)
 
     def compute_observations(self):
 
-        self.gym.refresh_actor_root_state_tensor(self.sim)
-        self.gym.refresh_dof_state_tensor(self.sim)
-        self.gym.refresh_rigid_body_state_tensor(self.sim)
+        self.sim_tensors.require("dof_state", "rigid_body_state")
 
         hand_pos = self.rigid_body_states[:, self.hand_handle][:, 0:3]
         hand_rot = self.rigid_body_states[:, self.hand_handle][:, 3:7]
@@ -392,8 +392,11 @@ class UR5Cabinet(BaseTask):
 
         to_target = self.drawer_grasp_pos - self.ur5_grasp_pos
         # num: 12 + 12 + 3 + 1 + 1
-        self.obs_buf = torch.cat((dof_pos_scaled, self.ur5_dof_vel * self.dof_vel_scale, to_target,
-                                  self.cabinet_dof_pos[:, 3].unsqueeze(-1), self.cabinet_dof_vel[:, 3].unsqueeze(-1)), dim=-1)
+        self.write_obs("dof_pos", dof_pos_scaled)
+        self.write_obs("dof_vel", self.ur5_dof_vel * self.dof_vel_scale)
+        self.write_obs("to_target", to_target)
+        self.write_obs("drawer_pos", self.cabinet_dof_pos[:, 3])
+        self.write_obs("drawer_vel", self.cabinet_dof_vel[:, 3])
         #visual input
         # camera_tensor = self.gym.get_camera_image_gpu_tensor(self.sim, self.envs[0], self.camera_handles[0], gymapi.IMAGE_COLOR)
         # torch_camera_tensor = gymtorch.wrap_tensor(camera_tensor)
@@ -437,6 +440,7 @@ class UR5Cabinet(BaseTask):
         # reset props
         if self.num_props > 0:
             prop_indices = self.global_indices[env_ids, 2:].flatten()
+            self.sim_tensors.require("actor_root_state")
             self.prop_states[env_ids] = self.default_prop_states[env_ids]
             self.gym.set_actor_root_state_tensor_indexed(self.sim,
                                                          gymtorch.unwrap_tensor(self.root_state_tensor),
@@ -479,7 +483,7 @@ class UR5Cabinet(BaseTask):
         # debug viz
         if self.viewer and self.debug_viz:
             self.gym.clear_lines(self.viewer)
-            self.gym.refresh_rigid_body_state_tensor(self.sim)
+            self.sim_tensors.require("rigid_body_state")
 
             for i in range(self.num_envs):
                 px = (self.ur5_grasp_pos[i] + quat_apply(self.ur5_grasp_rot[i], to_torch([1, 0, 0], device=self.device) * 0.2)).cpu().numpy()
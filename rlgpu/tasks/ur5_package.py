@@ -14,6 +14,8 @@ from isaacgym import gymapi
 from isaacgym import gymutil
 from rlgpu.utils.torch_jit_utils import *
 from tasks.base.base_task import BaseTask
+from tasks.base.controllers import DifferentialIK
+from tasks.base.debug_draw import DebugAxes
 import torch
 
 import matplotlib
@@ -65,24 +67,34 @@ class UR5Package(BaseTask):
         self.cfg["device_id"] = device_id
         self.cfg["headless"] = headless
 
-        self.device = 'cuda:0'
         self.num_dof_end = 6
         self.use_her = False
 
-        self.demonstration = Demonstration('/home/lohse/isaac_ws/src/isaac-gym/scripts/Isaac-drlgrasp/assets/ur_assemble/track_data/assemble_0.1s/dataFile.txt')
+        # each env holds its pose for up to demonstrationMaxOffset steps before playing the whole track,
+        # with its targets shifted by up to demonstrationGoalNoise
+        self.demonstration_max_offset = self.cfg["env"].get("demonstrationMaxOffset", 0)
+        self.demonstration_goal_noise = self.cfg["env"].get("demonstrationGoalNoise", 0.0)
+
         
         # Camera Sensor
 
         super().__init__(cfg=self.cfg)
 
+        self.demonstration = Demonstration(self.cfg["env"].get("demonstrationFile", os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../assets/ur_assemble/track_data/assemble_0.1s/dataFile.txt')),
+                                           device=self.device)
+        if self.demonstration_max_offset > self.max_episode_length - self.demonstration.step_size:
+            raise ValueError("demonstrationMaxOffset {} does not leave room for the {} demonstration steps in episodeLength {}".format(
+                self.demonstration_max_offset, self.demonstration.step_size, self.max_episode_length))
+        self.debug_axes = DebugAxes(self.gym, self.viewer, self.envs, self.device,
+                                    env_stride=self.cfg["env"].get("debugVisEnvStride", 1))
+        self.set_obs_layout([("shaft_tail_pos", 3), ("to_target", 1)])
+
         # get gym GPU state tensors
         actor_root_state_tensor = self.gym.acquire_actor_root_state_tensor(self.sim)
         dof_state_tensor = self.gym.acquire_dof_state_tensor(self.sim)
         rigid_body_tensor = self.gym.acquire_rigid_body_state_tensor(self.sim)
 
-        self.gym.refresh_actor_root_state_tensor(self.sim)
-        self.gym.refresh_dof_state_tensor(self.sim)
-        self.gym.refresh_rigid_body_state_tensor(self.sim)
+        self.sim_tensors.require("actor_root_state", "dof_state", "rigid_body_state")
 
         # create some wrapper tensors for different slices
         self.ur3_default_dof_pos = to_torch([-1.57, -1.57, 1.57, -1.57, -1.57, 1.57, 0.0], device=self.device)
@@ -309,10 +321,15 @@ class UR5Package(BaseTask):
         self.shaft_poses = []
         self.lfinger_poses = []
         self.rfinger_poses = []
+
+        # the attractors hold the gripper link at its initial pose during RL rollouts, they are created
+        # disabled while the demonstrations drive the arm through IK, see enable_gripper_hold
         self.attractor_handles = []
+        self.gripper_hold_stiffness = float(ur3_dof_stiffness[-1])
+        self.gripper_hold_enabled = False
         attractor_properties = gymapi.AttractorProperties()
-        attractor_properties.stiffness = ur3_dof_stiffness[-1]
-        attractor_properties.damping = ur3_dof_stiffness[-1]
+        attractor_properties.stiffness = 0.0
+        attractor_properties.damping = 0.0
         attractor_properties.axes = gymapi.AXIS_ALL
 
         for i in range(self.num_envs):
@@ -326,18 +343,9 @@ class UR5Package(BaseTask):
 
             props = self.gym.get_actor_rigid_body_states(env_ptr, ur3_actor, gymapi.STATE_POS)
             body_dict = self.gym.get_actor_rigid_body_dict(env_ptr, ur3_actor)
-            hand_handle = self.gym.find_actor_rigid_body_handle(env_ptr,  ur3_actor, "gripper_link")
-
-            # Initialize the attractor
             attractor_properties.target = props['pose'][:][body_dict["gripper_link"]]
-            attractor_properties.rigid_handle = hand_handle
-
-            # Draw axes and sphere at attractor location
-            # gymutil.draw_lines(axes_geom, gym, viewer, env, attractor_properties.target)
-            # gymutil.draw_lines(sphere_geom, gym, viewer, env, attractor_properties.target)
-
-            attractor_handle = self.gym.create_rigid_body_attractor(env_ptr, attractor_properties)
-            self.attractor_handles.append(attractor_handle)
+            attractor_properties.rigid_handle = self.gym.find_actor_rigid_body_handle(env_ptr, ur3_actor, "gripper_link")
+            self.attractor_handles.append(self.gym.create_rigid_body_attractor(env_ptr, attractor_properties))
 
             base_pose = base_start_pose
             base_actor = self.gym.create_actor(env_ptr, base_asset, base_pose, "base", 0, 0, 0)
@@ -369,6 +377,7 @@ class UR5Package(BaseTask):
         self.jacobian = gymtorch.wrap_tensor(self._jacobian)
         self.gripper_index = self.gym.get_asset_rigid_body_dict(ur3_asset)["gripper_link"]
         self.j_eef = self.jacobian[:, self.gripper_index - 1, :]
+        self.ik = DifferentialIK(self.j_eef, damping=0.05)
 
         self.demonstration_round = 0
         self.init_data()
@@ -399,6 +408,17 @@ class UR5Package(BaseTask):
         self.gripper_forward_axis = to_torch([0, 0, 1], device=self.device).repeat((self.num_envs, 1))
         self.gripper_up_axis = to_torch([0, 1, 0], device=self.device).repeat((self.num_envs, 1))
 
+        # keypoints in the base / hand frame, transformed with transform_points
+        self.base_entry_local_points = to_torch([[0, 0, 0.09 * self.scale]], device=self.device)
+        self.shaft_tail_local_points = to_torch([[0.03, 0.26, 0.16]], device=self.device)
+
+        # demonstration targets of the gripper link, pos + rot (xyzw)
+        self.gripper_targets = torch.zeros((self.num_envs, 7), dtype=torch.float, device=self.device)
+        self.demonstration_steps = torch.zeros(self.num_envs, dtype=torch.long, device=self.device)
+        self.demonstration_started = torch.zeros(self.num_envs, dtype=torch.bool, device=self.device)
+        self.demonstration_goal_offset = torch.zeros((self.num_envs, 3), dtype=torch.float, device=self.device)
+        self.zero_euler = torch.zeros(self.num_envs, dtype=torch.float, device=self.device)
+
         self.ur3_grasp_pos = torch.zeros_like(self.ur3_local_grasp_pos)
         self.ur3_grasp_rot = torch.zeros_like(self.ur3_local_grasp_rot)
         self.ur3_grasp_rot[..., -1] = 1  # xyzw
@@ -418,13 +438,11 @@ class UR5Package(BaseTask):
             self.num_envs, self.dist_reward_scale, self.rot_reward_scale, self.around_handle_reward_scale, self.open_reward_scale,
             self.finger_dist_reward_scale, self.action_penalty_scale, self.scale, self.max_episode_length
         )
+        torch.ge(self.progress_buf, self.max_episode_length - 1, out=self.time_out_buf)
 
     def compute_observations(self):
 
-        self.gym.refresh_actor_root_state_tensor(self.sim)
-        self.gym.refresh_dof_state_tensor(self.sim)
-        self.gym.refresh_rigid_body_state_tensor(self.sim)
-        self.gym.refresh_jacobian_tensors(self.sim)
+        self.sim_tensors.require("dof_state", "rigid_body_state")
 
         hand_pos = self.rigid_body_states[:, self.hand_handle][:, 0:3]
         hand_rot = self.rigid_body_states[:, self.hand_handle][:, 3:7]
@@ -444,33 +462,23 @@ class UR5Package(BaseTask):
         # self.rigid_body_states[:, self.shaft_handle][:, :] = - (self.rigid_body_states[:, self.rfinger_inner_knuckle_handle] + self.rigid_body_states[:, self.lfinger_inner_knuckle_handle]) / 2.0 * 0.4 + (self.rigid_body_states[:, self.lfinger_handle] + self.rigid_body_states[:, self.lfinger_handle]) / 2.0 * 1.4
         self.base_entry = self.rigid_body_states[:, self.base_handle].clone()
 
-        for i in range(self.num_envs):
-            self.base_entry[:, 0:3][i] += quat_apply(self.rigid_body_states[:, self.base_handle][:, 3:7][i], to_torch([0, 0, 1], device=self.device) * 0.09 * self.scale)
-            #self.base_entry[:, 0:3][i] += quat_apply(self.rigid_body_states[:, self.base_handle][:, 3:7][i], to_torch([0, 1, 0], device=self.device) * 0.016)
+        self.base_entry[:, 0:3] = transform_points(self.base_entry[:, 0:3], self.base_entry[:, 3:7], self.base_entry_local_points)[:, 0]
 
         self.shaft_tail = self.rigid_body_states[:, self.hand_handle].clone()
-        for i in range(self.num_envs):
-            self.shaft_tail[:, 0:3][i] += quat_apply(self.rigid_body_states[:, self.hand_handle][:, 3:7][i], to_torch([1, 0, 0], device=self.device) * 0.03)
-            self.shaft_tail[:, 0:3][i] += quat_apply(self.rigid_body_states[:, self.hand_handle][:, 3:7][i], to_torch([0, 1, 0], device=self.device) * 0.26)
-            self.shaft_tail[:, 0:3][i] += quat_apply(self.rigid_body_states[:, self.hand_handle][:, 3:7][i], to_torch([0, 0, 1], device=self.device) * 0.16)
+        self.shaft_tail[:, 0:3] = transform_points(self.shaft_tail[:, 0:3], self.shaft_tail[:, 3:7], self.shaft_tail_local_points)[:, 0]
 
         to_target = torch.norm(self.shaft_tail[:, 0:3] - self.base_entry[:, 0:3], p=2, dim=-1)
 
         # compute euler angle
-        self.shaft_tail_euler_angle = torch.zeros(self.num_envs, 3)
-        for i in range(self.num_envs):
-            shaft_tail_quat = gymapi.Quat(self.shaft_tail[i, 3], self.shaft_tail[i, 4], self.shaft_tail[i, 5], self.shaft_tail[i, 6])
-            euler_angle = gymapi.Quat.to_euler_zyx(shaft_tail_quat)
-            self.shaft_tail_euler_angle[i, 0] = euler_angle[0]
-            self.shaft_tail_euler_angle[i, 1] = euler_angle[1]
-            self.shaft_tail_euler_angle[i, 2] = euler_angle[2]
+        self.shaft_tail_euler_angle = torch.stack(get_euler_zyx(self.shaft_tail[:, 3:7]), dim=-1)
 
         dof_pos_scaled = (2.0 * (self.ur3_dof_pos - self.ur3_dof_lower_limits)
                           / (self.ur3_dof_upper_limits - self.ur3_dof_lower_limits) - 1.0)
 
         # num: 12 + 12 + 3 + 1 + 1
         # hand_pos = hand_pos - to_torch([0.2075, -0.1989, 0.4304], dtype=torch.float, device=self.device)
-        self.obs_buf = torch.cat((self.shaft_tail[:, 0:3], to_target.unsqueeze(-1)), dim=-1)
+        self.write_obs("shaft_tail_pos", self.shaft_tail[:, 0:3])
+        self.write_obs("to_target", to_target)
         # self.obs_buf = self.shaft_tail[:, 0:3]
 
         return self.obs_buf
@@ -515,10 +523,23 @@ class UR5Package(BaseTask):
                                               gymtorch.unwrap_tensor(self.dof_state),
                                               gymtorch.unwrap_tensor(multi_env_ids_int32), len(multi_env_ids_int32))
 
+        # restart the demonstration of the reset envs after their own delay, counted up from -offset, with their own goal
+        self.demonstration_steps[env_ids] = -torch.randint(0, self.demonstration_max_offset + 1, (len(env_ids),), device=self.device)
+        self.demonstration_started[env_ids] = False
+        self.demonstration_goal_offset[env_ids] = (2 * torch.rand((len(env_ids), 3), device=self.device) - 1) * self.demonstration_goal_noise
+
         self.progress_buf[env_ids] = 0
         self.reset_buf[env_ids] = 0
-        self.demonstration_step = 0
-        self.demonstration_round += 1
+        self.demonstration_round += len(env_ids) / self.num_envs
+
+    def enable_gripper_hold(self):
+        """Turns on the gripper attractors once the demonstrations are over, one gym call per env."""
+        for env_ptr, attractor_handle in zip(self.envs, self.attractor_handles):
+            attractor_properties = self.gym.get_attractor_properties(env_ptr, attractor_handle)
+            attractor_properties.stiffness = self.gripper_hold_stiffness
+            attractor_properties.damping = self.gripper_hold_stiffness
+            self.gym.set_attractor_properties(env_ptr, attractor_handle, attractor_properties)
+        self.gripper_hold_enabled = True
 
     def pre_physics_step(self, actions):
         if self.demonstration_round < 20:
@@ -531,65 +552,56 @@ class UR5Package(BaseTask):
             #     pos_err = - (self.demonstration_step - 75) / 75 * (self.rigid_body_states[:, self.hand_handle][:, :3] - to_torch([0.26, 0.03, 0.2], dtype=torch.float, device=self.device).repeat((self.num_envs, 1)))
 
             # set demonstration by datafile
-            pos_orn_err = self.demonstration.get_dof_pos(self.demonstration_step + 1) - self.demonstration.get_dof_pos(self.demonstration_step)
+            pos_orn_err = self.demonstration.get_delta(self.demonstration_steps)
 
             # pos_err = pos_orn_err[:3].float().to(self.device).repeat((self.num_envs, 1)) * 1000
             # pos_cur = self.rigid_body_states[:, self.gripper_handle][:, :3] - to_torch([1.48, -1.4, 1.77], device=self.device).repeat((self.num_envs, 1))
             # pos_err = self.demonstration.get_dof_pos(0)[:3].repeat((self.num_envs, 1)).to(self.device) - pos_cur
-            orn_err = self.demonstration.get_dof_pos(self.demonstration_step + 1)
-            orn_des = quat_from_euler_xyz(orn_err[3],orn_err[4], orn_err[5])
+            orn_err = self.demonstration.get(self.demonstration_steps + 1)
+            orn_des = quat_from_euler_xyz(orn_err[:, 3], orn_err[:, 4], orn_err[:, 5])
             
-            for i in range(self.num_envs):
-                attractor_properties = self.gym.get_attractor_properties(self.envs[i], self.attractor_handles[i])
-                pose = attractor_properties.target
-                pose.p += gymapi.Vec3(pos_orn_err[0], pos_orn_err[1], pos_orn_err[2])
-                # pose.r = gymapi.Quat(orn_des[0], orn_des[1],orn_des[2], orn_des[3])
-                print(pose.r)
-                # pose.r += 
+            # gripper targets start at the current gripper pose plus the goal offset and follow the demonstration deltas,
+            # envs still waiting out their start delay hold the current pose
+            playing = (self.demonstration_steps >= 0).unsqueeze(-1)
+            start_targets = self.rigid_body_states[:, self.gripper_handle][:, 0:7].clone()
+            start_targets[:, 0:3] += self.demonstration_goal_offset * playing
+            self.gripper_targets[:] = torch.where(self.demonstration_started.unsqueeze(-1), self.gripper_targets, start_targets)
+            self.demonstration_started |= playing.squeeze(-1)
+            self.gripper_targets[:, 0:3] += pos_orn_err[:, 0:3] * playing
+            # self.gripper_targets[:, 3:7] = orn_des.to(device=self.device, dtype=torch.float)
+
+            pos_err = self.gripper_targets[:, 0:3] - self.rigid_body_states[:, self.gripper_handle][:, 0:3]
+            orn_cur = self.rigid_body_states[:, self.gripper_handle][:, 3:7]
+            orn_cur = orn_cur / torch.norm(orn_cur, dim=-1).unsqueeze(-1)
 
-                self.gym.set_attractor_target(self.envs[i], self.attractor_handles[i], pose)
-
-            # orn_err = to_torch([0, 0, 0], dtype=torch.float, device=self.device).repeat((self.num_envs, 1))
-            
-            # orn_cur = self.rigid_body_states[:, self.gripper_handle][:, 3:7]
-            # print(get_euler_xyz(orn_cur))
-            # orn_err = orientation_error(orn_des,orn_cur).float()
-
-            # dpose = torch.cat([pos_err, orn_err], -1).unsqueeze(-1)
-
-            # # solve damped least squares
-            # j_eef_T = torch.transpose(self.j_eef, 1, 2)
-            # d = 5  # damping term
-            # lmbda = torch.eye(6).to('cuda:0') * (d ** 2)
-            # u = (j_eef_T @ torch.inverse(self.j_eef @ j_eef_T + lmbda) @ dpose).view(self.num_envs, 7, 1)
-
-            # # update position targets
-            # self.ur3_dof_targets[:, :self.num_ur3_dofs] = self.ur3_dof_targets[:, :self.num_ur3_dofs] + u.squeeze(-1)
+            # solve damped least squares
+            self.sim_tensors.require("jacobian")
+            u = self.ik.compute(pos_err, orientation_error(self.gripper_targets[:, 3:7], orn_cur))
 
-            # self.gym.set_dof_position_target_tensor(self.sim,
-            #                                         gymtorch.unwrap_tensor(self.ur3_dof_targets))
+            # update position targets
+            self.ur3_dof_targets[:, :self.num_ur3_dofs] = self.ur3_dof_targets[:, :self.num_ur3_dofs] + u
+            self.gym.set_dof_position_target_tensor(self.sim, gymtorch.unwrap_tensor(self.ur3_dof_targets))
 
             # # reverse inference action
             self.reverse_actions = self.rigid_body_states[:, self.gripper_handle][:, :3] / self.dt / self.action_scale
             
             # self.reverse_actions[:, 2] += 0.5
-            self.demonstration_step += 1
-            print(self.demonstration_step)
-            if self.demonstration_step == self.demonstration.step_size - 1:
-                self.reset_buf = torch.ones_like(self.reset_buf)
+            self.demonstration_steps += 1
+            self.reset_buf = torch.where(self.demonstration_steps >= self.demonstration.step_size - 1,
+                                         torch.ones_like(self.reset_buf), self.reset_buf)
 
         else:
+            if not self.gripper_hold_enabled:
+                self.enable_gripper_hold()
+
             self.actions = actions.clone().to(self.device)
             # self.actions = to_torch([0, 0, -1], dtype=torch.float, device=self.device).repeat((self.num_envs, 1))
             
             # pos_cur = self.rigid_body_states[:, self.hand_handle][:, :3]
             orn_cur = self.rigid_body_states[:, self.hand_handle][:, 3:7]
 
-            # from action's euler angle to quat
-            orn_des_quat = torch.zeros_like(orn_cur)
-            for i in range(self.num_envs):
-                orn_tem = gymapi.Quat.from_euler_zyx(0, 0, 0)
-                orn_des_quat[i, :] = to_torch([orn_tem.w, orn_tem.x, orn_tem.y, orn_tem.z], dtype=torch.float, device=self.device)
+            # from action's euler angle to quat, stored w first
+            orn_des_quat = quat_from_euler_zyx(self.zero_euler, self.zero_euler, self.zero_euler)[:, [3, 0, 1, 2]]
 
             # pos_des = self.actions[:, :3] * self.dt * self.action_scale + self.rigid_body_states[:, self.hand_handle][:, :3]
 
@@ -605,18 +617,12 @@ class UR5Package(BaseTask):
             pos_err = self.actions[:, :3] * self.dt * self.action_scale
             # pos_err[:, 2] = (self.actions[:, 2] - 0.5) / 1.0 * self.dt * self.action_scale
 
-            orn_err = to_torch([0, 0, 0], dtype=torch.float, device=self.device).repeat((self.num_envs, 1))
-
-            dpose = torch.cat([pos_err, orn_err], -1).unsqueeze(-1)
-
             # solve damped least squares
-            j_eef_T = torch.transpose(self.j_eef, 1, 2)
-            d = 0.05  # damping term
-            lmbda = torch.eye(6).to('cuda:0') * (d ** 2)
-            u = (j_eef_T @ torch.inverse(self.j_eef @ j_eef_T + lmbda) @ dpose).view(self.num_envs, 7, 1)
+            self.sim_tensors.require("jacobian")
+            u = self.ik.compute(pos_err)
 
             # update position targets
-            self.ur3_dof_targets[:, :self.num_ur3_dofs] = self.ur3_dof_targets[:, :self.num_ur3_dofs] + u.squeeze(-1)
+            self.ur3_dof_targets[:, :self.num_ur3_dofs] = self.ur3_dof_targets[:, :self.num_ur3_dofs] + u
 
             # self.gym.set_dof_position_target_tensor(self.sim,
             #                                         gymtorch.unwrap_tensor(self.ur3_dof_targets))
@@ -628,8 +634,6 @@ class UR5Package(BaseTask):
         if len(env_ids) > 0:
             self.reset(env_ids)
 
-        self.gym.render_all_camera_sensors(self.sim)
-        self.gym.start_access_image_tensors(self.sim)
         self.compute_observations()
         self.compute_reward(self.actions)
 
@@ -638,42 +642,13 @@ class UR5Package(BaseTask):
             self.gym.clear_lines(self.viewer)
             #self.gym.refresh_rigid_body_state_tensor(self.sim)
 
-            for i in range(self.num_envs):
-                # px = (self.rigid_body_states[:, self.hand_handle][:, 0:3][i] + quat_apply(self.rigid_body_states[:, self.hand_handle][:, 3:7][i], to_torch([1, 0, 0], device=self.device) * 0.2)).cpu().numpy()
-                # py = (self.rigid_body_states[:, self.hand_handle][:, 0:3][i] + quat_apply(self.rigid_body_states[:, self.hand_handle][:, 3:7][i], to_torch([0, 1, 0], device=self.device) * 0.2)).cpu().numpy()
-                # pz = (self.rigid_body_states[:, self.hand_handle][:, 0:3][i] + quat_apply(self.rigid_body_states[:, self.hand_handle][:, 3:7][i], to_torch([0, 0, 1], device=self.device) * 0.2)).cpu().numpy()
-
-                # p0 = self.rigid_body_states[:, self.hand_handle][:, 0:3][i].cpu().numpy()
-                # self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], px[0], px[1], px[2]], [0.85, 0.1, 0.1])
-                # self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], py[0], py[1], py[2]], [0.1, 0.85, 0.1])
-                # self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], pz[0], pz[1], pz[2]], [0.1, 0.1, 0.85])
-
-                # px = (self.rigid_body_states[:, self.wrist_2_handle][:, 0:3][i] + quat_apply(self.rigid_body_states[:, self.wrist_2_handle][:, 3:7][i], to_torch([1, 0, 0], device=self.device) * 0.2)).cpu().numpy()
-                # py = (self.rigid_body_states[:, self.wrist_2_handle][:, 0:3][i] + quat_apply(self.rigid_body_states[:, self.wrist_2_handle][:, 3:7][i], to_torch([0, 1, 0], device=self.device) * 0.2)).cpu().numpy()
-                # pz = (self.rigid_body_states[:, self.wrist_2_handle][:, 0:3][i] + quat_apply(self.rigid_body_states[:, self.wrist_2_handle][:, 3:7][i], to_torch([0, 0, 1], device=self.device) * 0.2)).cpu().numpy()
-
-                # p0 = self.rigid_body_states[:, self.wrist_2_handle][:, 0:3][i].cpu().numpy()
-                # self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], px[0], px[1], px[2]], [0.85, 0.1, 0.1])
-                # self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], py[0], py[1], py[2]], [0.1, 0.85, 0.1])
-                # self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], pz[0], pz[1], pz[2]], [0.1, 0.1, 0.85])
-
-                px = (self.base_entry[:, 0:3][i] + quat_apply(self.base_entry[:, 3:7][i], to_torch([1, 0, 0], device=self.device) * 0.2)).cpu().numpy()
-                py = (self.base_entry[:, 0:3][i] + quat_apply(self.base_entry[:, 3:7][i], to_torch([0, 1, 0], device=self.device) * 0.2)).cpu().numpy()
-                pz = (self.base_entry[:, 0:3][i] + quat_apply(self.base_entry[:, 3:7][i], to_torch([0, 0, 1], device=self.device) * 0.2)).cpu().numpy()
-
-                p0 = self.base_entry[:, 0:3][i].cpu().numpy()
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], px[0], px[1], px[2]], [0.85, 0.1, 0.1])
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], py[0], py[1], py[2]], [0.1, 0.85, 0.1])
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], pz[0], pz[1], pz[2]], [0.1, 0.1, 0.85])
-
-                px = (self.shaft_tail[:, 0:3][i] + quat_apply(self.shaft_tail[:, 3:7][i], to_torch([1, 0, 0], device=self.device) * 0.2)).cpu().numpy()
-                py = (self.shaft_tail[:, 0:3][i] + quat_apply(self.shaft_tail[:, 3:7][i], to_torch([0, 1, 0], device=self.device) * 0.2)).cpu().numpy()
-                pz = (self.shaft_tail[:, 0:3][i] + quat_apply(self.shaft_tail[:, 3:7][i], to_torch([0, 0, 1], device=self.device) * 0.2)).cpu().numpy()
-
-                p0 = self.shaft_tail[:, 0:3][i].cpu().numpy()
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], px[0], px[1], px[2]], [0.85, 0.1, 0.1])
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], py[0], py[1], py[2]], [0.1, 0.85, 0.1])
-                self.gym.add_lines(self.viewer, self.envs[i], 1, [p0[0], p0[1], p0[2], pz[0], pz[1], pz[2]], [0.1, 0.1, 0.85])
+            self.debug_axes.draw([
+                # (self.rigid_body_states[:, self.hand_handle][:, 0:3], self.rigid_body_states[:, self.hand_handle][:, 3:7]),
+                # (self.rigid_body_states[:, self.wrist_2_handle][:, 0:3], self.rigid_body_states[:, self.wrist_2_handle][:, 3:7]),
+                (self.base_entry[:, 0:3], self.base_entry[:, 3:7]),
+                (self.shaft_tail[:, 0:3], self.shaft_tail[:, 3:7]),
+            ])
+
 #####################################################################
 ###=========================jit functions=========================###
 #####################################################################
@@ -13,6 +13,7 @@ from isaacgym import gymtorch
 from isaacgym import gymapi
 from rlgpu.utils.torch_jit_utils import *
 from rlgpu.tasks.base.base_task import BaseTask
+from rlgpu.tasks.base.controllers import DifferentialIK
 import torch
 
 import matplotlib
@@ -69,14 +70,14 @@ class UR5PickAndPlace(BaseTask):
 
         super().__init__(cfg=self.cfg)
 
+        self.set_obs_layout([("shaft_tail_pos", 3)])
+
         # get gym GPU state tensors
         actor_root_state_tensor = self.gym.acquire_actor_root_state_tensor(self.sim)
         dof_state_tensor = self.gym.acquire_dof_state_tensor(self.sim)
         rigid_body_tensor = self.gym.acquire_rigid_body_state_tensor(self.sim)
 
-        self.gym.refresh_actor_root_state_tensor(self.sim)
-        self.gym.refresh_dof_state_tensor(self.sim)
-        self.gym.refresh_rigid_body_state_tensor(self.sim)
+        self.sim_tensors.require("actor_root_state", "dof_state", "rigid_body_state")
 
         # create some wrapper tensors for different slices
         self.ur5_default_dof_pos = to_torch([-1.57, -1.57, 1.57, 0, 0.0, 0.0, 0, 0, 0, 0, 0, 0], device=self.device)
@@ -263,6 +264,7 @@ class UR5PickAndPlace(BaseTask):
         self.jacobian = gymtorch.wrap_tensor(self._jacobian)
         self.hand_index = self.gym.get_asset_rigid_body_dict(ur5_asset)["wrist_3_link"]
         self.j_eef = self.jacobian[:, self.hand_index - 1, :]
+        self.ik = DifferentialIK(self.j_eef, damping=0.05)
 
         self.init_data()
 
@@ -311,13 +313,11 @@ class UR5PickAndPlace(BaseTask):
             self.num_envs, self.dist_reward_scale, self.rot_reward_scale, self.around_handle_reward_scale, self.open_reward_scale,
             self.finger_dist_reward_scale, self.action_penalty_scale, self.scale, self.max_episode_length
         )
+        torch.ge(self.progress_buf, self.max_episode_length - 1, out=self.time_out_buf)
 
     def compute_observations(self):
 
-        self.gym.refresh_actor_root_state_tensor(self.sim)
-        self.gym.refresh_dof_state_tensor(self.sim)
-        self.gym.refresh_rigid_body_state_tensor(self.sim)
-        self.gym.refresh_jacobian_tensors(self.sim)
+        self.sim_tensors.require("dof_state", "rigid_body_state")
 
         hand_pos = self.rigid_body_states[:, self.hand_handle][:, 0:3]
         hand_rot = self.rigid_body_states[:, self.hand_handle][:, 3:7]
@@ -356,7 +356,7 @@ class UR5PickAndPlace(BaseTask):
         # num: 12 + 12 + 3 + 1 + 1
         # hand_pos = hand_pos - to_torch([0.2075, -0.1989, 0.4304], dtype=torch.float, device=self.device)
         # self.obs_buf = torch.cat((self.shaft_tail[:, 0:3], to_target.unsqueeze(-1)), dim=-1)
-        self.obs_buf = self.shaft_tail[:, 0:3]
+        self.write_obs("shaft_tail_pos", self.shaft_tail[:, 0:3])
 
         return self.obs_buf
 
@@ -430,18 +430,12 @@ class UR5PickAndPlace(BaseTask):
         pos_err = self.actions[:, :3] * self.dt * self.action_scale
         pos_err[:, 2] = (self.actions[:, 2] - 0.5) / 1.0 * self.dt * self.action_scale
 
-        orn_err = to_torch([0, 0, 0], dtype=torch.float, device=self.device).repeat((self.num_envs, 1))
-
-        dpose = torch.cat([pos_err, orn_err], -1).unsqueeze(-1)
-
         # solve damped least squares
-        j_eef_T = torch.transpose(self.j_eef, 1, 2)
-        d = 0.05  # damping term
-        lmbda = torch.eye(6).to('cuda:0') * (d ** 2)
-        u = (j_eef_T @ torch.inverse(self.j_eef @ j_eef_T + lmbda) @ dpose).view(self.num_envs, 12, 1)
+        self.sim_tensors.require("jacobian")
+        u = self.ik.compute(pos_err)
 
         # update position targets
-        self.ur5_dof_targets[:, :self.num_ur5_dofs] = self.ur5_dof_targets[:, :self.num_ur5_dofs] + u.squeeze(-1)
+        self.ur5_dof_targets[:, :self.num_ur5_dofs] = self.ur5_dof_targets[:, :self.num_ur5_dofs] + u
 
         self.gym.set_dof_position_target_tensor(self.sim,
                                                 gymtorch.unwrap_tensor(self.ur5_dof_targets))
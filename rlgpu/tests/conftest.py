@@ -0,0 +1,11 @@
+import os
+import sys
+
+# The tests import the task and utils modules of this checkout, which resolve rlgpu.utils.* against its parent
+RLGPU_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RLGPU_DIR)
+sys.path.append(os.path.dirname(RLGPU_DIR))
+
+from utils.isaacgym_stub import install
+
+install()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+# Smoke run of VecTaskSharded on the tensor-only PointMassReach task against the isaacgym stub.
+# Runs as a script, the spawned shard workers re-import it and install the stub before building their task.
+#
+#   python tests/sharded_smoke.py --num_shards 2 --num_envs 7
+
+import argparse
+import os
+import sys
+from types import SimpleNamespace
+
+RLGPU_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RLGPU_DIR)
+sys.path.append(os.path.dirname(RLGPU_DIR))
+
+from utils.isaacgym_stub import install
+
+install()
+
+import torch
+import yaml
+
+from isaacgym import gymapi
+from tasks.base.vec_task import VecTaskSharded
+
+
+def make_args(num_shards):
+    return SimpleNamespace(task="PointMassReach", task_type="Python", device="cpu", device_id=0, rl_device="cpu",
+                           headless=True, num_shards=num_shards, pipeline=False, physics_engine=gymapi.SIM_PHYSX,
+                           slices=0, use_gpu=False, subscenes=0, use_gpu_pipeline=False, num_threads=0)
+
+
+def make_env(num_shards, num_envs, use_her=False):
+    with open(os.path.join(RLGPU_DIR, "cfg/point_mass_reach.yaml"), 'r') as f:
+        cfg = yaml.load(f, Loader=yaml.SafeLoader)
+    cfg["env"]["numEnvs"] = num_envs
+    cfg["env"]["useHer"] = use_her
+    return VecTaskSharded(make_args(num_shards), cfg, {"seed": 0}, num_shards, "cpu")
+
+
+def run(num_shards, num_envs, num_steps):
+    env = make_env(num_shards, num_envs)
+    try:
+        assert (env.num_obs, env.num_actions) == (9, 3)
+        assert env.observation_space.shape == (9,) and env.action_space.shape == (3,)
+
+        obs = env.reset()
+        assert obs.shape == (num_envs, 9)
+        for _ in range(num_steps):
+            obs, rews, resets, extras = env.step(env.get_reverse_actions())
+        assert obs.shape == (num_envs, 9) and rews.shape == (num_envs,) and resets.shape == (num_envs,)
+        assert extras["time_outs"].shape == (num_envs,)
+        assert torch.isfinite(obs).all() and torch.isfinite(rews).all()
+        # the point masses follow the reverse actions, so they have left the origin
+        assert obs[:, 0:3].abs().sum() > 0
+    finally:
+        env.close()
+
+    try:
+        make_env(num_shards, num_envs, use_her=True)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("VecTaskSharded accepted a useHer task")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Smoke run of VecTaskSharded on PointMassReach")
+    parser.add_argument("--num_shards", type=int, default=2)
+    parser.add_argument("--num_envs", type=int, default=7)
+    parser.add_argument("--steps", type=int, default=20)
+    args = parser.parse_args()
+    run(args.num_shards, args.num_envs, args.steps)
+    print("sharded smoke run passed")
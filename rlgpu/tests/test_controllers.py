@@ -0,0 +1,56 @@
+import torch
+
+from tasks.base.controllers import DifferentialIK
+
+
+def reference_ik(j_eef, dpose, damping, q0=None):
+    # The per task formula the controller replaced, u = J^T (J J^T + d^2 I)^-1 dpose
+    j_eef_T = torch.transpose(j_eef, 1, 2)
+    lmbda = torch.eye(j_eef.shape[1]) * (damping ** 2)
+    jjt_inv = torch.inverse(j_eef @ j_eef_T + lmbda)
+    u = j_eef_T @ jjt_inv @ dpose.unsqueeze(-1)
+    if q0 is not None:
+        # (I - J^T (J J^T + d^2 I)^-1 J) q0
+        null_space = torch.eye(j_eef.shape[2]) - j_eef_T @ jjt_inv @ j_eef
+        u += null_space @ q0.unsqueeze(-1)
+    return u.squeeze(-1)
+
+
+def test_matches_damped_least_squares():
+    torch.manual_seed(0)
+    jacobian = torch.randn(64, 6, 7)
+    dpose = 0.1 * torch.randn(64, 6)
+
+    ik = DifferentialIK(jacobian, damping=0.05)
+    u = ik.compute(dpose[:, 0:3], dpose[:, 3:6])
+
+    assert u.shape == (64, 7)
+    assert torch.allclose(u, reference_ik(jacobian, dpose, 0.05), atol=1e-4)
+
+
+def test_missing_orn_err_is_zero():
+    torch.manual_seed(1)
+    jacobian = torch.randn(16, 6, 7)
+    pos_err = 0.1 * torch.randn(16, 3)
+
+    u = DifferentialIK(jacobian, damping=0.05).compute(pos_err)
+    dpose = torch.cat([pos_err, torch.zeros(16, 3)], dim=-1)
+
+    assert torch.allclose(u, reference_ik(jacobian, dpose, 0.05), atol=1e-4)
+
+
+def test_null_space_term():
+    torch.manual_seed(2)
+    jacobian = torch.randn(64, 6, 7)
+    dpose = 0.1 * torch.randn(64, 6)
+    lower = -torch.rand(9) - 1
+    upper = torch.rand(9) + 1
+    dof_pos = torch.rand(64, 9) * (upper - lower) + lower
+
+    ik = DifferentialIK(jacobian, damping=0.05, dof_lower_limits=lower, dof_upper_limits=upper, null_space_gain=0.5)
+    u = ik.compute(dpose[:, 0:3], dpose[:, 3:6], dof_pos)
+
+    q0 = 0.5 * ((lower + upper) / 2 - dof_pos)[:, :7]
+    assert torch.allclose(u, reference_ik(jacobian, dpose, 0.05, q0), atol=1e-4)
+    # without dof positions the null space term is skipped
+    assert torch.allclose(ik.compute(dpose[:, 0:3], dpose[:, 3:6]), reference_ik(jacobian, dpose, 0.05), atol=1e-4)
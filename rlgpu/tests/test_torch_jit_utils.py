@@ -0,0 +1,54 @@
+import math
+
+import torch
+
+from isaacgym import gymapi
+from utils.torch_jit_utils import get_euler_zyx, quat_from_euler_zyx
+
+
+def random_angles(n):
+    # pitch stays away from +-pi/2, where roll and yaw are not unique
+    x = (2 * torch.rand(n) - 1) * math.pi
+    y = (2 * torch.rand(n) - 1) * (math.pi / 2 - 0.05)
+    z = (2 * torch.rand(n) - 1) * math.pi
+    return x, y, z
+
+
+def same_rotation(q0, q1, atol=1e-5):
+    # q and -q are the same rotation
+    return torch.minimum((q0 - q1).abs().amax(-1), (q0 + q1).abs().amax(-1)) < atol
+
+
+def test_quat_from_euler_zyx_matches_gymapi():
+    torch.manual_seed(0)
+    x, y, z = random_angles(256)
+    q = quat_from_euler_zyx(x, y, z)
+
+    reference = [gymapi.Quat.from_euler_zyx(float(x[i]), float(y[i]), float(z[i])) for i in range(len(x))]
+    reference = torch.tensor([[r.x, r.y, r.z, r.w] for r in reference])
+    assert q.shape == (256, 4)
+    assert same_rotation(q, reference).all()
+
+
+def test_get_euler_zyx_matches_gymapi():
+    torch.manual_seed(1)
+    x, y, z = random_angles(256)
+    q = quat_from_euler_zyx(x, y, z)
+    euler = torch.stack(get_euler_zyx(q), dim=-1)
+
+    reference = torch.tensor([gymapi.Quat(*q[i].tolist()).to_euler_zyx() for i in range(len(q))])
+    assert torch.allclose(euler, reference, atol=1e-5)
+    assert torch.allclose(euler, torch.stack([x, y, z], dim=-1), atol=1e-4)
+
+
+def test_quat_euler_quat_round_trip():
+    torch.manual_seed(2)
+    q = torch.nn.functional.normalize(torch.randn(1024, 4), dim=-1)
+    # leave out the gimbal lock neighbourhood, float32 asin is not precise enough there
+    q = q[(2 * (q[:, 3] * q[:, 1] - q[:, 2] * q[:, 0])).abs() < 0.99]
+
+    x, y, z = get_euler_zyx(q)
+    for angle in (x, y, z):
+        assert ((angle >= -math.pi) & (angle <= math.pi)).all()
+    assert ((y >= -math.pi / 2) & (y <= math.pi / 2)).all()
+    assert same_rotation(quat_from_euler_zyx(x, y, z), q, atol=1e-4).all()
@@ -0,0 +1,11 @@
+import os
+import subprocess
+import sys
+
+
+def test_sharded_point_mass_reach():
+    # Spawned workers re-import __main__, so the smoke run goes through its own interpreter
+    smoke = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sharded_smoke.py")
+    result = subprocess.run([sys.executable, smoke, "--num_shards", "2", "--num_envs", "7"],
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout + result.stderr
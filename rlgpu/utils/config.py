@@ -76,6 +76,8 @@ def retrieve_cfg(args, use_rlg_config=False):
             return os.path.join(args.logdir, "ur5_package"), "cfg/train/rlpt/pytorch_ppo_ur5_package.yaml", "cfg/ur5_package.yaml"
         elif args.task == "UR5PickAndPlace":
             return os.path.join(args.logdir, "ur5_pick_and_place"), "cfg/train/rlpt/pytorch_ppo_ur5_pick_and_place.yaml", "cfg/ur5_pick_and_place.yaml"
+        elif args.task == "PointMassReach":
+            return os.path.join(args.logdir, "point_mass_reach"), "cfg/train/rlpt/pytorch_ppo_point_mass_reach.yaml", "cfg/point_mass_reach.yaml"
         else:
             warn_task_name()
 
@@ -248,7 +250,11 @@ def get_args(benchmark=False, use_rlg_config=False):
         {"name": "--randomize", "action": "store_true", "default": False,
             "help": "Apply physics domain randomization"},
         {"name": "--torch_deterministic", "action": "store_true", "default": False,
-            "help": "Apply additional PyTorch settings for more deterministic behaviour"}]
+            "help": "Apply additional PyTorch settings for more deterministic behaviour"},
+        {"name": "--pipeline", "action": "store_true", "default": False,
+            "help": "Split the envs into two sims that are stepped as a pipeline, only for Python tasks"},
+        {"name": "--num_shards", "type": int, "default": 1,
+            "help": "Number of worker processes the envs are split over, only for Python tasks"}]
 
     if benchmark:
         custom_parameters += [{"name": "--num_proc", "type": int, "default": 1, "help": "Number of child processes to launch"},
@@ -0,0 +1,39 @@
+# CPU stand-in for the subset of isaacgym used by the python tasks, so that task
+# construction, step and reset can be profiled without PhysX or a GPU.
+#
+#   from utils.isaacgym_stub import install
+#   install()  # before anything imports isaacgym
+#
+# The state tensors have the real shapes but are filled with synthetic values.
+
+import importlib
+import sys
+import types
+
+
+def install(force=False):
+    """Registers the stub as `isaacgym` unless the real package is importable."""
+    if not force:
+        try:
+            importlib.import_module("isaacgym")
+            return False
+        except ImportError:
+            pass
+
+    from . import gymapi, gymtorch, gymutil, rlgpu, torch_utils
+
+    package = types.ModuleType("isaacgym")
+    package.__path__ = []
+    package.gymapi = gymapi
+    package.gymtorch = gymtorch
+    package.gymutil = gymutil
+    package.rlgpu = rlgpu
+    package.torch_utils = torch_utils
+
+    sys.modules["isaacgym"] = package
+    sys.modules["isaacgym.gymapi"] = gymapi
+    sys.modules["isaacgym.gymtorch"] = gymtorch
+    sys.modules["isaacgym.gymutil"] = gymutil
+    sys.modules["isaacgym.rlgpu"] = rlgpu
+    sys.modules["isaacgym.torch_utils"] = torch_utils
+    return True
@@ -0,0 +1,894 @@
+import math
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import torch
+
+
+# enums, the values only need to be distinct
+SIM_PHYSX = 0
+SIM_FLEX = 1
+
+UP_AXIS_Y = 0
+UP_AXIS_Z = 1
+
+DOF_MODE_NONE = 0
+DOF_MODE_POS = 1
+DOF_MODE_VEL = 2
+DOF_MODE_EFFORT = 3
+
+DOF_INVALID = -1
+DOF_ROTATION = 0
+DOF_TRANSLATION = 1
+
+STATE_NONE = 0
+STATE_POS = 1
+STATE_VEL = 2
+STATE_ALL = 3
+
+MESH_VISUAL = 0
+MESH_COLLISION = 1
+MESH_VISUAL_AND_COLLISION = 2
+
+COMPUTE_PER_VERTEX = 0
+COMPUTE_PER_FACE = 1
+FROM_ASSET = 2
+
+IMAGE_COLOR = 0
+IMAGE_DEPTH = 1
+IMAGE_SEGMENTATION = 2
+
+AXIS_NONE = 0
+AXIS_X = 1
+AXIS_Y = 2
+AXIS_Z = 4
+AXIS_ALL = 63
+
+DOMAIN_SIM = 0
+DOMAIN_ENV = 1
+DOMAIN_ACTOR = 2
+
+KEY_ESCAPE = 0
+KEY_V = 1
+KEY_R = 2
+
+
+class Vec3():
+    dtype = np.dtype([('x', np.float32), ('y', np.float32), ('z', np.float32)])
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    def __add__(self, other):
+        return Vec3(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return Vec3(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __mul__(self, s):
+        return Vec3(self.x * s, self.y * s, self.z * s)
+
+    __rmul__ = __mul__
+
+    def dot(self, other):
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    def cross(self, other):
+        return Vec3(self.y * other.z - self.z * other.y,
+                    self.z * other.x - self.x * other.z,
+                    self.x * other.y - self.y * other.x)
+
+    def length(self):
+        return math.sqrt(self.dot(self))
+
+    def __repr__(self):
+        return "Vec3({}, {}, {})".format(self.x, self.y, self.z)
+
+
+class Quat():
+    dtype = np.dtype([('x', np.float32), ('y', np.float32), ('z', np.float32), ('w', np.float32)])
+
+    def __init__(self, x=0.0, y=0.0, z=0.0, w=1.0):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+        self.w = float(w)
+
+    @staticmethod
+    def from_euler_zyx(roll, pitch, yaw):
+        cy, sy = math.cos(yaw * 0.5), math.sin(yaw * 0.5)
+        cr, sr = math.cos(roll * 0.5), math.sin(roll * 0.5)
+        cp, sp = math.cos(pitch * 0.5), math.sin(pitch * 0.5)
+        return Quat(sr * cp * cy - cr * sp * sy,
+                    cr * sp * cy + sr * cp * sy,
+                    cr * cp * sy - sr * sp * cy,
+                    cr * cp * cy + sr * sp * sy)
+
+    @staticmethod
+    def from_axis_angle(axis, angle):
+        s = math.sin(angle * 0.5) / max(axis.length(), 1e-9)
+        return Quat(axis.x * s, axis.y * s, axis.z * s, math.cos(angle * 0.5))
+
+    def to_euler_zyx(self):
+        x, y, z, w = self.x, self.y, self.z, self.w
+        roll = math.atan2(2.0 * (w * x + y * z), 1.0 - 2.0 * (x * x + y * y))
+        pitch = math.asin(max(-1.0, min(1.0, 2.0 * (w * y - z * x))))
+        yaw = math.atan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z))
+        return roll, pitch, yaw
+
+    def __mul__(self, q):
+        return Quat(self.w * q.x + self.x * q.w + self.y * q.z - self.z * q.y,
+                    self.w * q.y - self.x * q.z + self.y * q.w + self.z * q.x,
+                    self.w * q.z + self.x * q.y - self.y * q.x + self.z * q.w,
+                    self.w * q.w - self.x * q.x - self.y * q.y - self.z * q.z)
+
+    def inverse(self):
+        return Quat(-self.x, -self.y, -self.z, self.w)
+
+    def normalize(self):
+        n = math.sqrt(self.x ** 2 + self.y ** 2 + self.z ** 2 + self.w ** 2)
+        return Quat(self.x / n, self.y / n, self.z / n, self.w / n)
+
+    def rotate(self, v):
+        u = Vec3(self.x, self.y, self.z)
+        t = u.cross(v) * 2.0
+        return v + t * self.w + u.cross(t)
+
+    def __repr__(self):
+        return "Quat({}, {}, {}, {})".format(self.x, self.y, self.z, self.w)
+
+
+class Transform():
+    dtype = np.dtype([('p', Vec3.dtype), ('r', Quat.dtype)])
+
+    def __init__(self, p=None, r=None):
+        self.p = Vec3() if p is None else Vec3(p.x, p.y, p.z)
+        self.r = Quat() if r is None else Quat(r.x, r.y, r.z, r.w)
+
+    @staticmethod
+    def from_buffer(record):
+        return Transform(Vec3(*record['p'].tolist()), Quat(*record['r'].tolist()))
+
+    def inverse(self):
+        r = self.r.inverse()
+        return Transform(r.rotate(self.p) * -1.0, r)
+
+    def __mul__(self, other):
+        return Transform(self.p + self.r.rotate(other.p), self.r * other.r)
+
+    def transform_point(self, v):
+        return self.p + self.r.rotate(v)
+
+    def transform_vector(self, v):
+        return self.r.rotate(v)
+
+    def __repr__(self):
+        return "Transform({}, {})".format(self.p, self.r)
+
+
+class DofState():
+    dtype = np.dtype([('pos', np.float32), ('vel', np.float32)])
+
+
+class Velocity():
+    dtype = np.dtype([('linear', Vec3.dtype), ('angular', Vec3.dtype)])
+
+
+class RigidBodyState():
+    dtype = np.dtype([('pose', Transform.dtype), ('vel', Velocity.dtype)])
+
+
+class DofProperties():
+    dtype = np.dtype([('hasLimits', np.bool_), ('lower', np.float32), ('upper', np.float32),
+                      ('driveMode', np.int32), ('velocity', np.float32), ('effort', np.float32),
+                      ('stiffness', np.float32), ('damping', np.float32), ('friction', np.float32),
+                      ('armature', np.float32)])
+
+
+class _Params():
+    """Plain attribute bag, the DR code deep copies and diffs these through dir()."""
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+class VhacdParams(_Params):
+    def __init__(self):
+        super().__init__(resolution=100000, max_convex_hulls=64, max_num_vertices_per_ch=64)
+
+
+class AssetOptions(_Params):
+    def __init__(self):
+        super().__init__(fix_base_link=False, collapse_fixed_joints=False, disable_gravity=False,
+                         flip_visual_attachments=False, thickness=0.02, density=1000.0, armature=0.0,
+                         default_dof_drive_mode=DOF_MODE_NONE, mesh_normal_mode=FROM_ASSET,
+                         use_mesh_materials=False, override_com=False, override_inertia=False,
+                         vhacd_enabled=False, vhacd_params=VhacdParams(), linear_damping=0.0,
+                         angular_damping=0.5, max_linear_velocity=1000.0, max_angular_velocity=64.0)
+
+
+class PlaneParams(_Params):
+    def __init__(self):
+        super().__init__(normal=Vec3(0.0, 1.0, 0.0), distance=0.0, static_friction=1.0,
+                         dynamic_friction=1.0, restitution=0.0)
+
+
+class CameraProperties(_Params):
+    def __init__(self):
+        super().__init__(width=1920, height=1080, horizontal_fov=90.0, near_plane=0.1, far_plane=1000.0,
+                         enable_tensors=False, supersampling_horizontal=1, supersampling_vertical=1,
+                         use_collision_geometry=False)
+
+
+class AttractorProperties(_Params):
+    def __init__(self):
+        super().__init__(stiffness=0.0, damping=0.0, axes=AXIS_NONE, rigid_handle=-1, offset=Transform())
+        self.target = Transform()
+
+    @property
+    def target(self):
+        return self._target
+
+    @target.setter
+    def target(self, value):
+        # accepts the numpy pose records returned by get_actor_rigid_body_states as well
+        self._target = Transform(value.p, value.r) if isinstance(value, Transform) else Transform.from_buffer(value)
+
+
+class RigidShapeProperties(_Params):
+    def __init__(self):
+        super().__init__(friction=1.0, rolling_friction=0.0, torsion_friction=0.0, restitution=0.0,
+                         compliance=0.0, thickness=0.0, contact_offset=0.02, rest_offset=0.0, filter=0)
+
+
+class RigidBodyProperties(_Params):
+    def __init__(self):
+        super().__init__(mass=1.0, invMass=1.0, com=Vec3(), inertia=None, invInertia=None, flags=0)
+
+
+class PhysXParams(_Params):
+    def __init__(self):
+        super().__init__(solver_type=1, num_position_iterations=4, num_velocity_iterations=1, num_threads=0,
+                         use_gpu=False, contact_offset=0.02, rest_offset=0.001, bounce_threshold_velocity=0.2,
+                         max_depenetration_velocity=100.0, default_buffer_size_multiplier=2.0,
+                         always_use_articulations=False, num_subscenes=0, contact_collection=0,
+                         max_gpu_contact_pairs=1024 * 1024, friction_offset_threshold=0.04,
+                         friction_correlation_distance=0.025)
+
+
+class FlexParams(_Params):
+    def __init__(self):
+        super().__init__(solver_type=5, num_outer_iterations=4, num_inner_iterations=15, warm_start=0.4,
+                         relaxation=1.0, shape_collision_margin=0.001)
+
+
+class SimParams(_Params):
+    def __init__(self):
+        super().__init__(dt=1.0 / 60.0, substeps=2, up_axis=UP_AXIS_Y, gravity=Vec3(0.0, -9.8, 0.0),
+                         use_gpu_pipeline=False, num_client_threads=0, physx=PhysXParams(), flex=FlexParams())
+
+
+class Tensor():
+    """Handle type returned by the acquire_* calls, see gymtorch.wrap_tensor."""
+
+    def __init__(self, data):
+        self.data = data
+
+
+def _data(tensor):
+    return tensor.data if isinstance(tensor, Tensor) else tensor
+
+
+class _Asset():
+
+    def __init__(self, name, bodies, body_parents, dofs, shape_counts, options):
+        self.name = name
+        self.bodies = bodies
+        self.body_parents = body_parents
+        self.dofs = dofs
+        self.shape_counts = shape_counts
+        self.options = options
+
+        self.body_dict = {name: i for i, name in enumerate(bodies)}
+        self.dof_props = np.zeros(len(dofs), DofProperties.dtype)
+        for i, (_, lower, upper, effort, velocity) in enumerate(dofs):
+            self.dof_props[i] = (lower < upper, lower, upper, options.default_dof_drive_mode,
+                                 velocity, effort, 0.0, 0.0, 0.0, options.armature)
+        self.shape_props = [RigidShapeProperties() for _ in range(sum(shape_counts))]
+
+    @staticmethod
+    def load_urdf(path, options):
+        root = ET.parse(path).getroot()
+
+        links = [link.get('name') for link in root.findall('link')]
+        shape_counts = {link.get('name'): max(len(link.findall('collision')), 1) for link in root.findall('link')}
+        children = {name: [] for name in links}
+        has_parent = set()
+        for joint in root.findall('joint'):
+            parent = joint.find('parent').get('link')
+            child = joint.find('child').get('link')
+            children[parent].append((child, joint))
+            has_parent.add(child)
+
+        bodies = []
+        body_parents = []
+        dofs = []
+        merged = {}
+
+        # depth first like the real asset importer, merged links keep the body they were folded into
+        def visit(link, parent_body):
+            bodies.append(link)
+            body_parents.append(parent_body)
+            body = len(bodies) - 1
+            stack = list(reversed(children[link]))
+            while stack:
+                child, joint = stack.pop()
+                joint_type = joint.get('type')
+                if joint_type == 'fixed' and options.collapse_fixed_joints:
+                    merged[child] = body
+                    shape_counts[link] += shape_counts[child]
+                    stack.extend(reversed(children[child]))
+                    continue
+                if joint_type in ('revolute', 'continuous', 'prismatic'):
+                    limit = joint.find('limit')
+                    lower = float(limit.get('lower', 0.0)) if limit is not None else 0.0
+                    upper = float(limit.get('upper', 0.0)) if limit is not None else 0.0
+                    effort = float(limit.get('effort', 0.0)) if limit is not None else 0.0
+                    velocity = float(limit.get('velocity', 0.0)) if limit is not None else 0.0
+                    dofs.append((joint.get('name'), lower, upper, effort, velocity))
+                visit(child, body)
+
+        for link in links:
+            if link not in has_parent:
+                visit(link, -1)
+
+        asset = _Asset(root.get('name'), bodies, body_parents, dofs, [shape_counts[b] for b in bodies], options)
+        for name, body in merged.items():
+            asset.body_dict.setdefault(name, body)
+        return asset
+
+
+class _Env():
+
+    def __init__(self, sim, index, lower, upper, num_per_row):
+        self.sim = sim
+        self.index = index
+        self.actors = []
+        self.num_bodies = 0
+        self.origin = Vec3((index % num_per_row) * (upper.x - lower.x), (index // num_per_row) * (upper.y - lower.y), 0.0)
+
+
+class _Actor():
+
+    def __init__(self, env, asset, pose, name, index, dof_start, body_start, env_body_start):
+        self.env = env
+        self.asset = asset
+        self.pose = Transform(pose.p, pose.r)
+        self.name = name
+        self.index = index
+        self.dof_start = dof_start
+        self.body_start = body_start
+        self.env_body_start = env_body_start
+        self.dof_props = asset.dof_props.copy()
+        self.shape_props = [RigidShapeProperties() for _ in asset.shape_props]
+        self.body_props = [RigidBodyProperties() for _ in asset.bodies]
+        self.scale = 1.0
+
+    def body_transform(self, body):
+        # synthetic link poses, every link sits 5cm further along the actor z axis
+        local = Transform(Vec3(0.0, 0.0, 0.05 * body))
+        return self.pose * local
+
+
+class _Sim():
+
+    def __init__(self, compute_device, graphics_device, physics_engine, sim_params):
+        self.params = sim_params
+        self.physics_engine = physics_engine
+        self.device = "cpu"
+        if sim_params.use_gpu_pipeline and compute_device >= 0 and torch.cuda.is_available():
+            self.device = "cuda:" + str(compute_device)
+        self.envs = []
+        self.actors = []
+        self.num_dofs = 0
+        self.num_bodies = 0
+        self.force_sensors = 0
+        self.attractors = []
+        self.cameras = []
+        self.frame_count = 0
+        self.prepared = False
+
+
+class Gym():
+    """CPU stand-in for the isaacgym Gym handle.
+
+    Tracks envs, actors and assets like the real API and backs the tensor API with
+    synthetic state tensors of the same shapes, so task code can be constructed,
+    stepped and profiled without PhysX or a GPU. The simulated values are not physical.
+    """
+
+    def create_sim(self, compute_device, graphics_device, physics_engine, sim_params):
+        return _Sim(compute_device, graphics_device, physics_engine, sim_params)
+
+    def prepare_sim(self, sim):
+        self._allocate_tensors(sim)
+        return True
+
+    def _allocate_tensors(self, sim):
+        # tensors may be acquired before prepare_sim, allocate once all actors exist
+        if sim.prepared:
+            return
+        num_actors = len(sim.actors)
+        num_envs = max(len(sim.envs), 1)
+        device = sim.device
+
+        sim.root_states = torch.zeros((num_actors, 13), device=device, dtype=torch.float)
+        sim.rigid_body_states = torch.zeros((sim.num_bodies, 13), device=device, dtype=torch.float)
+        for actor in sim.actors:
+            p, r = actor.pose.p, actor.pose.r
+            sim.root_states[actor.index, :7] = torch.tensor([p.x, p.y, p.z, r.x, r.y, r.z, r.w])
+            for body in range(len(actor.asset.bodies)):
+                t = actor.body_transform(body)
+                sim.rigid_body_states[actor.body_start + body, :7] = torch.tensor([t.p.x, t.p.y, t.p.z, t.r.x, t.r.y, t.r.z, t.r.w])
+
+        sim.dof_states = torch.zeros((sim.num_dofs, 2), device=device, dtype=torch.float)
+        sim.dof_position_targets = torch.zeros(sim.num_dofs, device=device, dtype=torch.float)
+        sim.dof_velocity_targets = torch.zeros(sim.num_dofs, device=device, dtype=torch.float)
+        sim.dof_actuation_forces = torch.zeros(sim.num_dofs, device=device, dtype=torch.float)
+        sim.dof_forces = torch.zeros(sim.num_dofs, device=device, dtype=torch.float)
+        sim.net_contact_forces = torch.zeros((sim.num_bodies, 3), device=device, dtype=torch.float)
+        sim.force_sensor_data = torch.zeros((sim.force_sensors, 6), device=device, dtype=torch.float)
+
+        dof_counts = torch.tensor([len(actor.asset.dofs) for actor in sim.actors], dtype=torch.long)
+        sim.dof_actor_ids = torch.repeat_interleave(torch.arange(num_actors), dof_counts).to(device)
+
+        # per actor name jacobians and mass matrices, shaped like the real ones
+        generator = torch.Generator().manual_seed(0)
+        sim.jacobians = {}
+        sim.mass_matrices = {}
+        for actor in sim.envs[0].actors if sim.envs else []:
+            num_bodies = len(actor.asset.bodies)
+            num_dofs = len(actor.asset.dofs)
+            if not actor.asset.options.fix_base_link:
+                num_dofs += 6
+            else:
+                num_bodies -= 1
+            if num_dofs == 0 or num_bodies <= 0:
+                continue
+            jacobian = 0.1 * torch.randn((num_bodies, 6, num_dofs), generator=generator)
+            sim.jacobians[actor.name] = jacobian.repeat(num_envs, 1, 1, 1).to(device)
+            sim.mass_matrices[actor.name] = torch.eye(num_dofs).repeat(num_envs, 1, 1).to(device)
+
+        sim.prepared = True
+
+    # assets
+
+    def load_asset(self, sim, root, filename, options=AssetOptions()):
+        return _Asset.load_urdf(os.path.join(root, filename), options)
+
+    def create_box(self, sim, width, height, depth, options=AssetOptions()):
+        return _Asset("box", ["box"], [-1], [], [1], options)
+
+    def create_sphere(self, sim, radius, options=AssetOptions()):
+        return _Asset("sphere", ["sphere"], [-1], [], [1], options)
+
+    def create_capsule(self, sim, radius, length, options=AssetOptions()):
+        return _Asset("capsule", ["capsule"], [-1], [], [1], options)
+
+    def get_asset_rigid_body_count(self, asset):
+        return len(asset.bodies)
+
+    def get_asset_rigid_shape_count(self, asset):
+        return len(asset.shape_props)
+
+    def get_asset_dof_count(self, asset):
+        return len(asset.dofs)
+
+    def get_asset_rigid_body_dict(self, asset):
+        return dict(asset.body_dict)
+
+    def get_asset_rigid_body_names(self, asset):
+        return list(asset.bodies)
+
+    def get_asset_dof_names(self, asset):
+        return [dof[0] for dof in asset.dofs]
+
+    def get_asset_dof_dict(self, asset):
+        return {dof[0]: i for i, dof in enumerate(asset.dofs)}
+
+    def get_asset_dof_properties(self, asset):
+        return asset.dof_props.copy()
+
+    def get_asset_rigid_shape_properties(self, asset):
+        return asset.shape_props
+
+    def set_asset_rigid_shape_properties(self, asset, props):
+        asset.shape_props = props
+        return True
+
+    # envs and actors
+
+    def add_ground(self, sim, params):
+        pass
+
+    def create_env(self, sim, lower, upper, num_per_row):
+        env = _Env(sim, len(sim.envs), lower, upper, num_per_row)
+        sim.envs.append(env)
+        return env
+
+    def get_env(self, sim, index):
+        return sim.envs[index]
+
+    def get_env_count(self, sim):
+        return len(sim.envs)
+
+    def create_actor(self, env, asset, pose, name=None, group=-1, filter=-1, segmentation_id=0):
+        sim = env.sim
+        actor = _Actor(env, asset, pose, name, len(sim.actors), sim.num_dofs, sim.num_bodies, env.num_bodies)
+        sim.actors.append(actor)
+        sim.num_dofs += len(asset.dofs)
+        sim.num_bodies += len(asset.bodies)
+        env.num_bodies += len(asset.bodies)
+        env.actors.append(actor)
+        return len(env.actors) - 1
+
+    def begin_aggregate(self, env, max_bodies, max_shapes, self_collisions):
+        return True
+
+    def end_aggregate(self, env):
+        return True
+
+    def get_actor_count(self, env):
+        return len(env.actors)
+
+    def get_actor_handle(self, env, index):
+        return index
+
+    def get_actor_name(self, env, handle):
+        return env.actors[handle].name
+
+    def find_actor_handle(self, env, name):
+        for handle, actor in enumerate(env.actors):
+            if actor.name == name:
+                return handle
+        return -1
+
+    def get_actor_index(self, env, handle, domain):
+        return env.actors[handle].index
+
+    def get_actor_dof_count(self, env, handle):
+        return len(env.actors[handle].asset.dofs)
+
+    def get_actor_rigid_body_count(self, env, handle):
+        return len(env.actors[handle].asset.bodies)
+
+    def get_actor_rigid_shape_count(self, env, handle):
+        return len(env.actors[handle].shape_props)
+
+    def get_actor_rigid_body_dict(self, env, handle):
+        return dict(env.actors[handle].asset.body_dict)
+
+    def get_actor_dof_dict(self, env, handle):
+        return self.get_asset_dof_dict(env.actors[handle].asset)
+
+    def find_actor_rigid_body_handle(self, env, handle, name):
+        actor = env.actors[handle]
+        if name not in actor.asset.body_dict:
+            return -1
+        return actor.env_body_start + actor.asset.body_dict[name]
+
+    def find_actor_rigid_body_index(self, env, handle, name, domain):
+        actor = env.actors[handle]
+        body = actor.asset.body_dict.get(name, -1)
+        if body < 0:
+            return -1
+        return actor.body_start + body if domain == DOMAIN_SIM else actor.env_body_start + body
+
+    def find_actor_dof_handle(self, env, handle, name):
+        return self.get_actor_dof_dict(env, handle).get(name, -1)
+
+    def get_rigid_transform(self, env, body_handle):
+        for actor in env.actors:
+            if actor.env_body_start <= body_handle < actor.env_body_start + len(actor.asset.bodies):
+                return actor.body_transform(body_handle - actor.env_body_start)
+        return Transform()
+
+    def get_actor_rigid_body_states(self, env, handle, flags):
+        actor = env.actors[handle]
+        states = np.zeros(len(actor.asset.bodies), RigidBodyState.dtype)
+        for body in range(len(actor.asset.bodies)):
+            t = actor.body_transform(body)
+            states['pose']['p'][body] = (t.p.x, t.p.y, t.p.z)
+            states['pose']['r'][body] = (t.r.x, t.r.y, t.r.z, t.r.w)
+        return states
+
+    def set_actor_dof_states(self, env, handle, dof_states, flags):
+        actor = env.actors[handle]
+        if env.sim.prepared:
+            num_dofs = len(actor.asset.dofs)
+            data = torch.tensor(np.stack([dof_states['pos'], dof_states['vel']], -1)[:num_dofs])
+            env.sim.dof_states[actor.dof_start:actor.dof_start + num_dofs] = data.to(env.sim.device)
+        return True
+
+    def get_actor_dof_properties(self, env, handle):
+        return env.actors[handle].dof_props
+
+    def set_actor_dof_properties(self, env, handle, props):
+        env.actors[handle].dof_props = props
+        return True
+
+    def get_actor_rigid_shape_properties(self, env, handle):
+        return env.actors[handle].shape_props
+
+    def set_actor_rigid_shape_properties(self, env, handle, props):
+        env.actors[handle].shape_props = props
+        return True
+
+    def get_actor_rigid_body_properties(self, env, handle):
+        return env.actors[handle].body_props
+
+    def set_actor_rigid_body_properties(self, env, handle, props, recompute_inertia=False):
+        env.actors[handle].body_props = props
+        return True
+
+    def set_actor_scale(self, env, handle, scale):
+        env.actors[handle].scale = scale
+        return True
+
+    def set_rigid_body_color(self, env, handle, body, mesh_type, color):
+        pass
+
+    def set_rigid_body_texture(self, env, handle, body, mesh_type, texture):
+        pass
+
+    def create_force_sensor(self, env, body_handle, pose, props=None):
+        env.sim.force_sensors += 1
+        return env.sim.force_sensors - 1
+
+    # attractors
+
+    def create_rigid_body_attractor(self, env, props):
+        attractor = AttractorProperties()
+        for key, value in vars(props).items():
+            setattr(attractor, key, value)
+        attractor.target = props.target
+        env.sim.attractors.append(attractor)
+        return len(env.sim.attractors) - 1
+
+    def get_attractor_properties(self, env, handle):
+        attractor = env.sim.attractors[handle]
+        props = AttractorProperties()
+        for key, value in vars(attractor).items():
+            setattr(props, key, value)
+        props.target = attractor.target
+        return props
+
+    def set_attractor_properties(self, env, handle, props):
+        attractor = env.sim.attractors[handle]
+        for key, value in vars(props).items():
+            setattr(attractor, key, value)
+        attractor.target = props.target
+
+    def set_attractor_target(self, env, handle, target):
+        env.sim.attractors[handle].target = target
+
+    # sim
+
+    def get_sim_params(self, sim):
+        return sim.params
+
+    def set_sim_params(self, sim, params):
+        sim.params = params
+
+    def get_frame_count(self, sim):
+        return sim.frame_count
+
+    def get_sim_time(self, sim):
+        return sim.frame_count * sim.params.dt
+
+    def get_sim_dof_count(self, sim):
+        return sim.num_dofs
+
+    def get_sim_actor_count(self, sim):
+        return len(sim.actors)
+
+    def get_sim_rigid_body_count(self, sim):
+        return sim.num_bodies
+
+    def simulate(self, sim):
+        # synthetic dynamics: dofs relax towards their position targets, bodies jitter slightly
+        dt = sim.params.dt
+        delta = 0.1 * (sim.dof_position_targets - sim.dof_states[:, 0]) + dt * sim.dof_velocity_targets
+        sim.dof_states[:, 0] += delta
+        sim.dof_states[:, 1] = delta / dt
+        sim.rigid_body_states[:, 0:3] += 1e-4 * torch.randn_like(sim.rigid_body_states[:, 0:3])
+        sim.rigid_body_states[:, 7:13] = 1e-2 * torch.randn_like(sim.rigid_body_states[:, 7:13])
+        sim.force_sensor_data.normal_()
+        sim.frame_count += 1
+
+    def fetch_results(self, sim, wait):
+        return True
+
+    def step_graphics(self, sim):
+        pass
+
+    # tensor api
+
+    def acquire_actor_root_state_tensor(self, sim):
+        self._allocate_tensors(sim)
+        return Tensor(sim.root_states)
+
+    def acquire_dof_state_tensor(self, sim):
+        self._allocate_tensors(sim)
+        return Tensor(sim.dof_states)
+
+    def acquire_rigid_body_state_tensor(self, sim):
+        self._allocate_tensors(sim)
+        return Tensor(sim.rigid_body_states)
+
+    def acquire_force_sensor_tensor(self, sim):
+        self._allocate_tensors(sim)
+        return Tensor(sim.force_sensor_data)
+
+    def acquire_net_contact_force_tensor(self, sim):
+        self._allocate_tensors(sim)
+        return Tensor(sim.net_contact_forces)
+
+    def acquire_dof_force_tensor(self, sim):
+        self._allocate_tensors(sim)
+        return Tensor(sim.dof_forces)
+
+    def acquire_jacobian_tensor(self, sim, name):
+        self._allocate_tensors(sim)
+        return Tensor(sim.jacobians[name])
+
+    def acquire_mass_matrix_tensor(self, sim, name):
+        self._allocate_tensors(sim)
+        return Tensor(sim.mass_matrices[name])
+
+    def refresh_actor_root_state_tensor(self, sim):
+        return True
+
+    def refresh_dof_state_tensor(self, sim):
+        return True
+
+    def refresh_rigid_body_state_tensor(self, sim):
+        return True
+
+    def refresh_force_sensor_tensor(self, sim):
+        return True
+
+    def refresh_net_contact_force_tensor(self, sim):
+        return True
+
+    def refresh_dof_force_tensor(self, sim):
+        return True
+
+    def refresh_jacobian_tensors(self, sim):
+        return True
+
+    def refresh_mass_matrix_tensors(self, sim):
+        return True
+
+    def _set_rows(self, dst, src, rows):
+        src = _data(src)
+        if src.data_ptr() == dst.data_ptr():
+            return True
+        src = src.view(dst.shape)
+        if rows is None:
+            dst.copy_(src)
+        else:
+            dst[rows] = src[rows]
+        return True
+
+    def _dof_rows(self, sim, actor_indices, n):
+        return torch.isin(sim.dof_actor_ids, _data(actor_indices)[:n].to(sim.dof_actor_ids.device).long())
+
+    def set_actor_root_state_tensor(self, sim, state):
+        return self._set_rows(sim.root_states, state, None)
+
+    def set_actor_root_state_tensor_indexed(self, sim, state, actor_indices, n):
+        return self._set_rows(sim.root_states, state, _data(actor_indices)[:n].long())
+
+    def set_dof_state_tensor(self, sim, state):
+        return self._set_rows(sim.dof_states, state, None)
+
+    def set_dof_state_tensor_indexed(self, sim, state, actor_indices, n):
+        return self._set_rows(sim.dof_states, state, self._dof_rows(sim, actor_indices, n))
+
+    def set_dof_position_target_tensor(self, sim, targets):
+        return self._set_rows(sim.dof_position_targets, targets, None)
+
+    def set_dof_position_target_tensor_indexed(self, sim, targets, actor_indices, n):
+        return self._set_rows(sim.dof_position_targets, targets, self._dof_rows(sim, actor_indices, n))
+
+    def set_dof_velocity_target_tensor(self, sim, targets):
+        return self._set_rows(sim.dof_velocity_targets, targets, None)
+
+    def set_dof_velocity_target_tensor_indexed(self, sim, targets, actor_indices, n):
+        return self._set_rows(sim.dof_velocity_targets, targets, self._dof_rows(sim, actor_indices, n))
+
+    def set_dof_actuation_force_tensor(self, sim, forces):
+        return self._set_rows(sim.dof_actuation_forces, forces, None)
+
+    def set_dof_actuation_force_tensor_indexed(self, sim, forces, actor_indices, n):
+        return self._set_rows(sim.dof_actuation_forces, forces, self._dof_rows(sim, actor_indices, n))
+
+    # cameras
+
+    def create_camera_sensor(self, env, props):
+        env.sim.cameras.append({"env": env, "props": props, "color": None, "depth": None})
+        return len(env.sim.cameras) - 1
+
+    def set_camera_transform(self, camera_handle, env, transform):
+        pass
+
+    def set_camera_location(self, camera_handle, env, position, target):
+        pass
+
+    def render_all_camera_sensors(self, sim):
+        pass
+
+    def start_access_image_tensors(self, sim):
+        pass
+
+    def end_access_image_tensors(self, sim):
+        pass
+
+    def get_camera_image_gpu_tensor(self, sim, env, camera_handle, image_type):
+        camera = sim.cameras[camera_handle]
+        props = camera["props"]
+        if image_type == IMAGE_COLOR:
+            if camera["color"] is None:
+                camera["color"] = torch.zeros((props.height, props.width, 4), device=sim.device, dtype=torch.uint8)
+            return Tensor(camera["color"])
+        if camera["depth"] is None:
+            camera["depth"] = torch.zeros((props.height, props.width), device=sim.device, dtype=torch.float)
+        return Tensor(camera["depth"])
+
+    def get_camera_image(self, sim, env, camera_handle, image_type):
+        image = self.get_camera_image_gpu_tensor(sim, env, camera_handle, image_type).data.cpu().numpy()
+        return image.reshape(image.shape[0], -1)
+
+    # viewer, only headless runs are supported
+
+    def create_viewer(self, sim, props):
+        return None
+
+    def subscribe_viewer_keyboard_event(self, viewer, key, action):
+        pass
+
+    def viewer_camera_look_at(self, viewer, env, pos, target):
+        pass
+
+    def query_viewer_has_closed(self, viewer):
+        return False
+
+    def query_viewer_action_events(self, viewer):
+        return []
+
+    def draw_viewer(self, viewer, sim, render_collision=False):
+        pass
+
+    def poll_viewer_events(self, viewer):
+        pass
+
+    def clear_lines(self, viewer):
+        pass
+
+    def add_lines(self, viewer, env, num_lines, vertices, colors):
+        pass
+
+    def destroy_viewer(self, viewer):
+        pass
+
+    def destroy_sim(self, sim):
+        pass
+
+
+def acquire_gym():
+    return Gym()
@@ -0,0 +1,10 @@
+from . import gymapi
+
+
+def wrap_tensor(gym_tensor, offsets=None, counts=None):
+    # the stub sim owns plain torch tensors, wrapping shares their storage like the real gymtorch
+    return gym_tensor.data if isinstance(gym_tensor, gymapi.Tensor) else gym_tensor
+
+
+def unwrap_tensor(torch_tensor):
+    return gymapi.Tensor(torch_tensor)
@@ -9,7 +9,8 @@ from tasks.ur5_package import UR5Package
 from tasks.ur5_cabinet import UR5Cabinet
 from tasks.baxter_cabinet import BaxterCabinet
 from tasks.ur5_pick_and_place import UR5PickAndPlace
-from tasks.base.vec_task import VecTaskCPU, VecTaskGPU, VecTaskPython
+from tasks.point_mass_reach import PointMassReach
+from tasks.base.vec_task import VecTaskCPU, VecTaskGPU, VecTaskPython, VecTaskPipelined, VecTaskSharded
 
 from utils.config import warn_task_name
 
@@ -17,6 +18,7 @@ from isaacgym import rlgpu
 from rlgpu.utils.config import warn_task_name
 
 import json
+from copy import deepcopy
 
 
 def parse_task(args, cfg, cfg_train, sim_params):
@@ -55,17 +57,37 @@ def parse_task(args, cfg, cfg_train, sim_params):
     elif args.task_type == "Python":
         print("Python")
 
-        try:
-            task = eval(args.task)(
-                cfg=cfg,
-                sim_params=sim_params,
-                physics_engine=args.physics_engine,
-                device_type=args.device,
-                device_id=device_id,
-                headless=args.headless)
-        except NameError as e:
-            print(e)
-            warn_task_name()
-        env = VecTaskPython(task, rl_device, cfg_train.get("clip_observations", 5.0), cfg_train.get("clip_actions", 1.0))
+        def create_task(cfg, headless):
+            try:
+                return eval(args.task)(
+                    cfg=cfg,
+                    sim_params=sim_params,
+                    physics_engine=args.physics_engine,
+                    device_type=args.device,
+                    device_id=device_id,
+                    headless=headless)
+            except NameError as e:
+                print(e)
+                warn_task_name()
+
+        if args.num_shards > 1:
+            # Every shard builds its own task inside a worker process
+            task = None
+            env = VecTaskSharded(args, cfg, cfg_train, args.num_shards, rl_device, cfg_train.get("clip_observations", 5.0), cfg_train.get("clip_actions", 1.0))
+        elif args.pipeline:
+            # Two sims with half of the envs each, only the first one gets a viewer. Both are stepped
+            # from worker threads, so their gym calls are serialized
+            num_envs = cfg_task["numEnvs"]
+            tasks = []
+            for i, half_num_envs in enumerate([num_envs - num_envs // 2, num_envs // 2]):
+                half_cfg = deepcopy(cfg)
+                half_cfg["env"]["numEnvs"] = half_num_envs
+                half_cfg["serialize_gym"] = True
+                tasks.append(create_task(half_cfg, args.headless or i > 0))
+            task = None
+            env = VecTaskPipelined(tasks, rl_device, cfg_train.get("clip_observations", 5.0), cfg_train.get("clip_actions", 1.0))
+        else:
+            task = create_task(cfg, args.headless)
+            env = VecTaskPython(task, rl_device, cfg_train.get("clip_observations", 5.0), cfg_train.get("clip_actions", 1.0))
 
     return task, env
@@ -25,6 +25,7 @@ def process_ppo(args, env, cfg_train, logdir):
               num_transitions_per_env=learn_cfg["nsteps"],
               num_learning_epochs=learn_cfg["noptepochs"],
               num_mini_batches=learn_cfg["nminibatches"],
+              num_micro_batches=learn_cfg.get("nmicrobatches", 1),
               clip_param=learn_cfg["cliprange"],
               gamma=learn_cfg["gamma"],
               lam=learn_cfg["lam"],
@@ -36,6 +37,7 @@ def process_ppo(args, env, cfg_train, logdir):
               use_clipped_value_loss=learn_cfg.get("use_clipped_value_loss", False),
               schedule=learn_cfg.get("schedule", "fixed"),
               desired_kl=learn_cfg.get("desired_kl", None),
+              target_kl=learn_cfg.get("target_kl", None),
               model_cfg=cfg_train["policy"],
               device=env.rl_device,
               sampler=learn_cfg.get("sampler", 'sequential'),
@@ -43,7 +45,9 @@ def process_ppo(args, env, cfg_train, logdir):
               is_testing=is_testing,
               print_log=learn_cfg["print_log"],
               apply_reset=False,
-              asymmetric=(env.num_states > 0)
+              asymmetric=(env.num_states > 0),
+              host_rollout=learn_cfg.get("host_rollout", False),
+              mixed_precision=learn_cfg.get("mixed_precision", None)
               )
 
     if is_testing:
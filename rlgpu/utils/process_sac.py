@@ -26,7 +26,9 @@ def process_sac(args, env, cfg_train, logdir):
               actor_critic_class=ActorCritic,
               num_learning_epochs=learn_cfg["noptepochs"],
               log_dir=logdir,
-              is_testing=is_testing
+              is_testing=is_testing,
+              demonstration_repeat=learn_cfg.get("demonstration_repeat", 200),
+              mixed_precision=learn_cfg.get("mixed_precision", None)
               )
 
     if is_testing:
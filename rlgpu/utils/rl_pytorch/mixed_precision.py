@@ -0,0 +1,47 @@
+import torch
+import torch.nn as nn
+
+
+def get_autocast_dtype(mixed_precision):
+    if mixed_precision in (None, False, "none", "fp32"):
+        return None
+    elif mixed_precision in ("bf16", "bfloat16"):
+        return torch.bfloat16
+    elif mixed_precision in ("fp16", "float16"):
+        return torch.float16
+    else:
+        raise ValueError("Unknown mixed precision mode: {}, can be bf16, fp16 or None".format(mixed_precision))
+
+
+class MixedPrecision:
+    """Autocast and loss scaling shared by the on- and off-policy learners.
+
+    Parameters stay in fp32 and act as master weights, only the forward passes run in
+    the reduced dtype. Loss scaling is only needed (and only enabled) for fp16.
+    """
+
+    def __init__(self, mixed_precision=None, device='cpu'):
+        self.dtype = get_autocast_dtype(mixed_precision)
+        self.device_type = torch.device(device).type
+        self.enabled = self.dtype is not None
+
+        if self.dtype == torch.float16 and self.device_type != 'cuda':
+            raise ValueError("fp16 autocast requires a CUDA device, use bf16 on CPU")
+
+        self.scaler = torch.amp.GradScaler("cuda", enabled=(self.dtype == torch.float16))
+
+    def autocast(self):
+        return torch.autocast(device_type=self.device_type, dtype=self.dtype, enabled=self.enabled)
+
+    def backward(self, loss, retain_graph=False):
+        self.scaler.scale(loss).backward(retain_graph=retain_graph)
+
+    def step(self, optimizer, parameters=None, max_grad_norm=None):
+        if max_grad_norm is not None:
+            # Clip the true gradients, not the scaled ones
+            self.scaler.unscale_(optimizer)
+            nn.utils.clip_grad_norm_(parameters, max_grad_norm)
+        self.scaler.step(optimizer)
+
+    def update(self):
+        self.scaler.update()
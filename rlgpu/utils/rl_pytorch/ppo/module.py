@@ -71,7 +71,8 @@ class ActorCritic(nn.Module):
         raise NotImplementedError
 
     def act(self, observations, states):
-        actions_mean = self.actor(observations)
+        # Heads are cast back to fp32 so the distribution math stays in full precision under autocast
+        actions_mean = self.actor(observations).float()
 
         covariance = torch.diag(self.log_std.exp() * self.log_std.exp())
         distribution = MultivariateNormal(actions_mean, scale_tril=covariance)
@@ -80,18 +81,18 @@ class ActorCritic(nn.Module):
         actions_log_prob = distribution.log_prob(actions)
 
         if self.asymmetric:
-            value = self.critic(states)
+            value = self.critic(states).float()
         else:
-            value = self.critic(observations)
+            value = self.critic(observations).float()
 
         return actions.detach(), actions_log_prob.detach(), value.detach(), actions_mean.detach(), self.log_std.repeat(actions_mean.shape[0], 1).detach()
 
     def act_inference(self, observations):
-        actions_mean = self.actor(observations)
+        actions_mean = self.actor(observations).float()
         return actions_mean
 
     def evaluate(self, observations, states, actions):
-        actions_mean = self.actor(observations)
+        actions_mean = self.actor(observations).float()
 
         covariance = torch.diag(self.log_std.exp() * self.log_std.exp())
         distribution = MultivariateNormal(actions_mean, scale_tril=covariance)
@@ -100,9 +101,9 @@ class ActorCritic(nn.Module):
         entropy = distribution.entropy()
 
         if self.asymmetric:
-            value = self.critic(states)
+            value = self.critic(states).float()
         else:
-            value = self.critic(observations)
+            value = self.critic(observations).float()
 
         return actions_log_prob, entropy, value, actions_mean, self.log_std.repeat(actions_mean.shape[0], 1)
 
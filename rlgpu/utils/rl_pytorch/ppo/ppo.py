@@ -13,7 +13,8 @@ import torch.nn as nn
 import torch.optim as optim
 from torch.utils.tensorboard import SummaryWriter
 
-from rl_pytorch.ppo import RolloutStorage
+from utils.rl_pytorch.ppo import RolloutStorage
+from utils.rl_pytorch.mixed_precision import MixedPrecision
 
 
 class PPO:
@@ -24,6 +25,7 @@ class PPO:
                  num_transitions_per_env,
                  num_learning_epochs,
                  num_mini_batches,
+                 num_micro_batches=1,
                  clip_param=0.2,
                  gamma=0.998,
                  lam=0.95,
@@ -35,6 +37,7 @@ class PPO:
                  use_clipped_value_loss=True,
                  schedule="fixed",
                  desired_kl=None,
+                 target_kl=None,
                  model_cfg=None,
                  device='cpu',
                  sampler='sequential',
@@ -42,7 +45,9 @@ class PPO:
                  is_testing=False,
                  print_log=True,
                  apply_reset=False,
-                 asymmetric=False
+                 asymmetric=False,
+                 host_rollout=False,
+                 mixed_precision=None
                  ):
 
         if not isinstance(vec_env.observation_space, Space):
@@ -59,6 +64,7 @@ class PPO:
         self.asymmetric = asymmetric
 
         self.desired_kl = desired_kl
+        self.target_kl = target_kl
         self.schedule = schedule
         self.step_size = learning_rate
 
@@ -68,13 +74,16 @@ class PPO:
                                                init_noise_std, model_cfg, asymmetric=asymmetric)
         self.actor_critic.to(self.device)
         self.storage = RolloutStorage(self.vec_env.num_envs, num_transitions_per_env, self.observation_space.shape,
-                                      self.state_space.shape, self.action_space.shape, self.device, sampler)
+                                      self.state_space.shape, self.action_space.shape, self.device, sampler,
+                                      pin_memory=host_rollout)
         self.optimizer = optim.Adam(self.actor_critic.parameters(), lr=learning_rate)
+        self.mixed_precision = MixedPrecision(mixed_precision, self.device)
 
         # PPO parameters
         self.clip_param = clip_param
         self.num_learning_epochs = num_learning_epochs
         self.num_mini_batches = num_mini_batches
+        self.num_micro_batches = num_micro_batches
         self.num_transitions_per_env = num_transitions_per_env
         self.value_loss_coef = value_loss_coef
         self.entropy_coef = entropy_coef
@@ -107,16 +116,18 @@ class PPO:
         torch.save(self.actor_critic.state_dict(), path)
 
     def run(self, num_learning_iterations, log_interval=1):
-        current_obs = self.vec_env.reset()
-        current_states = self.vec_env.get_state()
+        # The vec env returns views of its own output buffers, keep private copies of the current step
+        current_obs = self.vec_env.reset().clone()
+        current_states = self.vec_env.get_state().clone()
 
         if self.is_testing:
             while True:
                 with torch.no_grad():
                     if self.apply_reset:
-                        current_obs = self.vec_env.reset()
+                        current_obs.copy_(self.vec_env.reset())
                     # Compute the action
-                    actions = self.actor_critic.act_inference(current_obs)
+                    with self.mixed_precision.autocast():
+                        actions = self.actor_critic.act_inference(current_obs)
                     # Step the vec_environment
                     next_obs, rews, dones, infos = self.vec_env.step(actions)
                     current_obs.copy_(next_obs)
@@ -136,10 +147,11 @@ class PPO:
                 # Rollout
                 for _ in range(self.num_transitions_per_env):
                     if self.apply_reset:
-                        current_obs = self.vec_env.reset()
-                        current_states = self.vec_env.get_state()
+                        current_obs.copy_(self.vec_env.reset())
+                        current_states.copy_(self.vec_env.get_state())
                     # Compute the action
-                    actions, actions_log_prob, values, mu, sigma = self.actor_critic.act(current_obs, current_states)
+                    with self.mixed_precision.autocast():
+                        actions, actions_log_prob, values, mu, sigma = self.actor_critic.act(current_obs, current_states)
                     # Step the vec_environment
                     next_obs, rews, dones, infos = self.vec_env.step(actions)
                     next_states = self.vec_env.get_state()
@@ -166,7 +178,8 @@ class PPO:
                     rewbuffer.extend(reward_sum)
                     lenbuffer.extend(episode_length)
 
-                _, _, last_values, _, _ = self.actor_critic.act(current_obs, current_states)
+                with self.mixed_precision.autocast():
+                    _, _, last_values, _, _ = self.actor_critic.act(current_obs, current_states)
                 stop = time.time()
                 collection_time = stop - start
 
@@ -175,7 +188,7 @@ class PPO:
                 # Learning step
                 start = stop
                 self.storage.compute_returns(last_values, self.gamma, self.lam)
-                mean_value_loss, mean_surrogate_loss = self.update()
+                mean_value_loss, mean_surrogate_loss, mean_kl, num_updates = self.update()
                 self.storage.clear()
                 stop = time.time()
                 learn_time = stop - start
@@ -205,6 +218,9 @@ class PPO:
         self.writer.add_scalar('Loss/value_function', locs['mean_value_loss'], locs['it'])
         self.writer.add_scalar('Loss/surrogate', locs['mean_surrogate_loss'], locs['it'])
         self.writer.add_scalar('Policy/mean_noise_std', mean_std.item(), locs['it'])
+        if locs['mean_kl'] is not None:
+            self.writer.add_scalar('Policy/mean_kl', locs['mean_kl'], locs['it'])
+        self.writer.add_scalar('Policy/num_updates', locs['num_updates'], locs['it'])
         if len(locs['rewbuffer']) > 0:
             self.writer.add_scalar('Train/mean_reward', statistics.mean(locs['rewbuffer']), locs['it'])
             self.writer.add_scalar('Train/mean_episode_length', statistics.mean(locs['lenbuffer']), locs['it'])
@@ -216,6 +232,8 @@ class PPO:
 
         fps = int(self.num_transitions_per_env * self.vec_env.num_envs / (locs['collection_time'] + locs['learn_time']))
 
+        kl_string = f"{'Mean KL:':>{pad}} {locs['mean_kl']:.4f}\n" if locs['mean_kl'] is not None else ''
+
         str = f" \033[1m Learning iteration {locs['it']}/{locs['num_learning_iterations']} \033[0m "
 
         if len(locs['rewbuffer']) > 0:
@@ -226,6 +244,8 @@ class PPO:
                           f"""{'Value function loss:':>{pad}} {locs['mean_value_loss']:.4f}\n"""
                           f"""{'Surrogate loss:':>{pad}} {locs['mean_surrogate_loss']:.4f}\n"""
                           f"""{'Mean action noise std:':>{pad}} {mean_std.item():.2f}\n"""
+                          f"""{kl_string}"""
+                          f"""{'Minibatch updates:':>{pad}} {locs['num_updates']}/{self.num_learning_epochs * self.num_mini_batches}\n"""
                           f"""{'Mean reward:':>{pad}} {statistics.mean(locs['rewbuffer']):.2f}\n"""
                           f"""{'Mean episode length:':>{pad}} {statistics.mean(locs['lenbuffer']):.2f}\n"""
                           f"""{'Mean reward/step:':>{pad}} {locs['mean_reward']:.2f}\n"""
@@ -238,6 +258,8 @@ class PPO:
                           f"""{'Value function loss:':>{pad}} {locs['mean_value_loss']:.4f}\n"""
                           f"""{'Surrogate loss:':>{pad}} {locs['mean_surrogate_loss']:.4f}\n"""
                           f"""{'Mean action noise std:':>{pad}} {mean_std.item():.2f}\n"""
+                          f"""{kl_string}"""
+                          f"""{'Minibatch updates:':>{pad}} {locs['num_updates']}/{self.num_learning_epochs * self.num_mini_batches}\n"""
                           f"""{'Mean reward/step:':>{pad}} {locs['mean_reward']:.2f}\n"""
                           f"""{'Mean episode length/episode:':>{pad}} {locs['mean_trajectory_length']:.2f}\n""")
 
@@ -253,36 +275,74 @@ class PPO:
     def update(self):
         mean_value_loss = 0
         mean_surrogate_loss = 0
+        mean_kl = 0
+        num_updates = 0
 
         batch = self.storage.mini_batch_generator(self.num_mini_batches)
         for epoch in range(self.num_learning_epochs):
+            epoch_kl = 0
             # for obs_batch, actions_batch, target_values_batch, advantages_batch, returns_batch, old_actions_log_prob_batch \
             #        in self.storage.mini_batch_generator(self.num_mini_batches):
 
             for indices in batch:
-                obs_batch = self.storage.observations.view(-1, *self.storage.observations.size()[2:])[indices]
-                if self.asymmetric:
-                    states_batch = self.storage.states.view(-1, *self.storage.states.size()[2:])[indices]
-                else:
-                    states_batch = None
-                actions_batch = self.storage.actions.view(-1, self.storage.actions.size(-1))[indices]
-                target_values_batch = self.storage.values.view(-1, 1)[indices]
-                returns_batch = self.storage.returns.view(-1, 1)[indices]
-                old_actions_log_prob_batch = self.storage.actions_log_prob.view(-1, 1)[indices]
-                advantages_batch = self.storage.advantages.view(-1, 1)[indices]
-                old_mu_batch = self.storage.mu.view(-1, self.storage.actions.size(-1))[indices]
-                old_sigma_batch = self.storage.sigma.view(-1, self.storage.actions.size(-1))[indices]
-
-                actions_log_prob_batch, entropy_batch, value_batch, mu_batch, sigma_batch = self.actor_critic.evaluate(obs_batch,
-                                                                                                                       states_batch,
-                                                                                                                       actions_batch)
-
-                # KL
-                if self.desired_kl != None and self.schedule == 'adaptive':
+                self.optimizer.zero_grad()
+                minibatch_value_loss = 0
+                minibatch_surrogate_loss = 0
+                kl_mean = 0
+
+                # Evaluate the minibatch in micro-batches and accumulate their gradients, so that
+                # only one micro-batch of activations is resident on the device at a time
+                micro_batch_size = -(-len(indices) // self.num_micro_batches)
+                for start in range(0, len(indices), micro_batch_size):
+                    micro_indices = indices[start:start + micro_batch_size]
+                    micro_batch_weight = len(micro_indices) / len(indices)
+
+                    obs_batch, states_batch, actions_batch, target_values_batch, returns_batch, old_actions_log_prob_batch, \
+                        advantages_batch, old_mu_batch, old_sigma_batch = self.storage.get_mini_batch(micro_indices)
+                    if not self.asymmetric:
+                        states_batch = None
+
+                    with self.mixed_precision.autocast():
+                        actions_log_prob_batch, entropy_batch, value_batch, mu_batch, sigma_batch = self.actor_critic.evaluate(obs_batch,
+                                                                                                                               states_batch,
+                                                                                                                               actions_batch)
+
+                    # KL
+                    if self.target_kl != None or (self.desired_kl != None and self.schedule == 'adaptive'):
+                        with torch.no_grad():
+                            kl = torch.sum(
+                                sigma_batch - old_sigma_batch + (torch.square(old_sigma_batch.exp()) + torch.square(old_mu_batch - mu_batch)) / (2.0 * torch.square(sigma_batch.exp())) - 0.5, axis=-1)
+                            kl_mean += torch.mean(kl) * micro_batch_weight
+
+                    # Surrogate loss
+                    ratio = torch.exp(actions_log_prob_batch - torch.squeeze(old_actions_log_prob_batch))
+                    surrogate = -torch.squeeze(advantages_batch) * ratio
+                    surrogate_clipped = -torch.squeeze(advantages_batch) * torch.clamp(ratio, 1.0 - self.clip_param,
+                                                                                       1.0 + self.clip_param)
+                    surrogate_loss = torch.max(surrogate, surrogate_clipped).mean()
+
+                    # Value function loss
+                    if self.use_clipped_value_loss:
+                        value_clipped = target_values_batch + (value_batch - target_values_batch).clamp(-self.clip_param,
+                                                                                                        self.clip_param)
+                        value_losses = (value_batch - returns_batch).pow(2)
+                        value_losses_clipped = (value_clipped - returns_batch).pow(2)
+                        value_loss = torch.max(value_losses, value_losses_clipped).mean()
+                    else:
+                        value_loss = (returns_batch - value_batch).pow(2).mean()
+
+                    loss = surrogate_loss + self.value_loss_coef * value_loss - self.entropy_coef * entropy_batch.mean()
+
+                    # Weighted so the accumulated gradient equals the gradient of the full minibatch
+                    self.mixed_precision.backward(loss * micro_batch_weight)
+
+                    minibatch_value_loss += value_loss.detach() * micro_batch_weight
+                    minibatch_surrogate_loss += surrogate_loss.detach() * micro_batch_weight
+
+                if self.target_kl != None or (self.desired_kl != None and self.schedule == 'adaptive'):
+                    epoch_kl += kl_mean
 
-                    kl = torch.sum(
-                        sigma_batch - old_sigma_batch + (torch.square(old_sigma_batch.exp()) + torch.square(old_mu_batch - mu_batch)) / (2.0 * torch.square(sigma_batch.exp())) - 0.5, axis=-1)
-                    kl_mean = torch.mean(kl)
+                if self.desired_kl != None and self.schedule == 'adaptive':
 
                     if kl_mean > self.desired_kl * 2.0:
                         self.step_size = max(1e-5, self.step_size / 1.5)
@@ -292,36 +352,27 @@ class PPO:
                     for param_group in self.optimizer.param_groups:
                         param_group['lr'] = self.step_size
 
-                # Surrogate loss
-                ratio = torch.exp(actions_log_prob_batch - torch.squeeze(old_actions_log_prob_batch))
-                surrogate = -torch.squeeze(advantages_batch) * ratio
-                surrogate_clipped = -torch.squeeze(advantages_batch) * torch.clamp(ratio, 1.0 - self.clip_param,
-                                                                                   1.0 + self.clip_param)
-                surrogate_loss = torch.max(surrogate, surrogate_clipped).mean()
-
-                # Value function loss
-                if self.use_clipped_value_loss:
-                    value_clipped = target_values_batch + (value_batch - target_values_batch).clamp(-self.clip_param,
-                                                                                                    self.clip_param)
-                    value_losses = (value_batch - returns_batch).pow(2)
-                    value_losses_clipped = (value_clipped - returns_batch).pow(2)
-                    value_loss = torch.max(value_losses, value_losses_clipped).mean()
-                else:
-                    value_loss = (returns_batch - value_batch).pow(2).mean()
-
-                loss = surrogate_loss + self.value_loss_coef * value_loss - self.entropy_coef * entropy_batch.mean()
-
                 # Gradient step
-                self.optimizer.zero_grad()
-                loss.backward()
-                nn.utils.clip_grad_norm_(self.actor_critic.parameters(), self.max_grad_norm)
-                self.optimizer.step()
+                self.mixed_precision.step(self.optimizer, self.actor_critic.parameters(), self.max_grad_norm)
+                self.mixed_precision.update()
 
-                mean_value_loss += value_loss.item()
-                mean_surrogate_loss += surrogate_loss.item()
+                mean_value_loss += minibatch_value_loss.item()
+                mean_surrogate_loss += minibatch_surrogate_loss.item()
+                num_updates += 1
+
+            if self.target_kl != None or (self.desired_kl != None and self.schedule == 'adaptive'):
+                epoch_kl = float(epoch_kl) / len(batch)
+                mean_kl += epoch_kl
+                # Early stopping: later epochs only push the policy further away from the rollout policy
+                if self.target_kl != None and epoch_kl > self.target_kl:
+                    break
 
-        num_updates = self.num_learning_epochs * self.num_mini_batches
         mean_value_loss /= num_updates
         mean_surrogate_loss /= num_updates
+        # None when neither early stopping nor the adaptive schedule computes the KL
+        if self.target_kl != None or (self.desired_kl != None and self.schedule == 'adaptive'):
+            mean_kl /= epoch + 1
+        else:
+            mean_kl = None
 
-        return mean_value_loss, mean_surrogate_loss
+        return mean_value_loss, mean_surrogate_loss, mean_kl, num_updates
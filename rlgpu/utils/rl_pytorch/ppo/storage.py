@@ -4,25 +4,31 @@ from torch.utils.data.sampler import BatchSampler, SequentialSampler, SubsetRand
 
 class RolloutStorage:
 
-    def __init__(self, num_envs, num_transitions_per_env, obs_shape, states_shape, actions_shape, device='cpu', sampler='sequential'):
+    def __init__(self, num_envs, num_transitions_per_env, obs_shape, states_shape, actions_shape, device='cpu', sampler='sequential', pin_memory=False):
 
         self.device = device
         self.sampler = sampler
 
+        # With pin_memory the rollout lives in page-locked host memory and only the
+        # minibatches are streamed to the training device
+        self.pin_memory = pin_memory and torch.cuda.is_available()
+        self.storage_device = 'cpu' if pin_memory else self.device
+        buffer_kwargs = {'device': self.storage_device, 'pin_memory': self.pin_memory}
+
         # Core
-        self.observations = torch.zeros(num_transitions_per_env, num_envs, *obs_shape, device=self.device)
-        self.states = torch.zeros(num_transitions_per_env, num_envs, *states_shape, device=self.device)
-        self.rewards = torch.zeros(num_transitions_per_env, num_envs, 1, device=self.device)
-        self.actions = torch.zeros(num_transitions_per_env, num_envs, *actions_shape, device=self.device)
-        self.dones = torch.zeros(num_transitions_per_env, num_envs, 1, device=self.device).byte()
+        self.observations = torch.zeros(num_transitions_per_env, num_envs, *obs_shape, **buffer_kwargs)
+        self.states = torch.zeros(num_transitions_per_env, num_envs, *states_shape, **buffer_kwargs)
+        self.rewards = torch.zeros(num_transitions_per_env, num_envs, 1, **buffer_kwargs)
+        self.actions = torch.zeros(num_transitions_per_env, num_envs, *actions_shape, **buffer_kwargs)
+        self.dones = torch.zeros(num_transitions_per_env, num_envs, 1, dtype=torch.uint8, **buffer_kwargs)
 
         # For PPO
-        self.actions_log_prob = torch.zeros(num_transitions_per_env, num_envs, 1, device=self.device)
-        self.values = torch.zeros(num_transitions_per_env, num_envs, 1, device=self.device)
-        self.returns = torch.zeros(num_transitions_per_env, num_envs, 1, device=self.device)
-        self.advantages = torch.zeros(num_transitions_per_env, num_envs, 1, device=self.device)
-        self.mu = torch.zeros(num_transitions_per_env, num_envs, *actions_shape, device=self.device)
-        self.sigma = torch.zeros(num_transitions_per_env, num_envs, *actions_shape, device=self.device)
+        self.actions_log_prob = torch.zeros(num_transitions_per_env, num_envs, 1, **buffer_kwargs)
+        self.values = torch.zeros(num_transitions_per_env, num_envs, 1, **buffer_kwargs)
+        self.returns = torch.zeros(num_transitions_per_env, num_envs, 1, **buffer_kwargs)
+        self.advantages = torch.zeros(num_transitions_per_env, num_envs, 1, **buffer_kwargs)
+        self.mu = torch.zeros(num_transitions_per_env, num_envs, *actions_shape, **buffer_kwargs)
+        self.sigma = torch.zeros(num_transitions_per_env, num_envs, *actions_shape, **buffer_kwargs)
 
         self.num_transitions_per_env = num_transitions_per_env
         self.num_envs = num_envs
@@ -49,6 +55,7 @@ class RolloutStorage:
         self.step = 0
 
     def compute_returns(self, last_values, gamma, lam):
+        last_values = last_values.to(self.storage_device)
         advantage = 0
         for step in reversed(range(self.num_transitions_per_env)):
             if step == self.num_transitions_per_env - 1:
@@ -60,9 +67,9 @@ class RolloutStorage:
             advantage = delta + next_is_not_terminal * gamma * lam * advantage
             self.returns[step] = advantage + self.values[step]
 
-        # Compute and normalize the advantages
-        self.advantages = self.returns - self.values
-        self.advantages = (self.advantages - self.advantages.mean()) / (self.advantages.std() + 1e-8)
+        # Compute and normalize the advantages (in place, so pinned buffers stay pinned)
+        torch.sub(self.returns, self.values, out=self.advantages)
+        self.advantages.sub_(self.advantages.mean()).div_(self.advantages.std() + 1e-8)
 
     def get_statistics(self):
         done = self.dones.cpu()
@@ -85,3 +92,22 @@ class RolloutStorage:
 
         batch = BatchSampler(subset, mini_batch_size, drop_last=True)
         return batch
+
+    def get_mini_batch(self, indices):
+        if self.sampler == "sequential":
+            # Sequential minibatches are contiguous, so slice instead of gathering. On pinned
+            # storage the slice is still page-locked and the copy below is truly asynchronous
+            indices = slice(indices[0], indices[-1] + 1)
+
+        num_actions = self.actions.size(-1)
+        batch = [self.observations.view(-1, *self.observations.size()[2:])[indices],
+                 self.states.view(-1, *self.states.size()[2:])[indices] if self.states.numel() > 0 else None,
+                 self.actions.view(-1, num_actions)[indices],
+                 self.values.view(-1, 1)[indices],
+                 self.returns.view(-1, 1)[indices],
+                 self.actions_log_prob.view(-1, 1)[indices],
+                 self.advantages.view(-1, 1)[indices],
+                 self.mu.view(-1, num_actions)[indices],
+                 self.sigma.view(-1, num_actions)[indices]]
+
+        return [t.to(self.device, non_blocking=True) if t is not None else None for t in batch]
@@ -4,8 +4,8 @@ import torch
 import torch.nn as nn
 from torch.distributions import MultivariateNormal
 from torchvision.models import squeezenet
-from utils.rl_pytorch.ppo.resmlp import ResMLP
-from utils.rl_pytorch.ppo.mynetwork import MyNetWork
+from utils.rl_pytorch.ppo_conv.resmlp import ResMLP
+from utils.rl_pytorch.ppo_conv.mynetwork import MyNetWork
 
 from einops import rearrange
 from einops.layers.torch import Rearrange, Reduce
@@ -17,9 +17,11 @@ class ActorCritic(nn.Module):
 
         self.asymmetric = asymmetric
 
-        self.actor = MyNetWork(output=actions_shape[0])
+        # observations are a flattened 128 x 128 rgb image followed by the aux obs
+        num_aux_obs = obs_shape[0] - 128 * 128 * 3
+        self.actor = MyNetWork(output=actions_shape[0], num_aux_obs=num_aux_obs)
 
-        self.critic = MyNetWork(output=1)
+        self.critic = MyNetWork(output=1, num_aux_obs=num_aux_obs)
 
         # Action noise
         self.log_std = nn.Parameter(np.log(initial_std) * torch.ones(*actions_shape))
@@ -28,7 +30,8 @@ class ActorCritic(nn.Module):
         raise NotImplementedError
 
     def act(self, observations, states):
-        actions_mean = self.actor(observations)
+        # Heads are cast back to fp32 so the distribution math stays in full precision under autocast
+        actions_mean = self.actor(observations).float()
 
         covariance = torch.diag(self.log_std.exp() * self.log_std.exp())
         distribution = MultivariateNormal(actions_mean, scale_tril=covariance)
@@ -37,9 +40,9 @@ class ActorCritic(nn.Module):
         actions_log_prob = distribution.log_prob(actions)
 
         if self.asymmetric:
-            value = self.critic(states)
+            value = self.critic(states).float()
         else:
-            value = self.critic(observations)
+            value = self.critic(observations).float()
 
         self.log_actions_mean = actions_mean
         self.log_value = value
@@ -47,11 +50,11 @@ class ActorCritic(nn.Module):
         return actions.detach(), actions_log_prob.detach(), value.detach(), actions_mean.detach(), self.log_std.repeat(actions_mean.shape[0], 1).detach()
 
     def act_inference(self, observations):
-        actions_mean = self.actor(observations)
+        actions_mean = self.actor(observations).float()
         return actions_mean
 
     def evaluate(self, observations, states, actions):
-        actions_mean = self.actor(observations)
+        actions_mean = self.actor(observations).float()
 
         covariance = torch.diag(self.log_std.exp() * self.log_std.exp())
         distribution = MultivariateNormal(actions_mean, scale_tril=covariance)
@@ -60,9 +63,9 @@ class ActorCritic(nn.Module):
         entropy = distribution.entropy()
 
         if self.asymmetric:
-            value = self.critic(states)
+            value = self.critic(states).float()
         else:
-            value = self.critic(observations)
+            value = self.critic(observations).float()
 
         return actions_log_prob, entropy, value, actions_mean, self.log_std.repeat(actions_mean.shape[0], 1)
 
@@ -100,12 +100,13 @@ class FeatureTunk(nn.Module):
 
 
 class MyNetWork(nn.Module):
-    def __init__(self, output):
+    def __init__(self, output, num_aux_obs=12):
         super(MyNetWork, self).__init__()
 
+        self.num_aux_obs = num_aux_obs
         self.feature_tunk = FeatureTunk()
 
-        self.linear1 = nn.Linear(12, 256)
+        self.linear1 = nn.Linear(num_aux_obs, 256)
         self.linear2 = nn.Linear(256, 128)
         self.linear3 = nn.Linear(128, 64)
         self.selu = nn.SELU()
@@ -117,11 +118,11 @@ class MyNetWork(nn.Module):
                 nn.init.kaiming_normal_(m.weight, mode='fan_out', nonlinearity='selu')
 
     def forward(self, x):
-        rgb_img = x[:, :-12]
-        aux_obs = x[:, -12:]
+        rgb_img = x[:, :-self.num_aux_obs]
+        aux_obs = x[:, -self.num_aux_obs:]
 
         # 1 * 8 * 8 feat
-        rgb_img = rearrange(rgb_img, 'b (h w c) -> b c h w', h = 128, w = 128, c = 3)
+        rgb_img = rearrange(rgb_img, 'b (c h w) -> b c h w', h = 128, w = 128, c = 3)
 
         feat_out = self.feature_tunk(rgb_img)
         aux_obs_out = self.linear1(aux_obs)
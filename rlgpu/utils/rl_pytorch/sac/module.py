@@ -1,10 +1,8 @@
-from isaacgym.gymutil import AxesGeometry
 import numpy as np
 
 import torch
 import torch.nn as nn
 from torch.distributions import MultivariateNormal
-from torchvision.models import squeezenet
 from utils.rl_pytorch.sac.mynetwork import ValueNet, PolicyNet, SoftQNet, TwinNet
 
 from einops import rearrange
@@ -19,15 +17,15 @@ class ActorCritic(nn.Module):
         self.asymmetric = asymmetric
 
         # initialize networks
-        self.value_net = ValueNet(obs_shape[0]).cuda()
-        self.target_value_net = ValueNet(obs_shape[0]).cuda()
-        self.q1_net = SoftQNet(obs_shape[0], actions_shape[0]).cuda()
-        self.q2_net = SoftQNet(obs_shape[0], actions_shape[0]).cuda()
-        self.policy_net = PolicyNet(obs_shape[0], actions_shape[0]).cuda()
-        self.target_q1_net = SoftQNet(obs_shape[0], actions_shape[0]).cuda()
-        self.target_q2_net = SoftQNet(obs_shape[0], actions_shape[0]).cuda()
+        self.value_net = ValueNet(obs_shape[0])
+        self.target_value_net = ValueNet(obs_shape[0])
+        self.q1_net = SoftQNet(obs_shape[0], actions_shape[0])
+        self.q2_net = SoftQNet(obs_shape[0], actions_shape[0])
+        self.policy_net = PolicyNet(obs_shape[0], actions_shape[0])
+        self.target_q1_net = SoftQNet(obs_shape[0], actions_shape[0])
+        self.target_q2_net = SoftQNet(obs_shape[0], actions_shape[0])
 
-        self.twin_net = TwinNet(3, 3).cuda()
+        self.twin_net = TwinNet(3, 3)
 
         # Action noise
         self.log_std = nn.Parameter(np.log(initial_std) * torch.ones(*actions_shape))
@@ -37,6 +35,8 @@ class ActorCritic(nn.Module):
 
     def act(self, states):
         mean, log_std = self.policy_net(states)
+        # Keep the sampling and log-std math in fp32 under autocast
+        mean, log_std = mean.float(), log_std.float()
         std = log_std.exp()
         normal = Normal(mean, std)
 
@@ -48,13 +48,14 @@ class ActorCritic(nn.Module):
     def act_inference(self, states):
         mean, log_std = self.policy_net(states)
 
-        actions = torch.tanh(mean)
+        actions = torch.tanh(mean.float())
 
         return actions.detach()
 
     def evaluate(self, states, epsilon=1e-6):
 
         mean, log_std = self.policy_net(states)
+        mean, log_std = mean.float(), log_std.float()
         std = log_std.exp()
         normal = Normal(mean, std)
         noise = torch.randn_like(mean, requires_grad=True)
@@ -2,7 +2,6 @@ from math import log
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-import torchvision
 import numpy as np
 from einops.layers.torch import Rearrange, Reduce
 from einops import rearrange
@@ -16,6 +16,7 @@ import torch.nn.functional as F
 from torch.utils.tensorboard import SummaryWriter
 
 from utils.rl_pytorch.sac import ReplayBeffer
+from utils.rl_pytorch.mixed_precision import MixedPrecision
 
 
 class SAC:
@@ -25,6 +26,7 @@ class SAC:
                  actor_critic_class,
                  num_learning_epochs,
                  demonstration_buffer_len = 60000,
+                 demonstration_repeat = 200,
                  replay_buffer_len = 1000000,
                  gamma=0.99,
                  init_noise_std=1.0,
@@ -41,7 +43,8 @@ class SAC:
                  is_testing=False,
                  print_log=True,
                  apply_reset=False,
-                 asymmetric=False
+                 asymmetric=False,
+                 mixed_precision=None
                  ):
 
         if not isinstance(vec_env.observation_space, Space):
@@ -64,6 +67,7 @@ class SAC:
         self.current_learning_iteration = 0
         self.num_learning_epochs = num_learning_epochs
         self.demonstration_buffer_len = demonstration_buffer_len
+        self.demonstration_repeat = demonstration_repeat
         self.replay_buffer_len = replay_buffer_len
 
         # Log
@@ -103,6 +107,9 @@ class SAC:
         #                         requires_grad=True, device=self.device)  # trainable parameter
         self.alpha_optimizer = torch.optim.Adam((self.alpha_log,), lr=learning_rate)
 
+        # alpha_log and the policy log-std head stay in fp32, only the network forward passes are autocast
+        self.mixed_precision = MixedPrecision(mixed_precision, self.device)
+
         self.abstract_states = torch.tensor(([0, 0],), dtype=torch.float32,
                                 requires_grad=True, device=self.device)
 
@@ -132,16 +139,18 @@ class SAC:
         torch.save(self.actor_critic.state_dict(), path)
 
     def run(self, num_learning_iterations, log_interval=1):
-        current_obs = self.vec_env.reset()
-        current_states = self.vec_env.get_state()
+        # The vec env returns views of its own output buffers, keep private copies of the current step
+        current_obs = self.vec_env.reset().clone()
+        current_states = self.vec_env.get_state().clone()
 
         if self.is_testing:
             while True:
                 with torch.no_grad():
                     if self.apply_reset:
-                        current_obs = self.vec_env.reset()
+                        current_obs.copy_(self.vec_env.reset())
                     # Compute the action
-                    actions = self.actor_critic.act_inference(current_obs)
+                    with self.mixed_precision.autocast():
+                        actions = self.actor_critic.act_inference(current_obs)
                     # Step the vec_environment
                     next_obs, rews, dones, infos = self.vec_env.step(actions)
 
@@ -153,7 +162,7 @@ class SAC:
         else:
             Return = []
             last_score_mean = 0
-            action_range = torch.Tensor([self.action_space.low, self.action_space.high]).to('cuda:0')
+            action_range = torch.Tensor([self.action_space.low, self.action_space.high]).to(self.device)
             states = current_obs
 
             for it in range(self.current_learning_iteration, num_learning_iterations):
@@ -166,20 +175,24 @@ class SAC:
                         current_states = self.vec_env.get_state()
                     # Compute the action
                     if self.buffer.buffer_len() >= self.demonstration_buffer_len:
-                        actions = self.actor_critic.act(states)
+                        with self.mixed_precision.autocast():
+                            actions = self.actor_critic.act(states)
                     else:
-                        actions = self.vec_env.get_reverse_actions()
+                        actions = self.vec_env.get_reverse_actions().clone()
                         print(actions[0])
                         # actions = self.actor_critic.act(states)
                     # action_in =  actions * (action_range[1] - action_range[0]) / 2.0 + (action_range[1] + action_range[0]) / 2.0
                     # Step the vec_environment
                     next_states, reward, done, _ = self.vec_env.step(actions)
                     # domain_para, force = self.vec_env.get_twin_module_data()
+                    # The replay buffer keeps references, so store copies of the vec env outputs
+                    next_states = next_states.clone()
+                    done = done.clone()
                     # implement reward scale
-                    reward *= self.reward_scale
+                    reward = reward * self.reward_scale
 
                     if self.buffer.buffer_len() < self.demonstration_buffer_len:
-                        self.buffer.push_demonstration_data((states, actions, reward, next_states, done), 200)
+                        self.buffer.push_demonstration_data((states, actions, reward, next_states, done), self.demonstration_repeat)
                     else:
                         self.buffer.push((states, actions, reward, next_states, done))
                     states = next_states
@@ -314,25 +327,26 @@ class SAC:
         #--------------------------
         alpha = self.alpha_log.exp().detach()
 
-        with torch.no_grad():
+        with torch.no_grad(), self.mixed_precision.autocast():
             action2, log_prob2 = self.actor_critic.evaluate(next_state)
             target_q1_value = self.actor_critic.target_q1_net(next_state, action2)
             target_q2_value = self.actor_critic.target_q2_net(next_state, action2)
-            backup = reward + (1 - done) * self.gamma * (torch.min(target_q1_value, target_q2_value) - alpha * log_prob2)
+        backup = reward + (1 - done) * self.gamma * (torch.min(target_q1_value, target_q2_value).float() - alpha * log_prob2)
 
-        q1_value = self.actor_critic.q1_net(state, action)
-        q2_value = self.actor_critic.q2_net(state, action)
+        with self.mixed_precision.autocast():
+            q1_value = self.actor_critic.q1_net(state, action)
+            q2_value = self.actor_critic.q2_net(state, action)
 
-        q1_value_loss = self.criterion(q1_value, backup)
-        q2_value_loss = self.criterion(q2_value, backup)
+        q1_value_loss = self.criterion(q1_value.float(), backup)
+        q2_value_loss = self.criterion(q2_value.float(), backup)
 
         # Update Soft q
         self.q1_optimizer.zero_grad()
         self.q2_optimizer.zero_grad()
-        q1_value_loss.backward(retain_graph=True)
-        q2_value_loss.backward()
-        self.q1_optimizer.step()
-        self.q2_optimizer.step()
+        self.mixed_precision.backward(q1_value_loss, retain_graph=True)
+        self.mixed_precision.backward(q2_value_loss)
+        self.mixed_precision.step(self.q1_optimizer)
+        self.mixed_precision.step(self.q2_optimizer)
 
         # Update target networks
         for target_param, param in zip(self.actor_critic.target_q1_net.parameters(), self.actor_critic.q1_net.parameters()):
@@ -341,7 +355,8 @@ class SAC:
             target_param.data.copy_(self.tau * param + (1 - self.tau) * target_param)
 
         '''loss of alpha (temperature parameter automatic adjustment)'''
-        new_action, log_prob = self.actor_critic.evaluate(state)
+        with self.mixed_precision.autocast():
+            new_action, log_prob = self.actor_critic.evaluate(state)
 
         alpha_loss = (- self.alpha_log * (log_prob - self.target_entropy).detach()).mean()
         self.alpha_optimizer.zero_grad()
@@ -354,14 +369,16 @@ class SAC:
         with torch.no_grad():
             self.alpha_log[:] = self.alpha_log.clamp(-20, 2)
         
-        q1_pi_value = self.actor_critic.q1_net(state, new_action)
-        q2_pi_value = self.actor_critic.q2_net(state, new_action)
+        with self.mixed_precision.autocast():
+            q1_pi_value = self.actor_critic.q1_net(state, new_action)
+            q2_pi_value = self.actor_critic.q2_net(state, new_action)
 
         # Policy loss
-        policy_loss = (alpha * log_prob - torch.min(q1_pi_value, q2_pi_value)).mean()
+        policy_loss = (alpha * log_prob - torch.min(q1_pi_value, q2_pi_value).float()).mean()
 
         # Update Policy
         self.policy_optimizer.zero_grad()
-        policy_loss.backward()
-        self.policy_optimizer.step()
+        self.mixed_precision.backward(policy_loss)
+        self.mixed_precision.step(self.policy_optimizer)
+        self.mixed_precision.update()
 
@@ -7,7 +7,6 @@ import collections
 import numpy as np
 import torch.nn.functional as F
 import torch.optim as optim
-import matplotlib.pyplot as plt
 from torch.distributions import Normal
 
 class ReplayBeffer():
@@ -1,10 +1,8 @@
-from isaacgym.gymutil import AxesGeometry
 import numpy as np
 
 import torch
 import torch.nn as nn
 from torch.distributions import MultivariateNormal
-from torchvision.models import squeezenet
 from utils.rl_pytorch.sac.mynetwork import ValueNet, PolicyNet, SoftQNet
 
 from einops import rearrange
@@ -13,19 +11,19 @@ from torch.distributions import Normal
 
 class ActorCritic(nn.Module):
 
-    def __init__(self, obs_shape, states_shape, actions_shape, initial_std, model_cfg, asymmetric=False):
+    def __init__(self, obs_shape, states_shape, actions_shape, initial_std, model_cfg, asymmetric=False, goal_shape=4):
         super(ActorCritic, self).__init__()
 
         self.asymmetric = asymmetric
-        self.goal_shape = 4
+        self.goal_shape = goal_shape
         # initialize networks
-        self.value_net = ValueNet(obs_shape[0]).cuda()
-        self.target_value_net = ValueNet(obs_shape[0]).cuda()
-        self.q1_net = SoftQNet(obs_shape[0] + self.goal_shape, actions_shape[0]).cuda()
-        self.q2_net = SoftQNet(obs_shape[0] + self.goal_shape, actions_shape[0]).cuda()
-        self.policy_net = PolicyNet(obs_shape[0] + self.goal_shape, actions_shape[0]).cuda()
-        self.target_q1_net = SoftQNet(obs_shape[0] + self.goal_shape, actions_shape[0]).cuda()
-        self.target_q2_net = SoftQNet(obs_shape[0] + self.goal_shape, actions_shape[0]).cuda()
+        self.value_net = ValueNet(obs_shape[0])
+        self.target_value_net = ValueNet(obs_shape[0])
+        self.q1_net = SoftQNet(obs_shape[0] + self.goal_shape, actions_shape[0])
+        self.q2_net = SoftQNet(obs_shape[0] + self.goal_shape, actions_shape[0])
+        self.policy_net = PolicyNet(obs_shape[0] + self.goal_shape, actions_shape[0])
+        self.target_q1_net = SoftQNet(obs_shape[0] + self.goal_shape, actions_shape[0])
+        self.target_q2_net = SoftQNet(obs_shape[0] + self.goal_shape, actions_shape[0])
 
         # Action noise
         self.log_std = nn.Parameter(np.log(initial_std) * torch.ones(*actions_shape))
@@ -55,8 +53,8 @@ class ActorCritic(nn.Module):
         noise = Normal(0, 1)
 
         z = noise.sample()
-        action = torch.tanh(mean + std * z.cuda())
-        log_prob = normal.log_prob(mean + std * z.cuda()) - torch.log(1 - action.pow(2) + epsilon)
+        action = torch.tanh(mean + std * z.to(mean.device))
+        log_prob = normal.log_prob(mean + std * z.to(mean.device)) - torch.log(1 - action.pow(2) + epsilon)
         log_prob = torch.sum(log_prob, dim=1, keepdim=True)
 
         return action, log_prob
@@ -125,14 +125,15 @@ class SAC:
         torch.save(self.actor_critic.state_dict(), path)
 
     def run(self, num_learning_iterations, log_interval=1):
-        current_obs = self.vec_env.reset()
-        current_states = self.vec_env.get_state()
+        # The vec env returns views of its own output buffers, keep private copies of the current step
+        current_obs = self.vec_env.reset().clone()
+        current_states = self.vec_env.get_state().clone()
 
         if self.is_testing:
             while True:
                 with torch.no_grad():
                     if self.apply_reset:
-                        current_obs = self.vec_env.reset()
+                        current_obs.copy_(self.vec_env.reset())
                     # Compute the action
                     actions = self.actor_critic.act_inference(current_obs)
                     # Step the vec_environment
@@ -140,7 +141,7 @@ class SAC:
                     current_obs.copy_(next_obs)
         else:
             Return = []
-            action_range = torch.Tensor([self.action_space.low, self.action_space.high]).to('cuda:0')
+            action_range = torch.Tensor([self.action_space.low, self.action_space.high]).to(self.device)
             states = current_obs
 
             for it in range(self.current_learning_iteration, num_learning_iterations):
@@ -151,8 +152,11 @@ class SAC:
                 for T in range(self.num_learning_epochs):
                     actions = self.actor_critic.act(torch.cat([states, goal], -1))
                     next_states, reward, done, goal, _ = self.vec_env.step(actions)
+                    # The replay buffer keeps references, so store copies of the vec env outputs
+                    next_states = next_states.clone()
+                    done = done.clone()
                     # implement reward scale
-                    reward *= self.reward_scale
+                    reward = reward * self.reward_scale
 
                     self.buffer.push((torch.cat([states, goal], -1), actions, reward, torch.cat([next_states, goal], -1), done))
 
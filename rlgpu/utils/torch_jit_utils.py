@@ -48,3 +48,32 @@ def quat_axis(q, axis=0):
     basis_vec = torch.zeros(q.shape[0], 3, device=q.device)
     basis_vec[:, axis] = 1
     return quat_rotate(q, basis_vec)
+
+
+@torch.jit.script
+def transform_points(pos, rot, local_points):
+    # type: (Tensor, Tensor, Tensor) -> Tensor
+    # K points given in the body frames [N, 3] / [N, 4] (xyzw) -> world points [N, K, 3]
+    num_frames = pos.shape[0]
+    num_points = local_points.shape[0]
+    rot = rot.unsqueeze(1).expand(num_frames, num_points, 4).reshape(-1, 4)
+    points = quat_apply(rot, local_points.unsqueeze(0).expand(num_frames, num_points, 3).reshape(-1, 3))
+    return pos.unsqueeze(1) + points.view(num_frames, num_points, 3)
+
+
+@torch.jit.script
+def quat_from_euler_zyx(x, y, z):
+    # type: (Tensor, Tensor, Tensor) -> Tensor
+    # batched gymapi.Quat.from_euler_zyx, rotation about z, then y, then x -> [N, 4] (xyzw)
+    return quat_from_euler_xyz(x, y, z)
+
+
+@torch.jit.script
+def get_euler_zyx(q):
+    # type: (Tensor) -> Tuple[Tensor, Tensor, Tensor]
+    # batched gymapi.Quat.to_euler_zyx, angles in [-pi, pi] unlike get_euler_xyz which wraps to [0, 2pi)
+    qx, qy, qz, qw = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+    x = torch.atan2(2.0 * (qw * qx + qy * qz), 1.0 - 2.0 * (qx * qx + qy * qy))
+    y = torch.asin(torch.clamp(2.0 * (qw * qy - qz * qx), -1.0, 1.0))
+    z = torch.atan2(2.0 * (qw * qz + qx * qy), 1.0 - 2.0 * (qy * qy + qz * qz))
+    return x, y, z